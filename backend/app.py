@@ -1,245 +1,430 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
-import yfinance as yf
 import numpy as np
 from datetime import datetime, timedelta
 import pandas as pd
+import hashlib
+import logging
+import os
 import sqlite3
-import json
-from pathlib import Path
+import time
+from bar_store import BarStore
+from forecast import (DEFAULT_NUM_PATHS, DEFAULT_QUANTILES, adjust_drift_volatility, estimate_drift_volatility,
+                      monte_carlo_forecast, prediction_count)
+from ingest import IngestWorker, Ingestor, parse_tickers
+from logs import configure_logging
+from market_data import MarketDataCache, UpstreamTimeout, align_timestamps, current_bar, timeframe_interval
+from markets import MARKETS, universe
+from metrics import (CONTENT_TYPE, PREDICT_COMPUTE_SECONDS, PREDICTION_CACHE_REQUESTS, REGISTRY, REQUEST_SECONDS,
+                     SERIALIZATION_SECONDS)
+from model.registry import DEFAULT_CHECKPOINT, ModelRegistry
+from profiling import RequestProfiler
+from reconcile import ReconciliationWorker
+from retention import RetentionWorker, daily_errors, parse_retention
+from rolling_stats import ReturnStatsStore
+from serialization import HISTORY_FORMATS, dumps, serialize_history
+from shared_cache import SharedBarCache
+from singleflight import BarCache
+from storage import DATA_DIR, DB_PATH, Database
+from streaming import StreamHub, TooManySubscribers
+from warmup import Warmup
 
 app = Flask(__name__)
 CORS(app)
 
-# Create database directory if it doesn't exist
-DB_DIR = Path(__file__).parent / 'data'
-DB_DIR.mkdir(exist_ok=True)
-DB_PATH = DB_DIR / 'predictions.db'
+# Structured logs are written from a background thread, never from the request
+configure_logging()
+logger = logging.getLogger(__name__)
 
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Drop existing table if it exists
-    c.execute('DROP TABLE IF EXISTS predictions')
-    
-    # Create the predictions table with the timeframe column
-    c.execute('''
-        CREATE TABLE predictions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticker TEXT NOT NULL,
-            market_type TEXT NOT NULL,
-            prediction_time TIMESTAMP NOT NULL,
-            target_time TIMESTAMP NOT NULL,
-            predicted_price REAL NOT NULL,
-            actual_price REAL,
-            error_percentage REAL,
-            timeframe TEXT NOT NULL DEFAULT '1d',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-# Initialize the database when the app starts
-init_db()
-
-# Common futures contracts with their yfinance symbols
-FUTURES_SYMBOLS = {
-    'ES': 'ES=F',  # E-mini S&P 500
-    'NQ': 'NQ=F',  # E-mini NASDAQ 100
-    'YM': 'YM=F',  # E-mini Dow
-    'RTY': 'RTY=F',  # E-mini Russell 2000
-    'GC': 'GC=F',  # Gold
-    'SI': 'SI=F',  # Silver
-    'CL': 'CL=F',  # Crude Oil
-    'NG': 'NG=F',  # Natural Gas
-    'ZB': 'ZB=F',  # Treasury Bond
-    'ZN': 'ZN=F',  # 10-Year T-Note
-    '6E': '6E=F',  # Euro FX
-    '6J': '6J=F',  # Japanese Yen
-    'ZC': 'ZC=F',  # Corn
-    'ZS': 'ZS=F',  # Soybeans
-    'ZW': 'ZW=F',  # Wheat
-}
-
-# Common cryptocurrency pairs
-CRYPTO_SYMBOLS = {
-    'BTC-USD': 'Bitcoin',
-    'ETH-USD': 'Ethereum',
-    'BNB-USD': 'Binance Coin',
-    'XRP-USD': 'Ripple',
-    'ADA-USD': 'Cardano',
-    'DOGE-USD': 'Dogecoin',
-    'SOL-USD': 'Solana',
-    'DOT-USD': 'Polkadot',
-    'MATIC-USD': 'Polygon',
-    'LINK-USD': 'Chainlink'
-}
+# Pooled SQLite storage; the schema is migrated in place, never dropped on startup, and
+# concurrent workers agree on the version because each migration runs in one write transaction
+db = Database(DB_PATH)
+db.migrate()
+
+# Columnar bar history shared by serving, reconciliation and training
+bar_store = BarStore(os.environ.get('BAR_STORE_DIR', DATA_DIR / 'bars'))
+
+# Bars shared with the other worker processes on this host (serve.py sets SHARED_CACHE_DIR)
+shared_cache = None
+if os.environ.get('SHARED_CACHE_DIR'):
+    shared_cache = SharedBarCache(os.environ['SHARED_CACHE_DIR'],
+                                  max_bytes=int(os.environ.get('SHARED_CACHE_MAX_MB', 256)) * 1024 * 1024)
+
+# Shared OHLCV cache in front of the market data provider, with the bar store as its cold tier
+market_data = MarketDataCache(
+    DATA_DIR / 'market_cache',
+    max_concurrent_fetches=int(os.environ.get('UPSTREAM_MAX_CONCURRENCY', 8)),
+    fetch_timeout=float(os.environ.get('UPSTREAM_TIMEOUT', 15)),
+    bar_store=bar_store,
+    shared_cache=shared_cache
+)
+
+# Drift and volatility inputs kept up to date as bars arrive in the cache
+return_stats = ReturnStatsStore(
+    mode=os.environ.get('RETURN_STATS_MODE', 'window'),
+    halflife=float(os.environ['RETURN_STATS_HALFLIFE']) if 'RETURN_STATS_HALFLIFE' in os.environ else None
+)
+market_data.add_listener(return_stats.update)
+
+# Shared StockTime model for the 'lstm' engine, loaded once per process
+model_registry = ModelRegistry(
+    os.environ.get('STOCKTIME_MODEL_PATH', DEFAULT_CHECKPOINT),
+    compile=os.environ.get('STOCKTIME_COMPILE') == '1',
+    quantize=os.environ.get('STOCKTIME_QUANTIZE') == '1'
+)
+
+# Heavy imports and model loading happen off the import path; /healthz reports ready once they finish
+warmup_steps = [('market_data_provider', market_data.provider.preload)]
+if os.environ.get('STOCKTIME_PRELOAD_MODEL') == '1':
+    warmup_steps.append(('model', model_registry.load))
+warmup = Warmup(warmup_steps)
+warmup.start()
+
+PREDICTION_ENGINES = ('random_walk', 'lstm')
+
+# Predictions reused by identical requests on the same last bar, until the current bar closes
+prediction_cache = BarCache()
+
+# Encoded /predict bodies and their ETags, keyed like prediction_cache plus the history format
+response_cache = BarCache()
+
+# Live bar and prediction updates for /stream subscribers; each open stream holds a
+# request thread, so the subscriber cap stays below WSGI_THREADS
+stream_hub = StreamHub(market_data, lambda *key: latest_prediction(*key),
+                       max_events=int(os.environ.get('STREAM_QUEUE_SIZE', 100)),
+                       max_subscribers=int(os.environ.get('STREAM_MAX_SUBSCRIBERS', 16)))
+
+# /track_predictions page size, overridable per request up to the maximum
+TRACKING_PAGE_SIZE = 500
+TRACKING_MAX_PAGE_SIZE = 5000
+
+# Per-request profiling via the X-Profile header, only when explicitly enabled
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED') == '1'
+profiler = RequestProfiler(os.environ.get('PROFILE_DIR', DATA_DIR / 'profiles'))
+
+# Seconds between background passes that persist actual prices (0 disables)
+RECONCILE_INTERVAL = int(os.environ.get('RECONCILE_INTERVAL', 60))
+
+# Seconds between retention passes (0 disables), days kept per timeframe and an optional archive file
+RETENTION_INTERVAL = int(os.environ.get('RETENTION_INTERVAL', 3600))
+PREDICTION_RETENTION = parse_retention(os.environ.get('PREDICTION_RETENTION'))
+PREDICTION_ARCHIVE = os.environ.get('PREDICTION_ARCHIVE')
+
+# Keep the bar store warm for the futures, crypto and listed stock universes
+INGEST_ENABLED = os.environ.get('INGEST_ENABLED') == '1'
+INGEST_STOCKS = parse_tickers(os.environ.get('INGEST_STOCKS'))
+
+@app.before_request
+def start_request():
+    g.request_started = time.perf_counter()
+    kind = request.headers.get('X-Profile')
+    if PROFILING_ENABLED and kind:
+        g.profile = profiler.start(kind)
+
+@app.after_request
+def finish_request(response):
+    endpoint = request.endpoint or 'unknown'
+    session = g.pop('profile', None)
+    if session is not None:
+        response.headers['X-Profile-File'] = profiler.stop(session, endpoint).name
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_started,
+                            endpoint=endpoint, method=request.method, status=response.status_code)
+    return response
+
+@app.teardown_request
+def release_profile(error=None):
+    # after_request is skipped when a view raises; never leave the profiler running
+    session = g.pop('profile', None)
+    if session is not None:
+        profiler.stop(session, request.endpoint or 'unknown')
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    report = warmup.report()
+    try:
+        db.connection().execute('SELECT 1')
+        report['database'] = 'ok'
+    except sqlite3.Error as e:
+        report['ready'] = False
+        report['database'] = str(e)
+    return jsonify(report), 200 if report['ready'] else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 @app.route('/markets', methods=['GET'])
 def get_markets():
-    markets = [
-        {
-            'id': 'stocks',
-            'name': 'Stocks',
-            'description': 'US Stock Market',
-            'examples': ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA']
-        },
-        {
-            'id': 'crypto',
-            'name': 'Crypto',
-            'description': 'Cryptocurrency Market',
-            'examples': ['BTC-USD', 'ETH-USD', 'SOL-USD', 'XRP-USD', 'DOGE-USD'],
-            'timeframes': [
-                {'id': '5min', 'name': '5 Minutes', 'interval': '5m'},
-                {'id': '15min', 'name': '15 Minutes', 'interval': '15m'},
-                {'id': '1h', 'name': '1 Hour', 'interval': '1h'},
-                {'id': '1d', 'name': '1 Day', 'interval': '1d'}
-            ]
-        },
-        {
-            'id': 'futures',
-            'name': 'Futures',
-            'description': 'Futures Market',
-            'examples': ['ES=F', 'NQ=F', 'YM=F', 'RTY=F', 'CL=F']
-        }
-    ]
-    return jsonify({'markets': markets})
+    return jsonify({'markets': MARKETS})
+
+def normalize_ticker(ticker, market_type):
+    # Add suffix for crypto tickers if not present
+    if market_type == 'crypto' and '-USD' not in ticker:
+        return f"{ticker}-USD"
+    return ticker
+
+def serialize_bands(forecast):
+    return {f"p{round(q * 100):02d}": band.tolist() for q, band in forecast['bands'].items()}
 
-@app.route('/predict', methods=['POST'])
+class NoDataError(LookupError):
+    """The provider returned no bars for a ticker."""
+
+def bar_seed(ticker, market_type, timeframe, bar_time, engine):
+    # Same bar and engine, same paths: every worker shows and stores the same forecast
+    digest = hashlib.blake2b(f"{ticker}|{market_type}|{timeframe}|{bar_time}|{engine}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), 'big')
+
+def compute_prediction(hist, ticker, market_type, timeframe, engine, quantiles, seed):
+    interval, _ = timeframe_interval(timeframe)
+    num_predictions = prediction_count(market_type, timeframe)
+    logger.debug('Generating %d predictions from %d bars (%s)', num_predictions, len(hist), interval)
+    
+    # Calculate predictions with explicit num_predictions
+    with PREDICT_COMPUTE_SECONDS.time(engine=engine):
+        if engine == 'lstm':
+            forecast = calculate_lstm_forecast(hist, num_predictions)
+        else:
+            paths_seed = seed if seed is not None else bar_seed(ticker, market_type, timeframe,
+                                                                hist.index[-1].value, engine)
+            forecast = calculate_forecast(hist, num_predictions, market_type, timeframe,
+                                          quantiles=quantiles, seed=paths_seed,
+                                          stats=return_stats.get(ticker, interval))
+    predictions = forecast['median']
+    
+    # Tracked once per bar and engine, however many requests or workers forecast from it.
+    # Quantiles only change the bands, but an explicitly seeded forecast is a sample of its own and always stored.
+    bar_time = align_timestamps(hist.index[-1], None).to_pydatetime() if seed is None else None
+    store_predictions(ticker, market_type, predictions, timeframe, engine=engine, bar_time=bar_time)
+    return hist, forecast
+
+def cached_prediction(ticker, market_type, timeframe, engine, quantiles, seed):
+    """
+    Forecast from the latest bar, computed once per request parameters and bar
+
+    Returns:
+        tuple: (key, hist, forecast, expires_at) where key identifies the
+        parameters and the last bar, and expires_at is when the current bar closes
+    """
+    interval, period = timeframe_interval(timeframe)
+    hist = market_data.get_history(ticker, interval, period)
+    if hist.empty:
+        raise NoDataError(ticker)
+
+    _, bar_end = current_bar(interval)
+    key = (ticker, market_type, timeframe, hist.index[-1].value, engine, quantiles, seed)
+    (hist, forecast), hit = prediction_cache.get_or_compute(
+        key,
+        lambda: compute_prediction(hist, ticker, market_type, timeframe, engine, quantiles, seed),
+        expires_at=bar_end
+    )
+    PREDICTION_CACHE_REQUESTS.inc(result='hit' if hit else 'miss')
+    return key, hist, forecast, bar_end
+
+@app.route('/predict', methods=['GET', 'POST'])
 def predict():
-    data = request.get_json()
+    # GET takes the same fields as query parameters, so browsers can cache and revalidate it
+    data = request.get_json() if request.method == 'POST' else request.args
     ticker = data.get('ticker')
     market_type = data.get('marketType')
     timeframe = data.get('timeframe', '1d')
+    engine = request.args.get('engine') or data.get('engine', 'random_walk')
+    history_format = request.args.get('format') or data.get('format', 'records')
     
-    print(f"Received prediction request - Ticker: {ticker}, Market: {market_type}, Timeframe: {timeframe}")
+    logger.info('Prediction request', extra={'ticker': ticker, 'market_type': market_type,
+                                             'timeframe': timeframe, 'engine': engine})
     
     if not ticker:
         return jsonify({'error': 'Ticker symbol is required'}), 400
+    if engine not in PREDICTION_ENGINES:
+        return jsonify({'error': f"Unknown engine '{engine}', expected one of {', '.join(PREDICTION_ENGINES)}"}), 400
+    if history_format not in HISTORY_FORMATS:
+        return jsonify({'error': f"Unknown format '{history_format}', expected one of {', '.join(HISTORY_FORMATS)}"}), 400
 
     try:
-        # Add suffix for crypto tickers if not present
-        if market_type == 'crypto' and '-USD' not in ticker:
-            ticker = f"{ticker}-USD"
-
-        # Configure data fetching based on timeframe
-        intervals = {
-            '5min': ('5m', '1d'),    # 1 day of 5-min data
-            '15min': ('15m', '2d'),  # 2 days of 15-min data
-            '1h': ('1h', '7d'),      # 7 days of hourly data
-            '1d': ('1d', '30d')      # 30 days of daily data
-        }
-        
-        interval, period = intervals.get(timeframe, ('1d', '30d'))
-        print(f"Fetching data with interval: {interval}, period: {period}")
-        
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period=period, interval=interval)
-        
-        if hist.empty:
-            print(f"No data available for ticker: {ticker}")
-            return jsonify({'error': 'No data available for the specified ticker'}), 404
-
-        print(f"Successfully fetched {len(hist)} data points")
-        
-        # Determine number of predictions based on market type and timeframe
-        if market_type == 'crypto':
-            num_predictions = {
-                '5min': 24,    # 2 hours worth of 5-min predictions
-                '15min': 16,   # 4 hours worth of 15-min predictions
-                '1h': 12,      # 12 hours worth of hourly predictions
-                '1d': 7        # 7 days worth of daily predictions
-            }.get(timeframe, 12)
+        if request.method == 'POST':
+            quantiles = tuple(float(q) for q in data.get('quantiles', DEFAULT_QUANTILES))
+            seed = int(data['seed']) if data.get('seed') is not None else None
         else:
-            num_predictions = 7  # Default to 7 predictions for stocks
-            
-        print(f"Will generate {num_predictions} predictions")
-        
-        # Calculate predictions with explicit num_predictions
-        predictions = calculate_predictions(hist, num_predictions, market_type, timeframe)
-        print(f"Generated {len(predictions)} predictions")
-        
-        # Store predictions in database
-        store_predictions(ticker, market_type, predictions, timeframe)
-
-        response_data = {
-            'ticker': ticker,
-            'historical_data': [
-                {
-                    'time': index.strftime('%Y-%m-%d %H:%M:%S'),
-                    'open': float(row['Open']),
-                    'high': float(row['High']),
-                    'low': float(row['Low']),
-                    'close': float(row['Close']),
-                    'volume': int(row['Volume'])
-                }
-                for index, row in hist.iterrows()
-            ],
-            'predictions': [float(p) for p in predictions],
-            'timeframe': timeframe
-        }
-        
-        print(f"Sending response with {len(response_data['historical_data'])} historical points and {len(response_data['predictions'])} predictions")
-        return jsonify(response_data)
+            quantiles = tuple(float(q) for q in data['quantiles'].split(',')) if data.get('quantiles') \
+                else DEFAULT_QUANTILES
+            seed = int(data['seed']) if data.get('seed') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'quantiles must be a list of numbers and seed an integer'}), 400
+    if not all(0 < q < 1 for q in quantiles):
+        return jsonify({'error': 'quantiles must be between 0 and 1'}), 400
 
+    try:
+        ticker = normalize_ticker(ticker, market_type)
+
+        # Identical requests share one fetch, compute, store and encoded body until a new bar arrives
+        key, hist, forecast, expires_at = cached_prediction(ticker, market_type, timeframe, engine, quantiles, seed)
+
+        def encode():
+            with SERIALIZATION_SECONDS.time(endpoint='predict'):
+                body = dumps({
+                    'ticker': ticker,
+                    'historical_data': serialize_history(hist, history_format),
+                    'predictions': np.asarray(forecast['median'], dtype=np.float64),
+                    'confidence_bands': serialize_bands(forecast),
+                    'timeframe': timeframe,
+                    'engine': engine
+                })
+            return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+        (body, etag), _ = response_cache.get_or_compute(key + (history_format,), encode, expires_at=expires_at)
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.max_age = max(0, int(expires_at - time.time()))
+        # Answers a matching If-None-Match on GET with an empty 304
+        return response.make_conditional(request)
+
+    except NoDataError:
+        logger.warning('No data available', extra={'ticker': ticker})
+        return jsonify({'error': 'No data available for the specified ticker'}), 404
+    except UpstreamTimeout as e:
+        logger.warning('Upstream timeout in prediction', extra={'ticker': ticker, 'error': str(e)})
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
-        print(f"Error in prediction: {str(e)}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('Error in prediction', extra={'ticker': ticker})
         return jsonify({'error': str(e)}), 500
 
-def calculate_predictions(hist, num_predictions, market_type, timeframe='1d'):
+def latest_prediction(ticker, market_type, timeframe):
+    # Shares the /predict cache entry for a default request on the latest bar
+    _, hist, forecast, _ = cached_prediction(ticker, market_type, timeframe, 'random_walk', DEFAULT_QUANTILES, None)
+    return {
+        'ticker': ticker,
+        'timeframe': timeframe,
+        'last_time': hist.index[-1].strftime('%Y-%m-%d %H:%M:%S'),
+        'predictions': np.asarray(forecast['median'], dtype=np.float64),
+        'confidence_bands': serialize_bands(forecast)
+    }
+
+@app.route('/stream', methods=['GET'])
+def stream():
+    ticker = request.args.get('ticker')
+    market_type = request.args.get('marketType')
+    timeframe = request.args.get('timeframe', '1d')
+    
+    if not ticker:
+        return jsonify({'error': 'Ticker symbol is required'}), 400
+
     try:
-        returns = hist['Close'].pct_change().dropna()
-        volatility = returns.std()
-        
-        # Adjust volatility based on market type and timeframe
-        if market_type == 'crypto':
-            volatility_multipliers = {
-                '5min': 0.2,   # Reduced volatility for shorter timeframes
-                '15min': 0.3,
-                '1h': 0.5,
-                '1d': 1.0
-            }
-            volatility *= volatility_multipliers.get(timeframe, 1.0)
-        
-        last_price = hist['Close'].iloc[-1]
+        subscription = stream_hub.subscribe(normalize_ticker(ticker, market_type), market_type, timeframe)
+    except TooManySubscribers as e:
+        return jsonify({'error': str(e)}), 503
+    return Response(
+        stream_with_context(stream_hub.events(subscription)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    data = request.get_json()
+    items = data.get('requests', []) if isinstance(data, dict) else data
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'At least one prediction request is required'}), 400
+    if any(not isinstance(item, dict) or not item.get('ticker') or not isinstance(item['ticker'], str)
+           for item in items):
+        return jsonify({'error': 'Every request must be an object with a ticker symbol'}), 400
+
+    # Group requests by bar interval so each group is fetched with one multi-ticker download
+    groups = {}
+    for item in items:
+        market_type = item.get('marketType')
+        timeframe = item.get('timeframe', '1d')
+        ticker = normalize_ticker(item['ticker'], market_type)
+        groups.setdefault(timeframe_interval(timeframe), []).append((ticker, market_type, timeframe))
+    
+    logger.info('Batch prediction request', extra={'tickers': len(items), 'interval_groups': len(groups)})
+
+    def ndjson_line(payload):
+        with SERIALIZATION_SECONDS.time(endpoint='predict_batch'):
+            return dumps(payload) + b'\n'
+
+    def generate():
+        stored = 0
+        for (interval, period), group in groups.items():
+            try:
+                histories = market_data.get_history_many([ticker for ticker, _, _ in group], interval, period)
+            except Exception as e:
+                logger.exception('Error fetching batch data', extra={'interval': interval})
+                for ticker, _, timeframe in group:
+                    yield ndjson_line({'ticker': ticker, 'timeframe': timeframe, 'error': str(e)})
+                continue
+            
+            for ticker, market_type, timeframe in group:
+                hist = histories.get(ticker)
+                if hist is None or hist.empty:
+                    yield ndjson_line({'ticker': ticker, 'timeframe': timeframe,
+                                       'error': 'No data available for the specified ticker'})
+                    continue
+                try:
+                    with PREDICT_COMPUTE_SECONDS.time(engine='random_walk'):
+                        forecast = calculate_forecast(hist, prediction_count(market_type, timeframe),
+                                                      market_type, timeframe,
+                                                      seed=bar_seed(ticker, market_type, timeframe,
+                                                                    hist.index[-1].value, 'random_walk'),
+                                                      stats=return_stats.get(ticker, interval))
+                except Exception as e:
+                    yield ndjson_line({'ticker': ticker, 'timeframe': timeframe, 'error': str(e)})
+                    continue
+                
+                predictions = forecast['median']
+                # Stored before the line is sent, so a client that disconnects keeps what it was shown,
+                # and tracked once per bar like /predict
+                bar_time = align_timestamps(hist.index[-1], None).to_pydatetime()
+                if store_predictions(ticker, market_type, predictions, timeframe, bar_time=bar_time):
+                    stored += len(predictions)
+                yield ndjson_line({
+                    'ticker': ticker,
+                    'market_type': market_type,
+                    'timeframe': timeframe,
+                    'last_price': float(hist['Close'].iloc[-1]),
+                    'predictions': [float(p) for p in predictions],
+                    'confidence_bands': serialize_bands(forecast)
+                })
         
-        # Adjust drift calculation based on timeframe
-        if timeframe == '5min':
-            drift = returns.mean() * 0.1
-        elif timeframe == '15min':
-            drift = returns.mean() * 0.2
-        elif timeframe == '1h':
-            drift = returns.mean() * 0.4
+        yield ndjson_line({'done': True, 'stored_predictions': stored})
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def calculate_forecast(hist, num_predictions, market_type, timeframe='1d', num_paths=DEFAULT_NUM_PATHS,
+                       quantiles=DEFAULT_QUANTILES, seed=None, stats=None):
+    try:
+        if stats is not None:
+            # Incrementally maintained (mean, std, count) of returns: O(1) instead of a full pass
+            drift, volatility = adjust_drift_volatility(stats[0], stats[1], market_type, timeframe)
         else:
-            drift = returns.mean()
+            returns = hist['Close'].pct_change().dropna()
+            drift, volatility = estimate_drift_volatility(returns, market_type, timeframe)
+        last_price = float(hist['Close'].iloc[-1])
         
-        predictions = []
-        for i in range(num_predictions):
-            # Generate random walk
-            random_walk = np.random.normal(drift, volatility)
-            if i == 0:
-                predictions.append(last_price * (1 + random_walk))
-            else:
-                predictions.append(predictions[-1] * (1 + random_walk))
+        # Simulate every path at once and summarise them as a median with bands
+        forecast = monte_carlo_forecast(last_price, drift, volatility, num_predictions,
+                                        num_paths=num_paths, quantiles=quantiles, seed=seed)
         
-        print(f"Generated predictions: First: {predictions[0]:.2f}, Last: {predictions[-1]:.2f}")
-        return predictions
+        median = forecast['median']
+        logger.debug('Generated predictions: first %.2f, last %.2f', median[0], median[-1])
+        return forecast
         
-    except Exception as e:
-        print(f"Error in calculate_predictions: {str(e)}")
+    except Exception:
+        logger.exception('Error in calculate_forecast')
         raise
 
-def store_predictions(ticker, market_type, predictions, timeframe='1d'):
-    conn = get_db_connection()
-    c = conn.cursor()
-    
-    current_time = datetime.now()
+def calculate_lstm_forecast(hist, num_predictions):
+    # The shared model coalesces concurrent requests into one batch
+    median = model_registry.predict(hist['Close'].to_numpy(), num_predictions)
+    logger.debug('Generated LSTM predictions: first %.2f, last %.2f', median[0], median[-1])
+    return {'median': median, 'bands': {}}
+
+def calculate_predictions(hist, num_predictions, market_type, timeframe='1d', seed=None):
+    forecast = calculate_forecast(hist, num_predictions, market_type, timeframe, seed=seed)
+    return forecast['median'].tolist()
+
+def prediction_rows(ticker, market_type, predictions, timeframe='1d', current_time=None, engine='random_walk'):
+    current_time = current_time or datetime.now()
     
     # Calculate prediction intervals based on timeframe
     intervals = {
@@ -250,136 +435,127 @@ def store_predictions(ticker, market_type, predictions, timeframe='1d'):
     }
     interval = intervals.get(timeframe, timedelta(days=1))
     
-    # Store each prediction
-    for i, pred_price in enumerate(predictions):
-        target_time = current_time + (interval * (i + 1))
-        c.execute('''
-            INSERT INTO predictions 
-            (ticker, market_type, prediction_time, target_time, predicted_price, timeframe)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (ticker, market_type, current_time, target_time, pred_price, timeframe))
-    
-    conn.commit()
-    conn.close()
+    return [
+        (ticker, market_type, current_time, current_time + (interval * (i + 1)), float(pred_price), timeframe,
+         i + 1, engine)
+        for i, pred_price in enumerate(predictions)
+    ]
+
+def store_predictions(ticker, market_type, predictions, timeframe='1d', engine='random_walk', bar_time=None):
+    # Store all predictions in one transaction, unless the engine already made predictions since bar_time
+    return db.insert_predictions(prediction_rows(ticker, market_type, predictions, timeframe, engine=engine),
+                                 unless_since=bar_time)
 
 @app.route('/track_predictions', methods=['GET'])
 def track_predictions():
     ticker = request.args.get('ticker')
     market_type = request.args.get('marketType')
     timeframe = request.args.get('timeframe', '1d')
-    days = int(request.args.get('days', 7))
+    cursor = request.args.get('cursor')
+    breakdown = [column for column in request.args.get('breakdown', '').split(',') if column]
     
     if not ticker or not market_type:
         return jsonify({'error': 'Ticker and market type are required'}), 400
-        
     try:
-        conn = get_db_connection()
-        c = conn.cursor()
+        days = int(request.args.get('days', 7))
+        limit = int(request.args.get('limit', TRACKING_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'days and limit must be integers'}), 400
+    # A page holds at least one row and at most the maximum page size
+    limit = max(1, min(limit, TRACKING_MAX_PAGE_SIZE))
         
-        # Add USD suffix for crypto if not present
-        if market_type == 'crypto' and '-USD' not in ticker:
-            ticker = f"{ticker}-USD"
+    try:
+        ticker = normalize_ticker(ticker, market_type)
         
         # Get predictions from the specified timeframe
         cutoff_date = datetime.now() - timedelta(days=days)
-        c.execute('''
-            SELECT * FROM predictions 
-            WHERE ticker = ? 
-            AND market_type = ? 
-            AND timeframe = ?
-            AND prediction_time > ?
-            ORDER BY prediction_time DESC
-        ''', (ticker, market_type, timeframe, cutoff_date))
+        filters = {'ticker': ticker, 'market_type': market_type, 'timeframe': timeframe, 'since': cutoff_date}
         
+        # Actual prices are filled in by the background reconciliation worker
+        rows, next_cursor = db.prediction_page(limit=limit, cursor=cursor, **filters)
         predictions = []
-        for row in c.fetchall():
-            prediction_time = datetime.strptime(row[3], '%Y-%m-%d %H:%M:%S.%f')
-            target_time = datetime.strptime(row[4], '%Y-%m-%d %H:%M:%S.%f')
-            
-            # For completed predictions, fetch actual price
-            actual_price = None
-            error_percentage = None
-            if target_time < datetime.now():
-                try:
-                    stock = yf.Ticker(ticker)
-                    # Fetch historical data based on timeframe
-                    if timeframe == '5min':
-                        interval = '5m'
-                    elif timeframe == '15min':
-                        interval = '15m'
-                    elif timeframe == '1h':
-                        interval = '1h'
-                    else:
-                        interval = '1d'
-                        
-                    hist = stock.history(start=target_time - timedelta(minutes=5),
-                                       end=target_time + timedelta(minutes=5),
-                                       interval=interval)
-                    if not hist.empty:
-                        actual_price = hist['Close'].iloc[-1]
-                        error_percentage = ((actual_price - row[5]) / row[5]) * 100
-                except Exception as e:
-                    print(f"Error fetching actual price: {str(e)}")
-            
-            predictions.append({
-                'id': row[0],
-                'ticker': row[1],
-                'market_type': row[2],
-                'prediction_time': prediction_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'target_time': target_time.strftime('%Y-%m-%d %H:%M:%S'),
-                'predicted_price': row[5],
-                'actual_price': actual_price,
-                'error_percentage': error_percentage,
-                'timeframe': row[7]
-            })
+        for row in rows:
+            # Stored times lose their fraction when it happens to be zero
+            prediction_time = datetime.fromisoformat(row['prediction_time'])
+            target_time = datetime.fromisoformat(row['target_time'])
+            predictions.append(dict(
+                row,
+                prediction_time=prediction_time.strftime('%Y-%m-%d %H:%M:%S'),
+                target_time=target_time.strftime('%Y-%m-%d %H:%M:%S')
+            ))
         
-        # Calculate statistics for completed predictions
-        completed_predictions = [p for p in predictions if p['actual_price'] is not None]
-        statistics = calculate_prediction_statistics(completed_predictions)
-        
-        conn.close()
-        return jsonify({
+        # Statistics cover the whole window, not just this page, and are aggregated in SQLite
+        response = {
             'predictions': predictions,
-            'statistics': statistics
-        })
+            'statistics': db.prediction_statistics(**filters),
+            'next_cursor': next_cursor
+        }
+        if breakdown:
+            response['breakdown'] = db.prediction_statistics(group_by=breakdown, **filters)
+        with SERIALIZATION_SECONDS.time(endpoint='track_predictions'):
+            return jsonify(response)
         
-    except Exception as e:
-        print(f"Error: {str(e)}")
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        logger.exception('Error fetching prediction data', extra={'ticker': ticker})
         return jsonify({'error': 'Failed to fetch prediction data'}), 500
 
-def calculate_prediction_statistics(predictions):
-    if not predictions:
-        return {
-            'total_predictions': 0,
-            'completed_predictions': 0,
-            'average_error': None,
-            'max_error': None,
-            'min_error': None,
-            'accuracy_within_1_percent': 0,
-            'accuracy_within_5_percent': 0
-        }
+@app.route('/track_predictions/daily', methods=['GET'])
+def track_predictions_daily():
+    ticker = request.args.get('ticker')
+    market_type = request.args.get('marketType')
+    timeframe = request.args.get('timeframe', '1d')
     
-    errors = [abs(p['error_percentage']) for p in predictions]
-    return {
-        'total_predictions': len(predictions),
-        'completed_predictions': len(predictions),
-        'average_error': sum(errors) / len(errors),
-        'max_error': max(errors),
-        'min_error': min(errors),
-        'accuracy_within_1_percent': sum(1 for e in errors if e <= 1) / len(errors) * 100,
-        'accuracy_within_5_percent': sum(1 for e in errors if e <= 5) / len(errors) * 100
-    }
+    if not ticker or not market_type:
+        return jsonify({'error': 'Ticker and market type are required'}), 400
+    try:
+        days = int(request.args.get('days', 90))
+    except ValueError:
+        return jsonify({'error': 'days must be an integer'}), 400
+    
+    # Accuracy of predictions that aged out of the live table, one entry per day
+    ticker = normalize_ticker(ticker, market_type)
+    since = datetime.now() - timedelta(days=days)
+    return jsonify({'days': daily_errors(db, ticker, market_type, timeframe, since)})
 
 def get_db_connection():
-    return sqlite3.connect(DB_PATH)
+    return db.connection()
 
 @app.route('/reset_db', methods=['POST'])
 def reset_database():
     try:
-        init_db()
+        db.reset()
         return jsonify({'message': 'Database reset successfully'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def start_reconciler():
+    if RECONCILE_INTERVAL <= 0:
+        return None
+    worker = ReconciliationWorker(db, market_data, interval=RECONCILE_INTERVAL)
+    worker.start()
+    return worker
+
+def start_retention():
+    if RETENTION_INTERVAL <= 0:
+        return None
+    worker = RetentionWorker(db, interval=RETENTION_INTERVAL, ttls=PREDICTION_RETENTION,
+                             archive_path=PREDICTION_ARCHIVE)
+    worker.start()
+    return worker
+
+def start_ingest():
+    if not INGEST_ENABLED:
+        return None
+    worker = IngestWorker(Ingestor(bar_store), universe(INGEST_STOCKS))
+    worker.start()
+    return worker
+
 if __name__ == '__main__':
+    # With the debug reloader only the serving child process runs the worker
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_reconciler()
+        start_retention()
+        start_ingest()
     app.run(debug=True)
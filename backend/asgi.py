@@ -0,0 +1,15 @@
+"""
+ASGI entry point for production serving
+
+The Flask routes are served unchanged through an ASGI adapter, so the event
+loop accepts connections while each request runs on its own thread from a
+bounded pool (WSGI_THREADS per worker process). Upstream fetches are
+additionally bounded and timed out by the market data cache. Launch with
+``python serve.py``.
+"""
+import os
+
+from app import app
+from wsgi_bridge import ThreadPoolWsgiToAsgi
+
+application = ThreadPoolWsgiToAsgi(app, max_threads=int(os.environ.get('WSGI_THREADS', 32)))
@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from bar_store import BarStore
+from forecast import adjust_drift_volatility, median_paths, prediction_count
+from market_data import timeframe_interval
+from model.registry import DEFAULT_CHECKPOINT, ModelRegistry
+from rolling_stats import DEFAULT_LOOKBACKS
+from storage import DATA_DIR
+from tracking import error_statistics
+
+ENGINES = ('random_walk', 'lstm')
+
+
+def origin_windows(closes, lookback, horizon, stride=1):
+    """
+    Every forecast origin in a close series as strided views
+
+    Args:
+        closes (np.array): Close prices in time order
+        lookback (int): Bars of history each forecast sees
+        horizon (int): Bars forecast after each origin
+        stride (int): Bars between consecutive origins
+
+    Returns:
+        tuple: (history of shape (origins, lookback), realised prices of
+        shape (origins, horizon)); both are views into ``closes``
+    """
+    if len(closes) < lookback + horizon:
+        return np.empty((0, lookback)), np.empty((0, horizon))
+    windows = sliding_window_view(closes, lookback + horizon)[::stride]
+    return windows[:, :lookback], windows[:, lookback:]
+
+
+def monte_carlo_predictions(history, horizon, market_type, timeframe):
+    """
+    Median forecasts of the 'random_walk' engine for every origin at once
+
+    Drift and volatility are estimated per origin over its lookback the
+    same way ``estimate_drift_volatility`` does, and the median path is
+    taken in closed form rather than by sampling.
+    """
+    returns = history[:, 1:] / history[:, :-1] - 1
+    drift, volatility = adjust_drift_volatility(returns.mean(axis=1), returns.std(axis=1, ddof=1),
+                                                market_type, timeframe)
+    return median_paths(history[:, -1], drift, volatility, horizon)
+
+
+def lstm_predictions(history, horizon, checkpoint=None):
+    """Forecasts of the 'lstm' engine for every origin, in large model batches."""
+    return ModelRegistry(checkpoint or DEFAULT_CHECKPOINT).predict_many(history, horizon)
+
+
+def backtest_ticker(store_root, ticker, market_type, timeframe, engine='random_walk', lookback=None, horizon=None,
+                    stride=1, start=None, end=None, checkpoint=None):
+    """
+    Walk-forward backtest of one ticker over the bars in the bar store
+
+    A forecast is issued at every ``stride``-th bar that has ``lookback``
+    bars of history and ``horizon`` realised bars after it, and each step
+    is scored like a live prediction: (actual - predicted) / predicted.
+
+    Args:
+        store_root (str): Bar store directory
+        ticker (str): Provider symbol
+        market_type (str): 'stocks', 'crypto' or 'futures'
+        timeframe (str): Timeframe id, e.g. '5min'
+        engine (str): 'random_walk' or 'lstm'
+        lookback (int, optional): Bars of history per forecast; defaults to
+            the interval's rolling statistics lookback
+        horizon (int, optional): Bars per forecast; defaults to what
+            /predict serves for the market type and timeframe
+        stride (int): Bars between origins
+        start, end (optional): Range of bars to replay
+        checkpoint (str, optional): StockTime checkpoint for the 'lstm' engine
+
+    Returns:
+        dict: 'ticker', 'origins' and 'errors' of shape (origins, horizon)
+    """
+    interval, _ = timeframe_interval(timeframe)
+    lookback = lookback or DEFAULT_LOOKBACKS.get(interval, DEFAULT_LOOKBACKS['1d'])
+    horizon = horizon or prediction_count(market_type, timeframe)
+
+    closes = BarStore(store_root).read(ticker, interval, start, end)['close']
+    history, actual = origin_windows(closes, lookback, horizon, stride)
+    if len(history) == 0:
+        return {'ticker': ticker, 'origins': 0, 'errors': np.empty((0, horizon))}
+
+    if engine == 'lstm':
+        predicted = lstm_predictions(history, horizon, checkpoint)
+    else:
+        predicted = monte_carlo_predictions(history, horizon, market_type, timeframe)
+    errors = (actual - predicted) / predicted * 100
+    return {'ticker': ticker, 'origins': len(history), 'errors': errors}
+
+
+def run_backtest(store_root, tickers, market_type, timeframe, workers=None, **options):
+    """
+    Backtest many tickers in parallel and summarise them with the live tracking metrics
+
+    Args:
+        store_root (str): Bar store directory
+        tickers (list): Provider symbols
+        market_type (str): 'stocks', 'crypto' or 'futures'
+        timeframe (str): Timeframe id, e.g. '5min'
+        workers (int, optional): Worker processes; 1 runs in-process
+        **options: Passed to ``backtest_ticker``
+
+    Returns:
+        dict: Overall statistics, statistics per forecast step and per ticker
+    """
+    workers = workers or os.cpu_count()
+    args = [(store_root, ticker, market_type, timeframe) for ticker in tickers]
+    if workers == 1 or len(tickers) == 1:
+        results = [backtest_ticker(*arg, **options) for arg in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(backtest_ticker, *arg, **options) for arg in args]
+            results = [future.result() for future in futures]
+
+    horizon = max((result['errors'].shape[1] for result in results), default=0)
+    errors = np.concatenate([result['errors'] for result in results]) if results else np.empty((0, horizon))
+    return {
+        'timeframe': timeframe,
+        'engine': options.get('engine', 'random_walk'),
+        'origins': len(errors),
+        'statistics': error_statistics(errors.ravel()),
+        'by_step': [error_statistics(errors[:, step]) for step in range(horizon)],
+        'by_ticker': {
+            result['ticker']: dict(error_statistics(result['errors'].ravel()), origins=result['origins'])
+            for result in results
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-forward backtest of the prediction engines on stored bars')
+    parser.add_argument('--bar-store', default=str(DATA_DIR / 'bars'), help='Bar store directory')
+    parser.add_argument('--tickers', nargs='*', help='Provider symbols; defaults to every stored series')
+    parser.add_argument('--market-type', default='stocks', choices=('stocks', 'crypto', 'futures'))
+    parser.add_argument('--timeframe', default='1d', choices=('5min', '15min', '1h', '1d'))
+    parser.add_argument('--engine', default='random_walk', choices=ENGINES)
+    parser.add_argument('--checkpoint', default=str(DEFAULT_CHECKPOINT), help='StockTime checkpoint for the lstm engine')
+    parser.add_argument('--lookback', type=int, default=None, help='Bars of history per forecast')
+    parser.add_argument('--horizon', type=int, default=None, help='Bars per forecast')
+    parser.add_argument('--stride', type=int, default=1, help='Bars between forecast origins')
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--output', default=None, help='Write the report as JSON to this path')
+    args = parser.parse_args()
+
+    interval, _ = timeframe_interval(args.timeframe)
+    tickers = args.tickers or [
+        ticker for ticker, series_interval in BarStore(args.bar_store).series() if series_interval == interval
+    ]
+    options = {'engine': args.engine, 'lookback': args.lookback, 'horizon': args.horizon, 'stride': args.stride,
+               'start': args.start, 'end': args.end, 'checkpoint': args.checkpoint}
+
+    started = time.time()
+    report = run_backtest(args.bar_store, tickers, args.market_type, args.timeframe, workers=args.workers, **options)
+    print(f"Backtested {report['origins']} origins across {len(tickers)} tickers in {time.time() - started:.1f}s")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
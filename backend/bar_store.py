@@ -0,0 +1,327 @@
+import argparse
+import fcntl
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from market_data import align_timestamps
+
+COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+FRAME_COLUMNS = {'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}
+
+# Partition granularity per interval: one directory per day for intraday bars, per year for daily bars
+PARTITION_FORMATS = {
+    '5m': '%Y-%m-%d',
+    '15m': '%Y-%m-%d',
+    '1h': '%Y-%m-%d',
+    '1d': '%Y'
+}
+
+# Segments a partition may hold before an append compacts it; each refresh of the forming bar adds one
+DEFAULT_MAX_SEGMENTS = 8
+
+
+def frame_columns(bars):
+    """Convert OHLCV bars to column arrays sorted by time, with times as int64 UTC nanoseconds."""
+    index = align_timestamps(bars.index, 'UTC')
+    order = np.argsort(index.asi8, kind='stable')
+    columns = {'time': index.asi8[order]}
+    for name, frame_column in FRAME_COLUMNS.items():
+        dtype = np.int64 if name == 'volume' else np.float64
+        columns[name] = bars[frame_column].fillna(0).to_numpy(dtype=dtype)[order]
+    return columns
+
+
+def columns_frame(columns, tz, copy=True):
+    """
+    Convert column arrays back to OHLCV bars indexed in timezone ``tz``
+
+    With ``copy=False`` the frame's columns are views of the arrays, so
+    memory-mapped columns stay shared with the page cache.
+    """
+    index = align_timestamps(pd.DatetimeIndex(columns['time'], tz='UTC'), tz)
+    return pd.DataFrame({frame_column: np.asarray(columns[name]) for name, frame_column in FRAME_COLUMNS.items()},
+                        index=index, copy=copy)
+
+
+class BarStore:
+    """
+    Append-only columnar OHLCV store on local disk
+
+    Layout: ``root/<interval>/<ticker>/<partition>/seg-NNNNNN/<column>.npy``.
+    Each ingest writes a new immutable segment of ``.npy`` columns, with
+    times as int64 UTC nanoseconds. Reads memory-map the segments and slice
+    them with a binary search, so a range inside one segment is a
+    zero-copy view. ``compact`` merges a partition's segments into one
+    sorted, de-duplicated segment; appends do so automatically once a
+    partition holds more than ``max_segments``, so repeated refreshes of
+    the forming bar do not pile up segments.
+    """
+
+    def __init__(self, root, max_segments=DEFAULT_MAX_SEGMENTS):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_segments = max_segments
+
+    def _series_dir(self, ticker, interval):
+        safe_ticker = ticker.replace('/', '_').replace('=', '_eq_')
+        return self.root / interval / safe_ticker
+
+    def _partition_key(self, interval, times):
+        return pd.DatetimeIndex(times, tz='UTC').strftime(PARTITION_FORMATS.get(interval, '%Y-%m-%d'))
+
+    @contextmanager
+    def _partition_lock(self, partition_dir):
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        with open(partition_dir / '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _segments(partition_dir):
+        return sorted(p for p in partition_dir.glob('seg-*') if p.is_dir())
+
+    def _write_segment(self, partition_dir, columns):
+        tmp_dir = partition_dir / f".tmp-{uuid.uuid4().hex}"
+        tmp_dir.mkdir()
+        for name in COLUMNS:
+            np.save(tmp_dir / f"{name}.npy", columns[name])
+
+        existing = self._segments(partition_dir)
+        sequence = int(existing[-1].name[4:]) + 1 if existing else 0
+        os.rename(tmp_dir, partition_dir / f"seg-{sequence:06d}")
+
+    def _write_meta(self, ticker, interval, tz):
+        series_dir = self._series_dir(ticker, interval)
+        series_dir.mkdir(parents=True, exist_ok=True)
+        meta_path = series_dir / 'meta.json'
+        if not meta_path.exists():
+            meta_path.write_text(json.dumps({'ticker': ticker, 'interval': interval, 'tz': tz}))
+
+    def _meta(self, ticker, interval):
+        meta_path = self._series_dir(ticker, interval) / 'meta.json'
+        return json.loads(meta_path.read_text()) if meta_path.exists() else {}
+
+    def append(self, ticker, interval, bars):
+        """
+        Append bars as new segments, one per partition they fall into
+
+        Args:
+            ticker (str): Provider symbol
+            interval (str): Bar interval, e.g. '5m'
+            bars (pd.DataFrame): OHLCV bars indexed by timestamp
+
+        Returns:
+            int: Number of bars written
+        """
+        if bars is None or bars.empty:
+            return 0
+        self._write_meta(ticker, interval, str(bars.index.tz) if bars.index.tz is not None else None)
+        columns = frame_columns(bars)
+        times = columns['time']
+
+        keys = np.asarray(self._partition_key(interval, times))
+        boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(times)]):
+            partition_dir = self._series_dir(ticker, interval) / keys[start]
+            with self._partition_lock(partition_dir):
+                self._write_segment(partition_dir, {name: values[start:end] for name, values in columns.items()})
+                if len(self._segments(partition_dir)) > self.max_segments:
+                    self._compact_partition(partition_dir)
+        return len(times)
+
+    def ingest(self, ticker, interval, bars):
+        """
+        Append only the bars the store does not hold yet
+
+        Bars before the first stored bar are new history; bars from the last
+        stored one onward are new or updated (the forming bar). A refresh that
+        only repeats the last stored bar unchanged writes nothing, but still
+        marks the series as up to date.
+        """
+        if bars is None or bars.empty:
+            self.touch(ticker, interval)
+            return 0
+        bounds = self.bounds(ticker, interval)
+        if bounds is not None:
+            first, last = bounds
+            times = align_timestamps(bars.index, 'UTC').asi8
+            new = (times < first) | (times >= last)
+            bars = bars[new]
+            if len(bars) == 1 and times[new][0] == last:
+                stored = self.read(ticker, interval, start=pd.Timestamp(last, tz='UTC'))
+                if (np.isclose(stored['close'][-1], bars['Close'].iloc[0])
+                        and stored['volume'][-1] == bars['Volume'].fillna(0).iloc[0]):
+                    self.touch(ticker, interval)
+                    return 0
+        return self.append(ticker, interval, bars)
+
+    def _partitions(self, ticker, interval, start=None, end=None):
+        series_dir = self._series_dir(ticker, interval)
+        if not series_dir.exists():
+            return []
+        partitions = sorted(p for p in series_dir.iterdir() if p.is_dir())
+        if start is not None:
+            first_key = self._partition_key(interval, [start])[0]
+            partitions = [p for p in partitions if p.name >= first_key]
+        if end is not None:
+            last_key = self._partition_key(interval, [end])[0]
+            partitions = [p for p in partitions if p.name <= last_key]
+        return partitions
+
+    @staticmethod
+    def _to_ns(value):
+        return None if value is None else align_timestamps(value, 'UTC').value
+
+    def _read_segment(self, segment, start, end):
+        times = np.load(segment / 'time.npy', mmap_mode='r')
+        lo = 0 if start is None else np.searchsorted(times, start, side='left')
+        hi = len(times) if end is None else np.searchsorted(times, end, side='left')
+        return {name: np.load(segment / f"{name}.npy", mmap_mode='r')[lo:hi] for name in COLUMNS}
+
+    def read(self, ticker, interval, start=None, end=None):
+        """
+        Read bars in [start, end) as column arrays
+
+        A range inside a single segment returns read-only memory-mapped
+        views; spanning segments concatenates them and drops duplicate
+        times, keeping the most recently written bar.
+
+        Args:
+            ticker (str): Provider symbol
+            interval (str): Bar interval
+            start, end (optional): Range bounds; naive values are server local time
+
+        Returns:
+            dict: Column name -> np.array
+        """
+        start_ns, end_ns = self._to_ns(start), self._to_ns(end)
+        for attempt in range(3):
+            try:
+                chunks = []
+                for partition in self._partitions(ticker, interval, start_ns, end_ns):
+                    for segment in self._segments(partition):
+                        chunk = self._read_segment(segment, start_ns, end_ns)
+                        if len(chunk['time']):
+                            chunks.append(chunk)
+                break
+            except FileNotFoundError:
+                # A concurrent compaction replaced the segments; list them again
+                if attempt == 2:
+                    raise
+
+        if not chunks:
+            return {name: np.empty(0, dtype=np.int64 if name in ('time', 'volume') else np.float64)
+                    for name in COLUMNS}
+        if len(chunks) == 1:
+            return chunks[0]
+        return self._merge_chunks(chunks)
+
+    @staticmethod
+    def _merge_chunks(chunks):
+        columns = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in COLUMNS}
+        # Stable sort keeps write order for equal times; the last occurrence wins
+        order = np.argsort(columns['time'], kind='stable')
+        times = columns['time'][order]
+        keep = np.r_[times[1:] != times[:-1], True]
+        return {name: values[order][keep] for name, values in columns.items()}
+
+    def read_frame(self, ticker, interval, start=None, end=None):
+        """Read bars in [start, end) as a DataFrame in the series' original timezone."""
+        return columns_frame(self.read(ticker, interval, start, end), self._meta(ticker, interval).get('tz'))
+
+    def bounds(self, ticker, interval):
+        """Return (first, last) stored bar times in UTC nanoseconds, or None."""
+        partitions = self._partitions(ticker, interval)
+        first = last = None
+        for partition in (partitions[:1] + partitions[-1:]) if partitions else []:
+            for segment in self._segments(partition):
+                times = np.load(segment / 'time.npy', mmap_mode='r')
+                if len(times):
+                    first = times[0] if first is None else min(first, times[0])
+                    last = times[-1] if last is None else max(last, times[-1])
+        return None if first is None else (int(first), int(last))
+
+    def touch(self, ticker, interval):
+        """Record that a series was checked against the provider without writing new bars."""
+        meta_path = self._series_dir(ticker, interval) / 'meta.json'
+        if meta_path.exists():
+            os.utime(meta_path)
+
+    def updated_at(self, ticker, interval):
+        """Return the epoch time of the most recent write or check of a series, or None."""
+        partitions = self._partitions(ticker, interval)
+        if not partitions:
+            return None
+        segments = self._segments(partitions[-1])
+        if not segments:
+            return None
+        meta_path = self._series_dir(ticker, interval) / 'meta.json'
+        checked_at = meta_path.stat().st_mtime if meta_path.exists() else 0
+        return max(segments[-1].stat().st_mtime, checked_at)
+
+    def series(self):
+        """Yield (ticker, interval) for every stored series."""
+        for meta_path in sorted(self.root.glob('*/*/meta.json')):
+            meta = json.loads(meta_path.read_text())
+            yield meta['ticker'], meta['interval']
+
+    def compact(self, ticker=None, interval=None, start=None):
+        """
+        Merge each partition's segments into one sorted, de-duplicated segment
+
+        Args:
+            ticker (str, optional): Limit compaction to one ticker
+            interval (str, optional): Limit compaction to one interval
+            start (optional): Only partitions holding bars from this time on;
+                naive values are server local time
+
+        Returns:
+            int: Number of partitions compacted
+        """
+        if ticker is not None and interval is not None:
+            series = [(ticker, interval)]
+        else:
+            series = [(series_ticker, series_interval) for series_ticker, series_interval in self.series()
+                      if ticker in (None, series_ticker) and interval in (None, series_interval)]
+        compacted = 0
+        for series_ticker, series_interval in series:
+            for partition in self._partitions(series_ticker, series_interval, start=self._to_ns(start)):
+                with self._partition_lock(partition):
+                    compacted += self._compact_partition(partition)
+        return compacted
+
+    def _compact_partition(self, partition):
+        # Callers hold the partition lock
+        segments = self._segments(partition)
+        if len(segments) < 2:
+            return False
+        chunks = [self._read_segment(segment, None, None) for segment in segments]
+        self._write_segment(partition, self._merge_chunks(chunks))
+        for segment in segments:
+            shutil.rmtree(segment)
+        return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact the on-disk bar store')
+    parser.add_argument('--root', default=str(Path(__file__).parent / 'data' / 'bars'), help='Bar store directory')
+    parser.add_argument('--ticker', default=None)
+    parser.add_argument('--interval', default=None)
+    args = parser.parse_args()
+
+    compacted = BarStore(args.root).compact(args.ticker, args.interval)
+    print(f"Compacted {compacted} partitions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from singleflight import BarCache
+
+TIMEFRAMES = ('5min', '15min', '1h', '1d')
+
+
+@pytest.mark.parametrize('market_type, ticker', [('stocks', 'AAPL'), ('crypto', 'BTC-USD')])
+@pytest.mark.parametrize('timeframe', TIMEFRAMES)
+def bench_predict_uncached(benchmark, backend, client, timeframe, market_type, ticker):
+    payload = {'ticker': ticker, 'marketType': market_type, 'timeframe': timeframe, 'seed': 1}
+    # Warm the market data cache; each round then reads from it, forecasts and serializes
+    assert client.post('/predict', json=payload).status_code == 200
+
+    def predict():
+        backend.prediction_cache = BarCache()
+        backend.response_cache = BarCache()
+        return client.post('/predict', json=payload)
+
+    assert benchmark(predict).status_code == 200
+
+
+@pytest.mark.parametrize('history_format', ['records', 'columnar'])
+def bench_predict_cached(benchmark, client, history_format):
+    payload = {'ticker': 'BTC-USD', 'marketType': 'crypto', 'timeframe': '1h', 'format': history_format}
+    assert client.post('/predict', json=payload).status_code == 200
+
+    assert benchmark(client.post, '/predict', json=payload).status_code == 200
+
+
+def bench_predict_not_modified(benchmark, client):
+    query = {'ticker': 'BTC-USD', 'marketType': 'crypto', 'timeframe': '1h'}
+    etag = client.get('/predict', query_string=query).headers['ETag']
+
+    response = benchmark(client.get, '/predict', query_string=query, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+
+
+@pytest.mark.parametrize('rows', [1000, 10000, 100000])
+def bench_track_predictions(benchmark, backend, client, rows):
+    now = datetime.now()
+    batches = rows // 7
+    # Batches one second apart, so all of them fall inside the default 7-day window
+    backend.db.insert_predictions([
+        ('AAPL', 'stocks', now - timedelta(seconds=batch), now + timedelta(days=step + 1), 100.0 + step, '1d',
+         step + 1, 'random_walk')
+        for batch in range(batches)
+        for step in range(7)
+    ])
+
+    response = benchmark(client.get, '/track_predictions',
+                         query_string={'ticker': 'AAPL', 'marketType': 'stocks', 'timeframe': '1d'})
+
+    assert response.status_code == 200
+    assert response.get_json()['statistics']['total_predictions'] == batches * 7
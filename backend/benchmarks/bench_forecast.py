@@ -0,0 +1,29 @@
+import pytest
+
+from forecast import monte_carlo_forecast
+
+
+@pytest.mark.parametrize('timeframe, period', [('5min', '1d'), ('1h', '7d'), ('1d', '30d')])
+def bench_calculate_predictions(benchmark, backend, timeframe, period):
+    interval = {'5min': '5m', '1h': '1h', '1d': '1d'}[timeframe]
+    hist = backend.market_data.get_history('BTC-USD', interval, period)
+
+    predictions = benchmark(backend.calculate_predictions, hist, 24, 'crypto', timeframe, seed=1)
+
+    assert len(predictions) == 24
+
+
+@pytest.mark.parametrize('num_paths', [1000, 10000, 100000])
+def bench_monte_carlo_forecast(benchmark, num_paths):
+    forecast = benchmark(monte_carlo_forecast, 100.0, 0.0005, 0.01, 24, num_paths=num_paths, seed=1)
+
+    assert len(forecast['median']) == 24
+
+
+@pytest.mark.parametrize('count', [7, 24])
+def bench_store_predictions(benchmark, backend, count):
+    predictions = [100.0 + i for i in range(count)]
+
+    benchmark(backend.store_predictions, 'AAPL', 'stocks', predictions, '1d')
+
+    assert backend.db.prediction_statistics(ticker='AAPL')['total_predictions'] % count == 0
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from model.data_processor import StockDataProcessor  # noqa: E402
+from model.stocktime_model import StockTime  # noqa: E402
+
+BATCH_SIZES = (1, 32, 256)
+SEQUENCE_LENGTHS = (32, 128, 512)
+
+
+@pytest.fixture(scope='module')
+def model():
+    torch.manual_seed(0)
+    return StockTime().eval()
+
+
+def _prices(batch_size, length):
+    rng = np.random.default_rng(0)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size=(batch_size, length)), axis=1)).astype(np.float32)
+
+
+@pytest.mark.parametrize('length', SEQUENCE_LENGTHS)
+@pytest.mark.parametrize('batch_size', BATCH_SIZES)
+def bench_forward(benchmark, model, batch_size, length):
+    patches = torch.as_tensor(_prices(batch_size, length))
+
+    def forward():
+        with torch.inference_mode():
+            return model(patches)
+
+    benchmark(forward)
+
+
+@pytest.mark.parametrize('length', SEQUENCE_LENGTHS)
+@pytest.mark.parametrize('batch_size', BATCH_SIZES)
+def bench_predict_batch(benchmark, model, batch_size, length):
+    predictions = benchmark(model.predict_batch, _prices(batch_size, length), 24)
+
+    assert predictions.shape == (batch_size, 24)
+
+
+@pytest.mark.parametrize('length', SEQUENCE_LENGTHS)
+def bench_predict(benchmark, model, length):
+    predictions = benchmark(model.predict, _prices(1, length)[0], 7)
+
+    assert predictions.shape == (7,)
+
+
+@pytest.mark.parametrize('length', [1000, 100000])
+def bench_create_patches(benchmark, length):
+    processor = StockDataProcessor(patch_length=32)
+
+    patches = benchmark(processor.create_patches, _prices(1, length)[0].astype(np.float64))
+
+    assert patches.shape[1] == 32
@@ -0,0 +1,55 @@
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# Benchmarks import the backend modules the same way the app does
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from market_data import FakeProvider, MarketDataCache  # noqa: E402
+from singleflight import BarCache  # noqa: E402
+
+# Fixed clock for the fake provider so every run sees the same bars
+FAKE_NOW = datetime(2024, 3, 1, 16, 0)
+
+
+@pytest.fixture(scope='session', autouse=True)
+def app_data_dir(tmp_path_factory):
+    """Scratch data directory for everything importing the app creates, set before storage is imported."""
+    data_dir = tmp_path_factory.mktemp('data')
+    os.environ['STOCKTIME_DATA_DIR'] = str(data_dir)
+    os.environ['PREDICTIONS_DB'] = str(data_dir / 'predictions.db')
+    return data_dir
+
+
+@pytest.fixture
+def fake_market_data(tmp_path):
+    return MarketDataCache(tmp_path / 'market_cache', provider=FakeProvider(now=FAKE_NOW))
+
+
+@pytest.fixture
+def database(tmp_path):
+    from storage import Database
+
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    return db
+
+
+@pytest.fixture
+def backend(monkeypatch, fake_market_data, database):
+    """The Flask app wired to the fake provider and a scratch database."""
+    import app as backend_app
+
+    monkeypatch.setattr(backend_app, 'market_data', fake_market_data)
+    monkeypatch.setattr(backend_app, 'db', database)
+    monkeypatch.setattr(backend_app, 'prediction_cache', BarCache())
+    monkeypatch.setattr(backend_app, 'response_cache', BarCache())
+    return backend_app
+
+
+@pytest.fixture
+def client(backend):
+    return backend.app.test_client()
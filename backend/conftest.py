@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+import pytest
+
+# Fixed clock for the fake provider in app tests
+FAKE_NOW = datetime(2024, 3, 1, 16, 0)
+
+
+def pytest_configure(config):
+    # Set before any test module imports storage, so importing the app never touches backend/data
+    config.stocktime_data_dir = tempfile.mkdtemp(prefix='stocktime-tests-')
+    os.environ['STOCKTIME_DATA_DIR'] = config.stocktime_data_dir
+    os.environ['PREDICTIONS_DB'] = os.path.join(config.stocktime_data_dir, 'predictions.db')
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(config.stocktime_data_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def backend(monkeypatch, tmp_path):
+    """The Flask app wired to the fake provider and a scratch database."""
+    import app as backend_app
+    from market_data import FakeProvider, MarketDataCache
+    from singleflight import BarCache
+    from storage import Database
+
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    monkeypatch.setattr(backend_app, 'market_data',
+                        MarketDataCache(tmp_path / 'market_cache', provider=FakeProvider(now=FAKE_NOW)))
+    monkeypatch.setattr(backend_app, 'db', db)
+    monkeypatch.setattr(backend_app, 'prediction_cache', BarCache())
+    monkeypatch.setattr(backend_app, 'response_cache', BarCache())
+    return backend_app
+
+
+@pytest.fixture
+def client(backend):
+    return backend.app.test_client()
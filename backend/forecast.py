@@ -0,0 +1,147 @@
+import numpy as np
+
+# Reduced volatility for shorter crypto timeframes
+VOLATILITY_MULTIPLIERS = {
+    '5min': 0.2,
+    '15min': 0.3,
+    '1h': 0.5,
+    '1d': 1.0
+}
+
+# Drift is damped on intraday timeframes
+DRIFT_MULTIPLIERS = {
+    '5min': 0.1,
+    '15min': 0.2,
+    '1h': 0.4,
+    '1d': 1.0
+}
+
+# Forecast horizon in bars for crypto; stocks always get 7
+CRYPTO_PREDICTION_COUNTS = {
+    '5min': 24,    # 2 hours worth of 5-min predictions
+    '15min': 16,   # 4 hours worth of 15-min predictions
+    '1h': 12,      # 12 hours worth of hourly predictions
+    '1d': 7        # 7 days worth of daily predictions
+}
+
+DEFAULT_NUM_PATHS = 10000
+DEFAULT_QUANTILES = (0.05, 0.25, 0.75, 0.95)
+
+
+def prediction_count(market_type, timeframe):
+    """Number of future bars forecast for a market type and timeframe."""
+    if market_type == 'crypto':
+        return CRYPTO_PREDICTION_COUNTS.get(timeframe, 12)
+    return 7
+
+
+def adjust_drift_volatility(mean_return, return_std, market_type, timeframe='1d'):
+    """
+    Apply the per-timeframe drift damping and crypto volatility scaling
+
+    Args:
+        mean_return (float or np.array): Mean simple return per bar
+        return_std (float or np.array): Standard deviation of simple returns per bar
+        market_type (str): 'stocks', 'crypto' or 'futures'
+        timeframe (str): Timeframe id, e.g. '5min'
+
+    Returns:
+        tuple: (drift, volatility)
+    """
+    volatility = return_std
+    if market_type == 'crypto':
+        volatility = volatility * VOLATILITY_MULTIPLIERS.get(timeframe, 1.0)
+    drift = mean_return * DRIFT_MULTIPLIERS.get(timeframe, 1.0)
+    return drift, volatility
+
+
+def estimate_drift_volatility(returns, market_type, timeframe='1d'):
+    """
+    Per-step drift and volatility for a timeframe from simple returns
+
+    Args:
+        returns (pd.Series or np.array): Simple bar-to-bar returns
+        market_type (str): 'stocks', 'crypto' or 'futures'
+        timeframe (str): Timeframe id, e.g. '5min'
+
+    Returns:
+        tuple: (drift, volatility)
+    """
+    returns = np.asarray(returns, dtype=float)
+    return_std = float(np.std(returns, ddof=1)) if len(returns) > 1 else 0.0
+    mean_return = float(np.mean(returns)) if len(returns) else 0.0
+    return adjust_drift_volatility(mean_return, return_std, market_type, timeframe)
+
+
+def simulate_paths(last_price, drift, volatility, num_steps, num_paths=DEFAULT_NUM_PATHS, seed=None):
+    """
+    Simulate price paths with lognormal step returns in a single NumPy pass
+
+    Log returns are drawn with mean ``drift - volatility**2 / 2`` so the
+    expected gross return of each step is ``1 + drift``, matching the simple
+    random walk it replaces. The cumulative product of the gross returns is
+    taken as a cumulative sum in log space.
+
+    Args:
+        last_price (float): Price the paths start from
+        drift (float): Expected simple return per step
+        volatility (float): Standard deviation of returns per step
+        num_steps (int): Number of future steps
+        num_paths (int): Number of simulated paths
+        seed (int, optional): Seed for reproducible paths
+
+    Returns:
+        np.array: Prices of shape (num_paths, num_steps)
+    """
+    rng = np.random.default_rng(seed)
+    log_drift = np.log1p(drift) - 0.5 * volatility ** 2
+    log_returns = rng.normal(log_drift, volatility, size=(num_paths, num_steps))
+    return last_price * np.exp(np.cumsum(log_returns, axis=1))
+
+
+def monte_carlo_forecast(last_price, drift, volatility, num_steps, num_paths=DEFAULT_NUM_PATHS,
+                         quantiles=DEFAULT_QUANTILES, seed=None):
+    """
+    Median forecast path with quantile confidence bands
+
+    Args:
+        last_price (float): Price the paths start from
+        drift (float): Expected simple return per step
+        volatility (float): Standard deviation of returns per step
+        num_steps (int): Number of future steps
+        num_paths (int): Number of simulated paths
+        quantiles (sequence): Band quantiles in (0, 1)
+        seed (int, optional): Seed for reproducible forecasts
+
+    Returns:
+        dict: 'median' (np.array of num_steps) and 'bands' mapping each
+        quantile to an np.array of num_steps
+    """
+    paths = simulate_paths(last_price, drift, volatility, num_steps, num_paths, seed)
+    levels = np.quantile(paths, [0.5, *quantiles], axis=0)
+    return {
+        'median': levels[0],
+        'bands': {q: level for q, level in zip(quantiles, levels[1:])}
+    }
+
+
+def median_paths(last_prices, drift, volatility, num_steps):
+    """
+    Closed-form median of ``simulate_paths`` for many origins at once
+
+    The simulated log price after k steps is normal with mean
+    ``k * (log1p(drift) - volatility**2 / 2)``, so its median path needs no
+    sampling. This is what ``monte_carlo_forecast`` converges to as the
+    number of paths grows.
+
+    Args:
+        last_prices (np.array): Starting price per origin, shape (n,)
+        drift (np.array): Expected simple return per step per origin
+        volatility (np.array): Return standard deviation per step per origin
+        num_steps (int): Number of future steps
+
+    Returns:
+        np.array: Median prices of shape (n, num_steps)
+    """
+    log_drift = np.log1p(drift) - 0.5 * np.square(volatility)
+    return np.asarray(last_prices)[:, np.newaxis] * np.exp(np.outer(log_drift, np.arange(1, num_steps + 1)))
@@ -0,0 +1,258 @@
+import argparse
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from bar_store import BarStore
+from logs import configure_logging
+from market_data import CACHE_TTLS, YFinanceProvider, align_timestamps
+from markets import TIMEFRAMES, universe
+from metrics import UPSTREAM_ERRORS, UPSTREAM_FETCH_SECONDS
+from storage import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+# Every interval offered by /markets
+INGEST_INTERVALS = tuple(timeframe['interval'] for timeframe in TIMEFRAMES)
+
+# History fetched the first time a series is ingested, within the provider's limit per interval
+BACKFILL_PERIODS = {
+    '5m': '60d',
+    '15m': '60d',
+    '1h': '720d',
+    '1d': '3650d'
+}
+
+
+class RateLimiter:
+    """
+    Token bucket per upstream host
+
+    Allows ``rate`` calls per second to each host on average, with bursts
+    of up to ``burst`` calls. ``acquire`` blocks until a call is allowed.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def acquire(self, host):
+        while True:
+            with self._lock:
+                now = self._clock()
+                tokens, updated = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            self._sleep(wait)
+
+
+def with_retries(call, retries=3, backoff=1.0, max_backoff=30.0, sleep=time.sleep):
+    """
+    Call ``call()``, retrying failures with exponential backoff and jitter
+
+    Args:
+        call (callable): Function without arguments
+        retries (int): Attempts after the first one
+        backoff (float): Delay before the first retry in seconds, doubled each time
+        max_backoff (float): Upper bound on a single delay
+        sleep (callable): Used to wait between attempts
+
+    Returns:
+        The result of the first successful call; the last error is raised
+    """
+    for attempt in range(retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = min(max_backoff, backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logger.warning('Upstream call failed, retrying in %.1fs: %s', delay, e)
+            sleep(delay)
+
+
+def refresh_period(last_bar, now=None):
+    """Whole days of history to refetch so the result overlaps the last stored bar."""
+    now = pd.Timestamp.now(tz='UTC') if now is None else align_timestamps(now, 'UTC')
+    elapsed = now - pd.Timestamp(last_bar, tz='UTC')
+    return f"{max(1, math.ceil(elapsed / pd.Timedelta(days=1)))}d"
+
+
+class Ingestor:
+    """
+    Pre-warm the bar store for a symbol universe
+
+    Series are grouped by interval and by the period still missing from the
+    store, and each group is fetched with one multi-ticker provider call per
+    ``batch_size`` tickers. Calls run on a pool of ``max_workers`` threads,
+    are limited to ``rate`` per second per provider host and retried with
+    backoff; the bars are appended to the bar store, where serving
+    processes pick them up as their cold tier. The partitions a run wrote
+    to (the previous day onward) are compacted afterwards.
+    """
+
+    def __init__(self, bar_store, provider=None, max_workers=4, rate=1.0, burst=2, batch_size=20,
+                 retries=3, backoff=1.0):
+        self.bar_store = bar_store
+        self.provider = provider or YFinanceProvider()
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = RateLimiter(rate, burst)
+
+    def _batches(self, tickers, interval, now=None):
+        by_period = defaultdict(list)
+        for ticker in tickers:
+            bounds = self.bar_store.bounds(ticker, interval)
+            if bounds is None:
+                period = BACKFILL_PERIODS.get(interval, BACKFILL_PERIODS['1d'])
+            else:
+                period = refresh_period(bounds[1], now)
+            by_period[period].append(ticker)
+        for period, group in by_period.items():
+            for start in range(0, len(group), self.batch_size):
+                yield group[start:start + self.batch_size], interval, period
+
+    def _fetch(self, tickers, interval, period):
+        host = getattr(self.provider, 'host', type(self.provider).__name__)
+
+        def call():
+            self.limiter.acquire(host)
+            with UPSTREAM_FETCH_SECONDS.time(method='ingest'):
+                return self.provider.history_many(tickers, interval, period)
+
+        return with_retries(call, self.retries, self.backoff)
+
+    def _ingest_batch(self, tickers, interval, period, compact_since):
+        fetched = self._fetch(tickers, interval, period)
+        written = {ticker: self.bar_store.ingest(ticker, interval, fetched.get(ticker)) for ticker in tickers}
+        for ticker, count in written.items():
+            if count:
+                self.bar_store.compact(ticker, interval, start=compact_since)
+        return written
+
+    def run(self, tickers, intervals=INGEST_INTERVALS, now=None):
+        """
+        Fetch and store new bars for every ticker and interval
+
+        Args:
+            tickers (list): Provider symbols
+            intervals (tuple): Bar intervals, e.g. ('5m', '1d')
+            now (datetime, optional): Reference time for refresh periods, naive values are server local time
+
+        Returns:
+            dict: (ticker, interval) -> bars written, or None when the fetch failed
+        """
+        written = {}
+        # Refreshes touch today's partitions, and yesterday's until its last bar closed
+        compact_since = (pd.Timestamp.now(tz='UTC') if now is None else align_timestamps(now, 'UTC')) \
+            - pd.Timedelta(days=1)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ingest') as executor:
+            futures = {
+                executor.submit(self._ingest_batch, *batch, compact_since): batch
+                for interval in intervals
+                for batch in self._batches(tickers, interval, now)
+            }
+            for future in as_completed(futures):
+                batch_tickers, interval, period = futures[future]
+                try:
+                    for ticker, count in future.result().items():
+                        written[(ticker, interval)] = count
+                except Exception:
+                    UPSTREAM_ERRORS.inc(method='ingest', reason='error')
+                    logger.exception('Error ingesting bars', extra={'tickers': batch_tickers, 'interval': interval})
+                    written.update(((ticker, interval), None) for ticker in batch_tickers)
+        return written
+
+
+class IngestWorker(threading.Thread):
+    """
+    Background thread that keeps the bar store warm
+
+    Each interval is refreshed once its market data cache TTL has elapsed,
+    so cache entries built from the store are still fresh when served.
+    """
+
+    def __init__(self, ingestor, tickers, intervals=INGEST_INTERVALS, ttls=None):
+        super().__init__(name='bar-ingest', daemon=True)
+        self.ingestor = ingestor
+        self.tickers = tickers
+        self.intervals = intervals
+        self.ttls = dict(CACHE_TTLS, **(ttls or {}))
+        self._stop_event = threading.Event()
+
+    def run(self):
+        due_at = dict.fromkeys(self.intervals, 0)
+        while not self._stop_event.is_set():
+            now = time.time()
+            due = [interval for interval in self.intervals if due_at[interval] <= now]
+            if due:
+                try:
+                    written = self.ingestor.run(self.tickers, due)
+                    logger.info('Ingested %d bars', sum(count or 0 for count in written.values()),
+                                extra={'intervals': due, 'failed': sum(count is None for count in written.values())})
+                except Exception:
+                    logger.exception('Error ingesting bars')
+                for interval in due:
+                    due_at[interval] = now + self.ttls.get(interval, CACHE_TTLS['1d'])
+            self._stop_event.wait(max(1, min(due_at.values()) - time.time()))
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def parse_tickers(spec):
+    """Split a comma-separated ticker list, or return None for an empty one."""
+    tickers = [ticker.strip().upper() for ticker in (spec or '').split(',') if ticker.strip()]
+    return tickers or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-warm the bar store for the futures, crypto and stock universes')
+    parser.add_argument('--bar-store', default=os.environ.get('BAR_STORE_DIR', str(DATA_DIR / 'bars')),
+                        help='Bar store directory')
+    parser.add_argument('--stocks', default=os.environ.get('INGEST_STOCKS'),
+                        help="Comma-separated stock tickers, defaults to the /markets examples")
+    parser.add_argument('--intervals', default=','.join(INGEST_INTERVALS), help='Comma-separated bar intervals')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent provider calls')
+    parser.add_argument('--rate', type=float, default=1.0, help='Provider calls per second per host')
+    parser.add_argument('--batch-size', type=int, default=20, help='Tickers per provider call')
+    parser.add_argument('--retries', type=int, default=3, help='Retries per failed provider call')
+    parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+    args = parser.parse_args()
+    configure_logging()
+
+    ingestor = Ingestor(BarStore(args.bar_store), max_workers=args.workers, rate=args.rate,
+                        batch_size=args.batch_size, retries=args.retries)
+    tickers = universe(parse_tickers(args.stocks))
+    intervals = tuple(interval.strip() for interval in args.intervals.split(',') if interval.strip())
+    if args.once:
+        started = time.time()
+        written = ingestor.run(tickers, intervals)
+        logger.info('Ingested %d bars for %d series', sum(count or 0 for count in written.values()), len(written),
+                    extra={'seconds': round(time.time() - started, 1)})
+        return
+
+    worker = IngestWorker(ingestor, tickers, intervals)
+    worker.start()
+    worker.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,528 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from metrics import MARKET_CACHE_REQUESTS, UPSTREAM_ERRORS, UPSTREAM_FETCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Timeframe id -> (yfinance interval, default lookback period)
+TIMEFRAME_INTERVALS = {
+    '5min': ('5m', '1d'),    # 1 day of 5-min data
+    '15min': ('15m', '2d'),  # 2 days of 15-min data
+    '1h': ('1h', '7d'),      # 7 days of hourly data
+    '1d': ('1d', '30d')      # 30 days of daily data
+}
+
+# Duration of a single bar for each yfinance interval
+BAR_DURATIONS = {
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '1h': pd.Timedelta(hours=1),
+    '1d': pd.Timedelta(days=1)
+}
+
+# How long a cached entry is considered fresh before its tail is refetched
+CACHE_TTLS = {
+    '5m': 60,       # seconds
+    '15m': 180,
+    '1h': 600,
+    '1d': 3600
+}
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class UpstreamTimeout(TimeoutError):
+    """Raised when the market data provider does not answer in time."""
+
+
+def empty_bars():
+    """Return an empty OHLCV frame."""
+    return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([]), dtype=float)
+
+
+def current_bar(interval, now=None):
+    """
+    Start and end of the bar containing ``now``, in epoch seconds
+
+    Bars are aligned to UTC multiples of the interval duration.
+    """
+    now = time.time() if now is None else now
+    duration = BAR_DURATIONS.get(interval, BAR_DURATIONS['1d']).total_seconds()
+    start = now - now % duration
+    return start, start + duration
+
+
+def timeframe_interval(timeframe):
+    """Return the (interval, period) pair used to fetch bars for a timeframe."""
+    return TIMEFRAME_INTERVALS.get(timeframe, ('1d', '30d'))
+
+
+def align_timestamps(values, tz):
+    """
+    Convert timestamps to the timezone of a bar index
+
+    Naive values are treated as server local time, which is how prediction
+    times are written to the database.
+
+    Args:
+        values: A datetime, Timestamp or array-like of them
+        tz: Timezone of the target index (None for a naive index)
+
+    Returns:
+        pd.Timestamp or pd.DatetimeIndex in the index timezone
+    """
+    scalar = not isinstance(values, (list, tuple, np.ndarray, pd.Index, pd.Series))
+    stamps = pd.DatetimeIndex([values] if scalar else values)
+
+    if stamps.tz is None and tz is not None:
+        stamps = stamps.tz_localize(datetime.now().astimezone().tzinfo).tz_convert(tz)
+    elif stamps.tz is not None and tz is None:
+        stamps = stamps.tz_convert(datetime.now().astimezone().tzinfo).tz_localize(None)
+    elif stamps.tz is not None:
+        stamps = stamps.tz_convert(tz)
+
+    return stamps[0] if scalar else stamps
+
+
+class YFinanceProvider:
+    """Market data provider backed by the Yahoo Finance API."""
+
+    # Rate limits are applied per upstream host
+    host = 'query2.finance.yahoo.com'
+
+    def preload(self):
+        """Import yfinance ahead of the first request; it is slow to import and only needed here."""
+        import yfinance  # noqa: F401
+
+    def history(self, ticker, interval, period=None, start=None, end=None):
+        import yfinance as yf
+
+        stock = yf.Ticker(ticker)
+        if period is not None:
+            return stock.history(period=period, interval=interval)
+        return stock.history(start=start, end=end, interval=interval)
+
+    def history_many(self, tickers, interval, period):
+        """Fetch the same period for many tickers with one multi-ticker download."""
+        import yfinance as yf
+
+        data = yf.download(list(tickers), period=period, interval=interval, group_by='ticker',
+                           auto_adjust=True, threads=True, progress=False)
+        if not isinstance(data.columns, pd.MultiIndex):
+            return {tickers[0]: data.dropna(how='all')}
+        return {
+            ticker: data[ticker].dropna(how='all')
+            for ticker in tickers
+            if ticker in data.columns.get_level_values(0)
+        }
+
+
+class FakeProvider:
+    """
+    Deterministic offline provider producing a synthetic price series
+
+    Every bar is derived from the ticker and the bar timestamp, so repeated
+    and overlapping fetches agree with each other. Calls are recorded in
+    ``self.calls`` so tests can assert on upstream traffic.
+    """
+
+    host = 'fake'
+
+    def preload(self):
+        pass
+
+    def __init__(self, base_price=100.0, volatility=0.002, now=None):
+        self.base_price = base_price
+        self.volatility = volatility
+        self.now = now
+        self.calls = []
+
+    def _bars(self, ticker, interval, start, end):
+        step = BAR_DURATIONS.get(interval, BAR_DURATIONS['1d'])
+        start = align_timestamps(start, None).ceil(step)
+        end = align_timestamps(end, None)
+        index = pd.date_range(start, end, freq=step, inclusive='left')
+        if len(index) == 0:
+            return empty_bars()
+
+        # Prices are a pure function of the bar number so overlapping fetches agree
+        seed = sum(ord(ch) for ch in ticker)
+        bar_numbers = index.asi8 // step.value
+        close = self.base_price * (1 + seed % 50 / 100) * np.exp(
+            0.05 * np.sin(bar_numbers * 0.01) + 5 * self.volatility * np.sin(bar_numbers * 0.7 + seed)
+        )
+        return pd.DataFrame({
+            'Open': close * (1 - self.volatility / 2),
+            'High': close * (1 + self.volatility),
+            'Low': close * (1 - self.volatility),
+            'Close': close,
+            'Volume': (1000 + bar_numbers % 500).astype(np.int64)
+        }, index=index)
+
+    def history(self, ticker, interval, period=None, start=None, end=None):
+        self.calls.append((ticker, interval, period, start, end))
+        now = pd.Timestamp(self.now or datetime.now())
+        if period is not None:
+            start, end = now - pd.Timedelta(period), now
+        # Like real providers, nothing past the current bar
+        return self._bars(ticker, interval, start, now if end is None else min(align_timestamps(end, None), now))
+
+    def history_many(self, tickers, interval, period):
+        self.calls.append((tuple(tickers), interval, period, None, None))
+        now = pd.Timestamp(self.now or datetime.now())
+        return {ticker: self._bars(ticker, interval, now - pd.Timedelta(period), now) for ticker in tickers}
+
+
+class MarketDataCache:
+    """
+    Local OHLCV cache in front of a market data provider
+
+    Bars are kept per (ticker, interval), mirrored to disk so they survive
+    restarts, and only the missing head or tail of a range is requested
+    upstream. The tail is refetched once an entry's per-interval TTL expires.
+
+    Provider calls run on a bounded thread pool, so at most
+    ``max_concurrent_fetches`` upstream requests are in flight, and each
+    caller gives up after ``fetch_timeout`` seconds.
+
+    With a ``bar_store``, every saved entry is also written to the columnar
+    store, which then serves as a cold tier: a missing entry or an uncovered
+    head of a range is read from it before going upstream.
+
+    With a ``shared_cache``, saved entries are also published to the other
+    worker processes on the host, and an entry another worker fetched more
+    recently replaces the local one, so each bar is fetched once per host.
+    """
+
+    def __init__(self, cache_dir, provider=None, ttls=None, max_concurrent_fetches=8, fetch_timeout=15,
+                 bar_store=None, shared_cache=None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.provider = provider or YFinanceProvider()
+        self.bar_store = bar_store
+        self.shared_cache = shared_cache
+        self.ttls = dict(CACHE_TTLS, **(ttls or {}))
+        self.fetch_timeout = fetch_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_fetches, thread_name_prefix='upstream-fetch')
+        self._entries = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, listener):
+        """
+        Register ``listener(ticker, interval, bars)``, called whenever an
+        entry's bars are loaded or change
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, key, bars):
+        for listener in self._listeners:
+            try:
+                listener(key[0], key[1], bars)
+            except Exception:
+                logger.exception('Error in market data listener', extra={'ticker': key[0], 'interval': key[1]})
+
+    def _fetch(self, method, *args, **kwargs):
+        future = self._executor.submit(getattr(self.provider, method), *args, **kwargs)
+        try:
+            with UPSTREAM_FETCH_SECONDS.time(method=method):
+                return future.result(timeout=self.fetch_timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            UPSTREAM_ERRORS.inc(method=method, reason='timeout')
+            raise UpstreamTimeout(f"Market data provider did not respond within {self.fetch_timeout}s")
+        except Exception:
+            UPSTREAM_ERRORS.inc(method=method, reason='error')
+            raise
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _path(self, key):
+        ticker, interval = key
+        safe_ticker = ticker.replace('/', '_').replace('=', '_eq_')
+        return self.cache_dir / interval / f"{safe_ticker}.pkl"
+
+    def _load_shared(self, key, entry):
+        fetched_at = self.shared_cache.fetched_at(key)
+        if fetched_at is None or (entry is not None and fetched_at <= entry['fetched_at']):
+            return entry
+        try:
+            shared = self.shared_cache.get(key)
+        except Exception:
+            logger.exception('Error reading the shared cache', extra={'ticker': key[0], 'interval': key[1]})
+            return entry
+        if shared is None:
+            return entry
+        self._entries[key] = shared
+        self._notify(key, shared['bars'])
+        return shared
+
+    def _load(self, key):
+        entry = self._entries.get(key)
+        if self.shared_cache is not None:
+            entry = self._load_shared(key, entry)
+        if entry is None:
+            path = self._path(key)
+            if path.exists():
+                try:
+                    entry = pd.read_pickle(path)
+                except Exception as e:
+                    logger.warning('Discarding unreadable cache file %s: %s', path, e)
+                    entry = None
+            if entry is not None:
+                self._entries[key] = entry
+                self._notify(key, entry['bars'])
+        return entry
+
+    def _save(self, key, entry):
+        self._entries[key] = entry
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        pd.to_pickle(entry, tmp_path)
+        os.replace(tmp_path, path)
+        if self.bar_store is not None:
+            try:
+                self.bar_store.ingest(key[0], key[1], entry['bars'])
+            except Exception:
+                logger.exception('Error writing to the bar store', extra={'ticker': key[0], 'interval': key[1]})
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.put(key, entry)
+            except Exception:
+                logger.exception('Error writing to the shared cache', extra={'ticker': key[0], 'interval': key[1]})
+        self._notify(key, entry['bars'])
+
+    def _cold_bars(self, key, start, end=None):
+        """Bars in [start, end) from the bar store, or None unless it covers ``start``"""
+        if self.bar_store is None:
+            return None
+        bounds = self.bar_store.bounds(*key)
+        start = align_timestamps(start, 'UTC')
+        # One bar of slack: the first stored bar starts on a bar boundary at or after the requested start
+        if bounds is None or bounds[0] > (start + BAR_DURATIONS.get(key[1], BAR_DURATIONS['1d'])).value:
+            return None
+        end = align_timestamps(end, 'UTC') if end is not None else None
+        return self.bar_store.read_frame(key[0], key[1], start, end)
+
+    def _is_fresh(self, key, entry):
+        return time.time() - entry['fetched_at'] < self.ttls.get(key[1], CACHE_TTLS['1d'])
+
+    @staticmethod
+    def _merge(bars, new_bars):
+        if new_bars is None or new_bars.empty:
+            if bars is not None:
+                return bars
+            return new_bars if new_bars is not None else empty_bars()
+        if bars is None or bars.empty:
+            return new_bars.sort_index()
+        if bars.index.tz is not None and new_bars.index.tz is not None:
+            new_bars = new_bars.tz_convert(bars.index.tz)
+        merged = pd.concat([bars, new_bars])
+        # Later fetches win: the last bar of the previous fetch may still have been forming
+        merged = merged[~merged.index.duplicated(keep='last')]
+        return merged.sort_index()
+
+    def _refresh_tail(self, key, entry):
+        bars = entry['bars']
+        ticker, interval = key
+        stored_at = self.bar_store.updated_at(*key) if self.bar_store is not None else None
+        if (not bars.empty and stored_at is not None and stored_at > entry['fetched_at']
+                and time.time() - stored_at < self.ttls.get(interval, CACHE_TTLS['1d'])):
+            # The ingest service (or another worker) refreshed this series since; take the tail from the store
+            new_bars = self.bar_store.read_frame(ticker, interval, start=bars.index[-1])
+            entry = dict(entry, bars=self._merge(bars, new_bars), fetched_at=stored_at)
+            self._entries[key] = entry
+            self._notify(key, entry['bars'])
+            return entry
+        if bars.empty:
+            new_bars = self._fetch('history', ticker, interval, start=entry['start'], end=None)
+        else:
+            new_bars = self._fetch('history', ticker, interval, start=bars.index[-1], end=None)
+        entry = dict(entry, bars=self._merge(bars, new_bars), fetched_at=time.time())
+        self._save(key, entry)
+        return entry
+
+    @staticmethod
+    def _window(bars, period):
+        if bars.empty:
+            return bars
+        # Anchor the window on the last bar so closed sessions still return data
+        return bars[bars.index > bars.index[-1] - pd.Timedelta(period)]
+
+    def _store_period(self, key, entry, bars, period):
+        start = pd.Timestamp(datetime.now() - pd.Timedelta(period))
+        previous = None
+        if entry is not None:
+            previous = entry['bars']
+            start = min(start, align_timestamps(entry['start'], None))
+            if pd.Timedelta(entry['period']) > pd.Timedelta(period):
+                period = entry['period']
+        entry = {
+            'bars': self._merge(previous, bars),
+            'period': period,
+            'start': start,
+            'fetched_at': time.time()
+        }
+        self._save(key, entry)
+        return entry
+
+    def _entry_from_store(self, key, period):
+        start = pd.Timestamp(datetime.now() - pd.Timedelta(period))
+        bars = self._cold_bars(key, start)
+        if bars is None or bars.empty:
+            return None
+        # Fresh as of the store's last write, so a recently ingested series needs no fetch at all
+        entry = {
+            'bars': bars,
+            'period': period,
+            'start': start,
+            'fetched_at': self.bar_store.updated_at(*key) or 0
+        }
+        self._entries[key] = entry
+        self._notify(key, bars)
+        return entry
+
+    def get_history(self, ticker, interval, period):
+        """
+        Return roughly the last ``period`` worth of bars for a ticker
+
+        Args:
+            ticker (str): Provider symbol
+            interval (str): Bar interval, e.g. '5m'
+            period (str): Lookback period, e.g. '7d'
+
+        Returns:
+            pd.DataFrame: OHLCV bars indexed by timestamp
+        """
+        key = (ticker, interval)
+        result = 'hit'
+        with self._lock(key):
+            entry = self._load(key)
+            if entry is None:
+                entry = self._entry_from_store(key, period)
+                result = 'cold'
+            if entry is None or pd.Timedelta(entry['period']) < pd.Timedelta(period):
+                bars = self._fetch('history', ticker, interval, period=period)
+                entry = self._store_period(key, entry, bars, period)
+                result = 'miss'
+            elif not self._is_fresh(key, entry):
+                entry = self._refresh_tail(key, entry)
+                result = 'tail'
+        MARKET_CACHE_REQUESTS.inc(interval=interval, result=result)
+
+        return self._window(entry['bars'], period)
+
+    def get_history_many(self, tickers, interval, period):
+        """
+        Return the last ``period`` of bars for many tickers sharing an interval
+
+        Tickers that are missing or stale are fetched together with a single
+        multi-ticker provider call; fresh ones are served from the cache.
+
+        Args:
+            tickers (list): Provider symbols
+            interval (str): Bar interval, e.g. '5m'
+            period (str): Lookback period, e.g. '7d'
+
+        Returns:
+            dict: Ticker -> pd.DataFrame of OHLCV bars (empty if unavailable)
+        """
+        tickers = list(dict.fromkeys(tickers))
+        stale = []
+        for ticker in tickers:
+            entry = self._load((ticker, interval))
+            if (entry is None or pd.Timedelta(entry['period']) < pd.Timedelta(period)
+                    or not self._is_fresh((ticker, interval), entry)):
+                stale.append(ticker)
+
+        MARKET_CACHE_REQUESTS.inc(len(tickers) - len(stale), interval=interval, result='hit')
+        MARKET_CACHE_REQUESTS.inc(len(stale), interval=interval, result='miss')
+        fetched = self._fetch('history_many', stale, interval, period) if stale else {}
+        for ticker in stale:
+            key = (ticker, interval)
+            with self._lock(key):
+                self._store_period(key, self._load(key), fetched.get(ticker), period)
+
+        return {ticker: self._window(self._load((ticker, interval))['bars'], period) for ticker in tickers}
+
+    def get_range(self, ticker, interval, start, end):
+        """
+        Return cached bars in [start, end), fetching only the uncovered parts
+
+        Args:
+            ticker (str): Provider symbol
+            interval (str): Bar interval, e.g. '5m'
+            start (datetime): Range start; naive values are server local time
+            end (datetime): Range end; naive values are server local time
+
+        Returns:
+            pd.DataFrame: OHLCV bars indexed by timestamp
+        """
+        key = (ticker, interval)
+        range_start = align_timestamps(start, None)
+        range_end = align_timestamps(end, None)
+        with self._lock(key):
+            entry = self._load(key)
+            if entry is None:
+                bars = self._cold_bars(key, start)
+                if bars is not None:
+                    # Stored bars may stop short of ``end``; the tail check below tops them up
+                    entry = {
+                        'bars': bars,
+                        'period': '0d',
+                        'start': range_start,
+                        'fetched_at': self.bar_store.updated_at(*key) or 0
+                    }
+                    self._entries[key] = entry
+                    self._notify(key, bars)
+                else:
+                    bars = self._fetch('history', ticker, interval, start=start, end=end)
+                    entry = {
+                        'bars': self._merge(None, bars),
+                        'period': '0d',
+                        'start': range_start,
+                        'fetched_at': time.time()
+                    }
+                    self._save(key, entry)
+            else:
+                covered_from = align_timestamps(entry['start'], None)
+                if range_start < covered_from:
+                    # Only the uncovered head of the range goes upstream, unless the bar store holds it
+                    head = self._cold_bars(key, start, covered_from)
+                    if head is None:
+                        head = self._fetch('history', ticker, interval, start=start, end=covered_from.to_pydatetime())
+                    entry = dict(entry, bars=self._merge(entry['bars'], head), start=range_start)
+                    self._save(key, entry)
+            bars = entry['bars']
+            last_bar = align_timestamps(bars.index[-1], None) if not bars.empty else None
+            if (last_bar is None or range_end > last_bar) and not self._is_fresh(key, entry):
+                entry = self._refresh_tail(key, entry)
+
+        bars = entry['bars']
+        if bars.empty:
+            return bars
+        tz = bars.index.tz
+        return bars[(bars.index >= align_timestamps(start, tz)) & (bars.index < align_timestamps(end, tz))]
+
+    def clear(self):
+        """Drop every cached entry from memory and disk."""
+        with self._locks_guard:
+            self._entries.clear()
+            for path in self.cache_dir.glob('*/*.pkl'):
+                path.unlink()
+            if self.shared_cache is not None:
+                self.shared_cache.clear()
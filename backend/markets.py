@@ -0,0 +1,86 @@
+"""
+Symbol universes and the market metadata served by /markets
+
+The ingest service pre-warms the bar store for every symbol listed here.
+"""
+
+# Common futures contracts with their yfinance symbols
+FUTURES_SYMBOLS = {
+    'ES': 'ES=F',  # E-mini S&P 500
+    'NQ': 'NQ=F',  # E-mini NASDAQ 100
+    'YM': 'YM=F',  # E-mini Dow
+    'RTY': 'RTY=F',  # E-mini Russell 2000
+    'GC': 'GC=F',  # Gold
+    'SI': 'SI=F',  # Silver
+    'CL': 'CL=F',  # Crude Oil
+    'NG': 'NG=F',  # Natural Gas
+    'ZB': 'ZB=F',  # Treasury Bond
+    'ZN': 'ZN=F',  # 10-Year T-Note
+    '6E': '6E=F',  # Euro FX
+    '6J': '6J=F',  # Japanese Yen
+    'ZC': 'ZC=F',  # Corn
+    'ZS': 'ZS=F',  # Soybeans
+    'ZW': 'ZW=F',  # Wheat
+}
+
+# Common cryptocurrency pairs
+CRYPTO_SYMBOLS = {
+    'BTC-USD': 'Bitcoin',
+    'ETH-USD': 'Ethereum',
+    'BNB-USD': 'Binance Coin',
+    'XRP-USD': 'Ripple',
+    'ADA-USD': 'Cardano',
+    'DOGE-USD': 'Dogecoin',
+    'SOL-USD': 'Solana',
+    'DOT-USD': 'Polkadot',
+    'MATIC-USD': 'Polygon',
+    'LINK-USD': 'Chainlink'
+}
+
+# Stocks shown as examples and pre-warmed by default
+STOCK_SYMBOLS = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA']
+
+TIMEFRAMES = [
+    {'id': '5min', 'name': '5 Minutes', 'interval': '5m'},
+    {'id': '15min', 'name': '15 Minutes', 'interval': '15m'},
+    {'id': '1h', 'name': '1 Hour', 'interval': '1h'},
+    {'id': '1d', 'name': '1 Day', 'interval': '1d'}
+]
+
+MARKETS = [
+    {
+        'id': 'stocks',
+        'name': 'Stocks',
+        'description': 'US Stock Market',
+        'examples': STOCK_SYMBOLS
+    },
+    {
+        'id': 'crypto',
+        'name': 'Crypto',
+        'description': 'Cryptocurrency Market',
+        'examples': ['BTC-USD', 'ETH-USD', 'SOL-USD', 'XRP-USD', 'DOGE-USD'],
+        'timeframes': TIMEFRAMES
+    },
+    {
+        'id': 'futures',
+        'name': 'Futures',
+        'description': 'Futures Market',
+        'examples': ['ES=F', 'NQ=F', 'YM=F', 'RTY=F', 'CL=F']
+    }
+]
+
+
+def universe(stocks=None):
+    """
+    Provider symbols of every futures contract and crypto pair, plus a stock list
+
+    Args:
+        stocks (list, optional): Stock tickers, defaults to STOCK_SYMBOLS
+
+    Returns:
+        list: Unique symbols in a stable order
+    """
+    symbols = list(STOCK_SYMBOLS if stocks is None else stocks)
+    symbols += FUTURES_SYMBOLS.values()
+    symbols += CRYPTO_SYMBOLS
+    return list(dict.fromkeys(symbols))
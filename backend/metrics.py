@@ -0,0 +1,249 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        """Current values as [label values, value] pairs, ready for JSON."""
+        with self._lock:
+            return [[list(key), self._copy(value)] for key, value in self._values.items()]
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def render(self, values=None):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.extend(self._samples(list(zip(self.labelnames, key)), value))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, exposed as ``<name>_total``."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    @staticmethod
+    def merge(values):
+        return sum(values)
+
+    def _samples(self, labels, value):
+        return [f'{self.name}_total{_format_labels(labels)} {_format_value(value)}']
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0}
+            state['counts'][bisect.bisect_left(self.buckets, value)] += 1
+            state['sum'] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of a block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return sum(state['counts']) if state else 0
+
+    @staticmethod
+    def _copy(state):
+        return {'counts': list(state['counts']), 'sum': state['sum']}
+
+    @staticmethod
+    def merge(states):
+        return {
+            'counts': [sum(counts) for counts in zip(*(state['counts'] for state in states))],
+            'sum': sum(state['sum'] for state in states)
+        }
+
+    def _samples(self, labels, state):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), state['counts']):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(float(bound)))])} "
+                         f"{cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(state['sum'])}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Metrics rendered in the Prometheus text exposition format
+
+    Every process keeps its own registry. With several worker processes
+    behind one port, ``share`` them through a directory: each process then
+    writes a snapshot of its values to ``<directory>/<pid>.json`` every
+    ``flush_interval`` seconds (and whenever it renders), and ``render``
+    sums the snapshots of every process, so any worker answers a scrape
+    with the totals. Snapshots of exited processes stay, which keeps the
+    totals monotonic; clear the directory when the server starts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self.directory = None
+        self._instance = None
+
+    def share(self, directory, instance=None, flush_interval=1.0):
+        """Aggregate with every other process sharing ``directory``."""
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._instance = str(instance or os.getpid())
+        if flush_interval:
+            threading.Thread(target=self._flush_periodically, args=(flush_interval,), name='metrics-flush',
+                             daemon=True).start()
+
+    def _flush_periodically(self, interval):
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def flush(self):
+        """Write this process's snapshot to the shared directory."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        snapshot = {metric.name: metric.snapshot() for metric in metrics}
+        path = self.directory / f"{self._instance}.json"
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(snapshot))
+        os.replace(tmp_path, path)
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _shared_values(self):
+        self.flush()
+        merged = {}
+        for path in self.directory.glob('*.json'):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (FileNotFoundError, ValueError):
+                continue
+            for name, values in snapshot.items():
+                for key, value in values:
+                    merged.setdefault(name, {}).setdefault(tuple(key), []).append(value)
+        return merged
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        if self.directory is None:
+            return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
+        merged = self._shared_values()
+        lines = []
+        for metric in metrics:
+            values = {key: metric.merge(per_process) for key, per_process in merged.get(metric.name, {}).items()}
+            lines.extend(metric.render(values))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# serve.py points every worker process at one directory so /metrics reports totals
+if os.environ.get('METRICS_DIR'):
+    REGISTRY.share(os.environ['METRICS_DIR'])
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'stocktime_request_seconds', 'HTTP request latency until the response is returned',
+    ('endpoint', 'method', 'status'))
+UPSTREAM_FETCH_SECONDS = REGISTRY.histogram(
+    'stocktime_upstream_fetch_seconds', 'Market data provider call latency', ('method',))
+UPSTREAM_ERRORS = REGISTRY.counter(
+    'stocktime_upstream_errors', 'Market data provider calls that failed or timed out', ('method', 'reason'))
+MARKET_CACHE_REQUESTS = REGISTRY.counter(
+    'stocktime_market_cache_requests',
+    'Market data cache lookups: hit, tail (refetched the tail), cold (bar store) or miss (full fetch)',
+    ('interval', 'result'))
+PREDICTION_CACHE_REQUESTS = REGISTRY.counter(
+    'stocktime_prediction_cache_requests', 'Per-bar prediction cache lookups', ('result',))
+PREDICT_COMPUTE_SECONDS = REGISTRY.histogram(
+    'stocktime_predict_compute_seconds', 'Forecast computation time', ('engine',))
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    'stocktime_db_write_seconds', 'Predictions database write transactions', ('operation',))
+SERIALIZATION_SECONDS = REGISTRY.histogram(
+    'stocktime_serialization_seconds', 'Response body encoding time', ('endpoint',))
@@ -1,9 +1,88 @@
+from dataclasses import dataclass
+
 import numpy as np
 import torch
+from numpy.lib.stride_tricks import sliding_window_view
+
+@dataclass
+class NormalizationStats:
+    """
+    Per-series statistics from reversible instance normalization
+
+    Arrays keep a trailing axis of length one so they broadcast against
+    the [batch, time] inputs they were computed from.
+    """
+    mean: np.ndarray
+    std: np.ndarray
+
+    def normalize(self, prices):
+        return (prices - self.mean) / self.std
+
+    def denormalize(self, normalized_prices):
+        return normalized_prices * self.std + self.mean
 
 class StockDataProcessor:
     def __init__(self, patch_length=32):
         self.patch_length = patch_length
+
+    def normalize_batch(self, prices, eps=1e-8):
+        """
+        Normalize every row of a [batch, time] array (RevIN style)
+
+        Args:
+            prices (np.array): Prices of shape (batch, time); a 1-D series
+                is treated as a batch of one
+            eps (float): Added to the standard deviation to avoid division by zero
+
+        Returns:
+            tuple: (normalized prices, NormalizationStats for exact inversion)
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if prices.ndim == 1:
+            prices = prices[None, :]
+
+        mean = prices.mean(axis=-1, keepdims=True)
+        std = prices.std(axis=-1, keepdims=True) + eps
+        stats = NormalizationStats(mean=mean, std=std)
+        return stats.normalize(prices), stats
+
+    def patch_view(self, prices, stride=None):
+        """
+        Strided patch view over the last axis, without copying
+
+        Args:
+            prices (np.array): Prices of shape (..., time)
+            stride (int, optional): Step between patch starts, defaults to
+                patch_length (consecutive, non-overlapping patches)
+
+        Returns:
+            np.array: Read-only view of shape (..., num_patches, patch_length)
+        """
+        stride = stride or self.patch_length
+        if np.shape(prices)[-1] < self.patch_length:
+            return np.empty(np.shape(prices)[:-1] + (0, self.patch_length))
+        return sliding_window_view(prices, self.patch_length, axis=-1)[..., ::stride, :]
+
+    def patch_statistics(self, patches):
+        """
+        Template statistics for all patches in one vectorized pass
+
+        Args:
+            patches (np.array): Patches of shape (..., patch_length)
+
+        Returns:
+            dict: 'min', 'max', 'mean' and 'rate_of_change' (percent), each
+            of shape (...)
+        """
+        first = patches[..., 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate_of_change = (patches[..., -1] - first) / first * 100
+        return {
+            'min': patches.min(axis=-1),
+            'max': patches.max(axis=-1),
+            'mean': patches.mean(axis=-1),
+            'rate_of_change': rate_of_change
+        }
     
     def normalize_prices(self, prices):
         """
@@ -16,16 +95,11 @@ class StockDataProcessor:
         Returns:
             np.array: Normalized prices
         """
-        # Compute mean and standard deviation
-        mean = np.mean(prices)
-        std = np.std(prices)
-        
-        # Normalize prices
-        normalized_prices = (prices - mean) / std
-        
-        return normalized_prices
+        normalized_prices, _ = self.normalize_batch(prices, eps=0.0)
+        return normalized_prices.reshape(np.shape(prices))
     
-    def denormalize_prices(self, normalized_prices, base_price=None, original_mean=None, original_std=None):
+    def denormalize_prices(self, normalized_prices, base_price=None, original_mean=None, original_std=None,
+                           stats=None):
         """
         Denormalize prices back to original scale
         
@@ -34,10 +108,15 @@ class StockDataProcessor:
             base_price (float, optional): Base price to anchor denormalization
             original_mean (float, optional): Original mean of prices
             original_std (float, optional): Original standard deviation of prices
+            stats (NormalizationStats, optional): Exact statistics returned by
+                normalize_batch; takes precedence over the other arguments
         
         Returns:
             np.array: Denormalized prices
         """
+        if stats is not None:
+            return stats.denormalize(normalized_prices)
+
         # If base price is provided, use it to adjust denormalization
         if base_price is not None:
             # If original statistics are not provided, estimate from base_price
@@ -66,13 +145,37 @@ class StockDataProcessor:
         # Normalize prices first
         normalized_prices = self.normalize_prices(prices)
         
-        # Create patches
-        patches = []
-        for i in range(0, len(normalized_prices) - self.patch_length + 1, self.patch_length):
-            patch = normalized_prices[i:i+self.patch_length]
-            patches.append(patch)
-        
-        return np.array(patches)
+        # Patches are a strided view over the normalized series
+        return self.patch_view(normalized_prices)
+    
+    def create_text_templates(self, patches):
+        """
+        Create textual templates for many price patches
+
+        Statistics are computed for all patches at once; only the final
+        string formatting runs per patch.
+
+        Args:
+            patches (np.array): Normalized price patches, shape (num_patches, patch_length)
+
+        Returns:
+            list: One template string per patch
+        """
+        stats = self.patch_statistics(np.asarray(patches))
+        patch_length = np.shape(patches)[-1]
+        return [
+            (
+                f"Stock Price Patch Analysis:\n"
+                f"Minimum Normalized Price: {min_price:.4f}\n"
+                f"Maximum Normalized Price: {max_price:.4f}\n"
+                f"Average Normalized Price: {avg_price:.4f}\n"
+                f"Normalized Rate of Change: {rate_of_change:.4f}%\n"
+                f"Patch Length: {patch_length} days"
+            )
+            for min_price, max_price, avg_price, rate_of_change in zip(
+                stats['min'], stats['max'], stats['mean'], stats['rate_of_change']
+            )
+        ]
     
     def create_text_template(self, price_patch):
         """
@@ -85,17 +188,4 @@ class StockDataProcessor:
         Returns:
             str: Textual template describing the patch
         """
-        min_price = np.min(price_patch)
-        max_price = np.max(price_patch)
-        avg_price = np.mean(price_patch)
-        rate_of_change = (price_patch[-1] - price_patch[0]) / price_patch[0] * 100
-        
-        template = (
-            f"Stock Price Patch Analysis:\n"
-            f"Minimum Normalized Price: {min_price:.4f}\n"
-            f"Maximum Normalized Price: {max_price:.4f}\n"
-            f"Average Normalized Price: {avg_price:.4f}\n"
-            f"Normalized Rate of Change: {rate_of_change:.4f}%\n"
-            f"Patch Length: {len(price_patch)} days"
-        )
-        return template
+        return self.create_text_templates(np.asarray(price_patch)[None, :])[0]
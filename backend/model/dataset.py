@@ -0,0 +1,131 @@
+import random
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+from numpy.lib.stride_tricks import sliding_window_view
+from torch.utils.data import IterableDataset, get_worker_info
+
+from bar_store import BarStore
+from model.data_processor import StockDataProcessor
+
+SUPPORTED_SUFFIXES = ('.npy', '.csv', '.pkl')
+
+# One bar store series, read whole rather than segment by segment
+BarSeries = namedtuple('BarSeries', ['root', 'ticker', 'interval'])
+
+
+def load_close_prices(path):
+    """
+    Load the close price column of an on-disk OHLCV file
+
+    ``.npy`` files are memory-mapped, so nothing is read until a window is
+    touched. They may hold a 1-D close series or a 2-D array of
+    open/high/low/close/volume columns. ``.csv`` files and pickled market
+    cache entries are read through pandas, and a BarSeries through its
+    bar store, merged across all of its segments.
+
+    Args:
+        path (Path or BarSeries): OHLCV file or bar store series
+
+    Returns:
+        np.array: 1-D close prices
+    """
+    if isinstance(path, BarSeries):
+        return BarStore(path.root).read(path.ticker, path.interval)['close']
+    path = Path(path)
+    if path.suffix == '.npy':
+        data = np.load(path, mmap_mode='r')
+        return data if data.ndim == 1 else data[:, 3]
+    if path.suffix == '.csv':
+        return pd.read_csv(path, usecols=['Close'])['Close'].to_numpy(dtype=np.float32)
+    entry = pd.read_pickle(path)
+    bars = entry['bars'] if isinstance(entry, dict) else entry
+    return bars['Close'].to_numpy(dtype=np.float32)
+
+
+def find_ohlcv_files(root):
+    """
+    Return every supported OHLCV file below a directory (or the file itself)
+
+    Bar store series (``<interval>/<ticker>/meta.json`` below a store root)
+    are returned as one BarSeries each instead of their per-segment
+    ``.npy`` files, which hold too few bars for a training window.
+    """
+    root = Path(root)
+    if root.is_file():
+        return [root]
+    series_dirs = {meta_path.parent for meta_path in root.rglob('meta.json')}
+    store_roots = sorted({series_dir.parents[1] for series_dir in series_dirs})
+    series = [BarSeries(str(store_root), ticker, interval)
+              for store_root in store_roots
+              for ticker, interval in BarStore(store_root).series()]
+    files = sorted(
+        p for p in root.rglob('*')
+        if p.suffix in SUPPORTED_SUFFIXES and not series_dirs.intersection(p.parents)
+    )
+    return files + series
+
+
+class PatchDataset(IterableDataset):
+    """
+    Stream (patch, next price) training pairs from OHLCV files
+
+    Windows are strided views over each file's close prices, so a file is
+    never copied as a whole; only the chunk of windows being normalised is
+    materialised. Each window is instance-normalised with its own patch
+    statistics; flat patches have no scale to normalise by and are skipped,
+    since dividing by ``eps`` would blow their targets up to ~1e6 and swamp
+    the loss. Files are sharded across DataLoader workers and windows are
+    shuffled through a bounded buffer.
+    """
+
+    def __init__(self, files, patch_length=32, stride=1, shuffle_buffer=10000, eps=1e-8, seed=None,
+                 chunk_size=1024):
+        self.files = list(files)
+        self.processor = StockDataProcessor(patch_length)
+        self.patch_length = patch_length
+        self.stride = stride
+        self.shuffle_buffer = shuffle_buffer
+        self.eps = eps
+        self.seed = seed
+        self.chunk_size = chunk_size
+
+    def _windows(self, path):
+        prices = load_close_prices(path)
+        if len(prices) <= self.patch_length:
+            return
+        windows = sliding_window_view(prices, self.patch_length + 1)[::self.stride]
+
+        # Normalize a chunk of windows at a time instead of one window per call
+        for start in range(0, len(windows), self.chunk_size):
+            chunk = windows[start:start + self.chunk_size]
+            chunk = chunk[np.ptp(chunk[:, :-1], axis=1) > 0]
+            if not len(chunk):
+                continue
+            patches, stats = self.processor.normalize_batch(chunk[:, :-1], eps=self.eps)
+            targets = stats.normalize(chunk[:, -1:])
+            patches = torch.from_numpy(patches.astype(np.float32))
+            targets = torch.from_numpy(targets[:, 0].astype(np.float32))
+            yield from zip(patches, targets)
+
+    def __iter__(self):
+        worker = get_worker_info()
+        files = self.files
+        if worker is not None:
+            files = files[worker.id::worker.num_workers]
+        rng = random.Random(None if self.seed is None else self.seed + (worker.id if worker else 0))
+
+        buffer = []
+        for path in files:
+            for sample in self._windows(path):
+                if len(buffer) < self.shuffle_buffer:
+                    buffer.append(sample)
+                    continue
+                index = rng.randrange(len(buffer))
+                yield buffer[index]
+                buffer[index] = sample
+        rng.shuffle(buffer)
+        yield from buffer
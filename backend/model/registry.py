@@ -0,0 +1,166 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT = Path(__file__).resolve().parent.parent / 'data' / 'stocktime.pt'
+
+
+class ModelRegistry:
+    """
+    Process-wide owner of the serving StockTime model
+
+    The model is loaded once, either eagerly with ``load()`` or lazily on the
+    first prediction, and shared by every request thread. Concurrent
+    ``predict`` calls are coalesced into micro-batches: the first request
+    opens a short window (``batch_window`` seconds) and everything that
+    arrives before it closes runs through a single ``predict_batch`` call.
+    """
+
+    def __init__(self, checkpoint_path=DEFAULT_CHECKPOINT, compile=False, quantize=False,
+                 batch_window=0.005, max_batch_size=256):
+        self.checkpoint_path = Path(checkpoint_path)
+        self.compile = compile
+        self.quantize = quantize
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        # Scaling applied to inputs; replaced by the checkpoint's training settings
+        self.normalization = {'method': 'instance', 'scope': 'series', 'eps': 0.0}
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._worker = None
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def load(self):
+        """Load the model if it is not loaded yet and return it."""
+        if self._model is not None:
+            return self._model
+        with self._load_lock:
+            if self._model is None:
+                import torch
+                from model.stocktime_model import StockTime
+
+                if self.checkpoint_path.exists():
+                    checkpoint = torch.load(self.checkpoint_path, map_location='cpu')
+                    if 'model_state' in checkpoint:
+                        model = StockTime(**checkpoint.get('config', {}))
+                        model.load_state_dict(checkpoint['model_state'])
+                        self.normalization = checkpoint.get('normalization', self.normalization)
+                    else:
+                        model = StockTime()
+                        model.load_state_dict(checkpoint)
+                    logger.info('Loaded StockTime weights from %s', self.checkpoint_path)
+                else:
+                    model = StockTime()
+                    logger.warning('No StockTime checkpoint at %s, serving untrained weights', self.checkpoint_path)
+                self._model = model.optimize_for_inference(compile=self.compile, quantize=self.quantize)
+        return self._model
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._load_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='stocktime-batcher', daemon=True)
+                    self._worker.start()
+
+    def predict(self, prices, steps_ahead=7):
+        """
+        Predict future prices for one series, sharing a batch with concurrent callers
+
+        Args:
+            prices (np.array): Historical prices
+            steps_ahead (int): Number of future steps to predict
+
+        Returns:
+            np.array: Predicted prices in the original scale
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if len(prices) == 0:
+            raise ValueError('StockTime needs at least one price')
+        windows, mean, std = self.normalize(prices[np.newaxis, :])
+
+        future = Future()
+        self._ensure_worker()
+        self._requests.put((windows[0], steps_ahead, future))
+        normalized = future.result()
+        return normalized * std[0] + mean[0]
+
+    def normalize(self, prices):
+        """
+        Scale histories the way the model was trained and keep its last patch
+
+        Args:
+            prices (np.array): Historical prices, shape (batch, time)
+
+        Returns:
+            tuple: (normalized last patches as float32 (batch, patch_length),
+            mean (batch, 1), std (batch, 1)) to map predictions back
+        """
+        patch_length = self.load().patch_length
+        if prices.shape[1] < patch_length:
+            # Short histories (e.g. 30 days of daily stock bars) are padded with the first price
+            padding = np.repeat(prices[:, :1], patch_length - prices.shape[1], axis=1)
+            prices = np.concatenate([padding, prices], axis=1)
+
+        # Match the statistics the model was trained with: whole series or last patch only
+        windows = prices[:, -patch_length:]
+        reference = windows if self.normalization.get('scope') == 'patch' else prices
+        mean = reference.mean(axis=1, keepdims=True)
+        std = reference.std(axis=1, keepdims=True)
+        # Flat histories have no scale (training skips such windows); keep them in price units
+        std = np.where(std == 0, 1.0, std + self.normalization.get('eps', 0.0))
+        return ((windows - mean) / std).astype(np.float32), mean, std
+
+    def predict_many(self, prices, steps_ahead=7, batch_size=4096):
+        """
+        Predict future prices for many equal-length histories directly, without micro-batching
+
+        Args:
+            prices (np.array): Historical prices, shape (batch, time)
+            steps_ahead (int): Number of future steps to predict
+            batch_size (int): Histories per model call
+
+        Returns:
+            np.array: Predicted prices in the original scale, shape (batch, steps_ahead)
+        """
+        model = self.load()
+        prices = np.asarray(prices, dtype=np.float64)
+        predictions = np.empty((len(prices), steps_ahead))
+        for start in range(0, len(prices), batch_size):
+            windows, mean, std = self.normalize(prices[start:start + batch_size])
+            normalized = model.predict_batch(windows, steps_ahead, normalize=False).numpy()
+            predictions[start:start + batch_size] = normalized * std + mean
+        return predictions
+
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                windows = np.stack([window for window, _, _ in batch])
+                steps = max(steps_ahead for _, steps_ahead, _ in batch)
+                predictions = self._model.predict_batch(windows, steps, normalize=False).numpy()
+                for row, (_, steps_ahead, future) in zip(predictions, batch):
+                    future.set_result(row[:steps_ahead].astype(np.float64))
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
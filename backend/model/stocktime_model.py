@@ -1,3 +1,5 @@
+import copy
+
 import torch
 import torch.nn as nn
 import numpy as np
@@ -52,6 +54,80 @@ class StockTime(nn.Module):
         output = self.output_projection(price_embedding)
         return output.squeeze()
     
+    def _decode_step(self, hidden, cell):
+        """
+        Project the top hidden state to a price and advance the LSTM by one step
+
+        Args:
+            hidden (torch.Tensor): LSTM hidden state, (num_layers, batch, 256)
+            cell (torch.Tensor): LSTM cell state, (num_layers, batch, 256)
+
+        Returns:
+            tuple: (next_price of shape (batch, 1), hidden, cell)
+        """
+        next_price = self.output_projection(self.price_projection(hidden[-1]))
+        _, (hidden, cell) = self.lstm(next_price.unsqueeze(-1), (hidden, cell))
+        return next_price, hidden, cell
+    
+    def predict_batch(self, prices, steps_ahead=7, normalize=True):
+        """
+        Autoregressively predict future prices for a batch of series
+        
+        The last patch of every series is encoded once; each following step
+        feeds only the newly predicted value through the carried (h, c)
+        state, so a step costs O(1) instead of O(patch_length).
+        
+        Args:
+            prices (np.array or torch.Tensor): Historical prices, shape (batch, time)
+                with time >= patch_length
+            steps_ahead (int): Number of future steps to predict
+            normalize (bool): Normalize each series to zero mean and unit
+                variance first; pass False if the input already is
+        
+        Returns:
+            torch.Tensor: Normalized predictions, shape (batch, steps_ahead)
+        """
+        prices = torch.as_tensor(prices, dtype=torch.float32)
+        if prices.dim() == 1:
+            prices = prices.unsqueeze(0)
+        
+        if normalize:
+            mean = prices.mean(dim=1, keepdim=True)
+            std = prices.std(dim=1, unbiased=False, keepdim=True)
+            prices = (prices - mean) / std
+        
+        window = prices[:, -self.patch_length:].unsqueeze(-1)
+        
+        with torch.inference_mode():
+            predictions = torch.empty(prices.shape[0], steps_ahead)
+            _, (hidden, cell) = self.lstm(window)
+            for step in range(steps_ahead):
+                next_price, hidden, cell = self._decode_step(hidden, cell)
+                predictions[:, step] = next_price[:, 0]
+        
+        return predictions
+    
+    def optimize_for_inference(self, compile=False, quantize=False):
+        """
+        Return a copy of the model prepared for serving
+        
+        Args:
+            compile (bool): Compile the per-step decoder with torch.compile
+            quantize (bool): Apply dynamic int8 quantization to the LSTM and
+                linear layers (CPU only)
+        
+        Returns:
+            StockTime: Model in eval mode
+        """
+        model = copy.deepcopy(self).eval()
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {nn.LSTM, nn.Linear}, dtype=torch.qint8
+            )
+        if compile:
+            model._decode_step = torch.compile(model._decode_step)
+        return model
+    
     def predict(self, prices, steps_ahead=7):
         """
         Predict future stock prices
@@ -63,30 +139,4 @@ class StockTime(nn.Module):
         Returns:
             torch.Tensor: Predicted future prices
         """
-        # Normalize prices
-        prices = (prices - np.mean(prices)) / np.std(prices)
-        
-        # Convert to tensor
-        prices = torch.FloatTensor(prices)
-        
-        # Prepare input sequence (last patch)
-        input_sequence = prices[-self.patch_length:].unsqueeze(0)
-        
-        # Predictions
-        predictions = []
-        for _ in range(steps_ahead):
-            with torch.no_grad():
-                # Predict next price
-                next_price = self(input_sequence)
-                
-                # Append prediction
-                predictions.append(next_price.item())
-                
-                # Update input sequence
-                new_price = torch.FloatTensor([next_price.item()]).unsqueeze(0)
-                input_sequence = torch.cat([
-                    input_sequence[:, 1:], 
-                    new_price
-                ], dim=1)
-        
-        return torch.FloatTensor(predictions)
+        return self.predict_batch(np.asarray(prices, dtype=np.float32)[None, :], steps_ahead)[0]
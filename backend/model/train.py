@@ -0,0 +1,131 @@
+"""
+Train StockTime on on-disk OHLCV files
+
+Run from the backend directory:
+
+    python -m model.train --data data/market_cache --epochs 5 --workers 4
+"""
+import argparse
+import os
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader
+
+from model.dataset import PatchDataset, find_ohlcv_files
+from model.registry import DEFAULT_CHECKPOINT
+from model.stocktime_model import StockTime
+
+
+def save_checkpoint(path, model, optimizer, epoch, dataset):
+    """
+    Write weights, optimizer state and normalization settings atomically
+
+    The normalization block records how inputs were scaled during training
+    so serving code can reproduce it exactly.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    checkpoint = {
+        'model_state': model.state_dict(),
+        'optimizer_state': optimizer.state_dict(),
+        'epoch': epoch,
+        'config': {
+            'patch_length': model.patch_length,
+            'num_stocks': model.num_stocks
+        },
+        'normalization': {
+            'method': 'instance',
+            'scope': 'patch',
+            'eps': dataset.eps
+        }
+    }
+    tmp_path = path.with_suffix('.tmp')
+    torch.save(checkpoint, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def train(files, checkpoint_path=DEFAULT_CHECKPOINT, epochs=1, batch_size=256, workers=2, lr=1e-3,
+          stride=1, patch_length=32, resume=False, seed=None):
+    """
+    Fit StockTime to predict the next normalized price of every patch
+
+    Args:
+        files (list): OHLCV files or bar store series to stream windows from
+        checkpoint_path (Path): Where checkpoints are written after each epoch
+        epochs (int): Passes over the data
+        batch_size (int): Windows per optimizer step
+        workers (int): DataLoader worker processes
+        lr (float): Adam learning rate
+        stride (int): Step between consecutive windows
+        patch_length (int): Input window length
+        resume (bool): Continue from an existing checkpoint
+        seed (int, optional): Seed for shuffling and initialisation
+
+    Returns:
+        StockTime: Trained model
+    """
+    if seed is not None:
+        torch.manual_seed(seed)
+
+    dataset = PatchDataset(files, patch_length=patch_length, stride=stride, seed=seed)
+    loader = DataLoader(dataset, batch_size=batch_size, num_workers=workers,
+                        persistent_workers=workers > 0)
+
+    model = StockTime(patch_length=patch_length)
+    optimizer = torch.optim.Adam(model.parameters(), lr=lr)
+    loss_fn = nn.MSELoss()
+    start_epoch = 0
+
+    checkpoint_path = Path(checkpoint_path)
+    if resume and checkpoint_path.exists():
+        checkpoint = torch.load(checkpoint_path, map_location='cpu')
+        model.load_state_dict(checkpoint['model_state'])
+        optimizer.load_state_dict(checkpoint['optimizer_state'])
+        start_epoch = checkpoint['epoch'] + 1
+        print(f"Resuming from epoch {start_epoch}")
+
+    for epoch in range(start_epoch, start_epoch + epochs):
+        model.train()
+        total_loss = 0.0
+        batches = 0
+        for patches, targets in loader:
+            optimizer.zero_grad()
+            loss = loss_fn(model(patches).reshape(-1), targets)
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+            batches += 1
+
+        print(f"Epoch {epoch}: mean loss {total_loss / max(batches, 1):.6f} over {batches} batches")
+        save_checkpoint(checkpoint_path, model, optimizer, epoch, dataset)
+
+    return model.eval()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the StockTime model')
+    parser.add_argument('--data', required=True, help='OHLCV file or directory (.npy, .csv, .pkl, or a bar store root)')
+    parser.add_argument('--checkpoint', default=str(DEFAULT_CHECKPOINT), help='Checkpoint path')
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--lr', type=float, default=1e-3)
+    parser.add_argument('--stride', type=int, default=1, help='Step between consecutive windows')
+    parser.add_argument('--patch-length', type=int, default=32)
+    parser.add_argument('--resume', action='store_true', help='Continue from the checkpoint')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    files = find_ohlcv_files(args.data)
+    if not files:
+        parser.error(f"No OHLCV files found under {args.data}")
+    print(f"Training on {len(files)} files")
+
+    train(files, args.checkpoint, epochs=args.epochs, batch_size=args.batch_size, workers=args.workers,
+          lr=args.lr, stride=args.stride, patch_length=args.patch_length, resume=args.resume, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import cProfile
+import threading
+import time
+from pathlib import Path
+
+
+class RequestProfiler:
+    """
+    Profile single requests on demand
+
+    ``start`` begins a cProfile session, or a pyinstrument one when asked
+    for and installed, and ``stop`` writes it to ``output_dir`` as a
+    ``.prof`` file (for pstats or snakeviz) or an ``.html`` report. Only one
+    request is profiled at a time; ``start`` returns None while another
+    session is running.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = Path(output_dir)
+        self._lock = threading.Lock()
+
+    def start(self, kind='cprofile'):
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            if kind == 'pyinstrument':
+                try:
+                    from pyinstrument import Profiler
+                except ImportError:
+                    kind = 'cprofile'
+                else:
+                    profiler = Profiler()
+                    profiler.start()
+                    return kind, profiler
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return 'cprofile', profiler
+        except Exception:
+            self._lock.release()
+            raise
+
+    def stop(self, session, name):
+        """
+        Finish a session and write its report
+
+        Args:
+            session (tuple): Value returned by ``start``
+            name (str): Report file name prefix, e.g. the endpoint
+
+        Returns:
+            Path: The written report
+        """
+        kind, profiler = session
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            stem = f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{threading.get_ident()}"
+            if kind == 'pyinstrument':
+                profiler.stop()
+                path = self.output_dir / f"{stem}.html"
+                path.write_text(profiler.output_html())
+            else:
+                profiler.disable()
+                path = self.output_dir / f"{stem}.prof"
+                profiler.dump_stats(path)
+            return path
+        finally:
+            self._lock.release()
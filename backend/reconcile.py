@@ -0,0 +1,121 @@
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from bar_store import BarStore
+from logs import configure_logging
+from market_data import MarketDataCache
+from metrics import DB_WRITE_SECONDS
+from storage import DATA_DIR, DB_PATH, Database
+from tracking import resolve_actual_prices
+
+logger = logging.getLogger(__name__)
+
+
+def reconcile_predictions(db, market_data, now=None, lookback_days=30, batch_size=5000):
+    """
+    Fill in actual_price and error_percentage for predictions that came due
+
+    Args:
+        db (Database): Predictions database
+        market_data (MarketDataCache): Source of OHLCV bars
+        now (datetime, optional): Reference time, defaults to datetime.now()
+        lookback_days (int): Ignore targets older than this; they are not
+            retried forever when the provider has no matching bar
+        batch_size (int): Rows resolved per page; pages follow a (target_time, id)
+            cursor, so rows that cannot be resolved yet never hide newer ones
+
+    Returns:
+        int: Number of rows updated
+    """
+    now = now or datetime.now()
+    cursor = (now - timedelta(days=lookback_days), 0)
+    updated = 0
+    while True:
+        rows = db.connection().execute('''
+            SELECT id, ticker, timeframe, target_time, predicted_price FROM predictions
+            WHERE target_time < ?
+            AND (target_time > ? OR (target_time = ? AND id > ?))
+            AND actual_price IS NULL
+            ORDER BY target_time, id
+            LIMIT ?
+        ''', (now, cursor[0], cursor[0], cursor[1], batch_size)).fetchall()
+        if not rows:
+            return updated
+        cursor = (rows[-1][3], rows[-1][0])
+
+        pending = [
+            {
+                'id': row[0],
+                'ticker': row[1],
+                'timeframe': row[2],
+                'target_time': datetime.fromisoformat(row[3]),
+                'predicted_price': row[4]
+            }
+            for row in rows
+        ]
+        resolved = resolve_actual_prices(pending, market_data, now=now)
+        updates = [
+            (actual_price, error_percentage, prediction['id'])
+            for prediction, (actual_price, error_percentage) in zip(pending, resolved)
+            if actual_price is not None
+        ]
+        with DB_WRITE_SECONDS.time(operation='reconcile'), db.transaction() as conn:
+            conn.executemany('''
+                UPDATE predictions SET actual_price = ?, error_percentage = ?
+                WHERE id = ?
+            ''', updates)
+        updated += len(updates)
+        if len(rows) < batch_size:
+            return updated
+
+
+class ReconciliationWorker(threading.Thread):
+    """Background thread that periodically reconciles due predictions."""
+
+    def __init__(self, db, market_data, interval=60):
+        super().__init__(name='prediction-reconciler', daemon=True)
+        self.db = db
+        self.market_data = market_data
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                updated = reconcile_predictions(self.db, self.market_data)
+                if updated:
+                    logger.info('Reconciled %d predictions', updated)
+            except Exception:
+                logger.exception('Error reconciling predictions')
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Resolve actual prices for predictions that came due')
+    parser.add_argument('--db', default=str(DB_PATH), help='Path to the predictions database')
+    parser.add_argument('--cache-dir', default=str(DATA_DIR / 'market_cache'), help='Market data cache directory')
+    parser.add_argument('--bar-store', default=str(DATA_DIR / 'bars'), help='Bar store directory')
+    parser.add_argument('--interval', type=int, default=60, help='Seconds between passes')
+    parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+    args = parser.parse_args()
+    configure_logging()
+
+    db = Database(args.db)
+    db.migrate()
+    market_data = MarketDataCache(args.cache_dir, bar_store=BarStore(args.bar_store))
+    while True:
+        updated = reconcile_predictions(db, market_data)
+        logger.info('Reconciled %d predictions', updated)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from logs import configure_logging
+from metrics import DB_WRITE_SECONDS
+from storage import DB_PATH, Database
+
+logger = logging.getLogger(__name__)
+
+# Days a prediction stays in the predictions table before it is rolled up
+RETENTION_DAYS = {
+    '5min': 7,
+    '15min': 14,
+    '1h': 60,
+    '1d': 365
+}
+
+# Vacuum once this share of the database file is free pages
+VACUUM_FREE_RATIO = 0.25
+
+
+def parse_retention(spec):
+    """
+    Parse per-timeframe overrides such as ``'5min=3,1h=30'``
+
+    Returns:
+        dict: RETENTION_DAYS with the overrides applied
+    """
+    ttls = dict(RETENTION_DAYS)
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        timeframe, _, days = item.partition('=')
+        if timeframe not in RETENTION_DAYS or not days:
+            raise ValueError(f"Invalid retention setting '{item}', expected <timeframe>=<days>")
+        ttls[timeframe] = int(days)
+    return ttls
+
+
+def _attach_archive(conn, archive_path):
+    attached = {row[1] for row in conn.execute('PRAGMA database_list')}
+    if 'archive' not in attached:
+        conn.execute('ATTACH DATABASE ? AS archive', (str(archive_path),))
+    # Same columns as the live table at the time the archive was created
+    conn.execute('CREATE TABLE IF NOT EXISTS archive.predictions AS SELECT * FROM main.predictions WHERE 0')
+    return [row[1] for row in conn.execute('PRAGMA archive.table_info(predictions)')]
+
+
+def expire_predictions(db, ttls=None, now=None, archive_path=None, batch_size=50000):
+    """
+    Roll predictions older than their timeframe's TTL into daily aggregates and delete them
+
+    Expired rows are summed into prediction_daily_errors per day, ticker,
+    timeframe and horizon, optionally copied to an attached archive
+    database, and then deleted, in batches of ``batch_size`` rows so the
+    write lock is never held for long.
+
+    Args:
+        db (Database): Predictions database
+        ttls (dict, optional): Days to keep per timeframe, defaults to RETENTION_DAYS
+        now (datetime, optional): Reference time, defaults to datetime.now()
+        archive_path (str, optional): SQLite file that keeps the raw rows
+        batch_size (int): Maximum number of rows removed per transaction
+
+    Returns:
+        dict: Timeframe -> number of rows removed
+    """
+    ttls = ttls or RETENTION_DAYS
+    now = now or datetime.now()
+    archive_columns = _attach_archive(db.connection(), archive_path) if archive_path else None
+
+    removed = {}
+    for timeframe, days in ttls.items():
+        cutoff = now - timedelta(days=days)
+        removed[timeframe] = 0
+        while True:
+            with DB_WRITE_SECONDS.time(operation='retention'), db.transaction() as conn:
+                conn.execute('DROP TABLE IF EXISTS temp.expired')
+                conn.execute('''
+                    CREATE TEMP TABLE expired AS
+                    SELECT id FROM predictions
+                    WHERE timeframe = ? AND prediction_time < ?
+                    ORDER BY prediction_time
+                    LIMIT ?
+                ''', (timeframe, cutoff, batch_size))
+
+                conn.execute('''
+                    INSERT INTO prediction_daily_errors
+                    SELECT
+                        date(prediction_time), ticker, market_type, timeframe, COALESCE(horizon, 0),
+                        COUNT(*),
+                        COUNT(error_percentage),
+                        COALESCE(SUM(ABS(error_percentage)), 0),
+                        MAX(ABS(error_percentage)),
+                        MIN(ABS(error_percentage)),
+                        COALESCE(SUM(ABS(error_percentage) <= 1), 0),
+                        COALESCE(SUM(ABS(error_percentage) <= 5), 0)
+                    FROM predictions
+                    WHERE id IN (SELECT id FROM temp.expired)
+                    GROUP BY 1, 2, 3, 4, 5
+                    ON CONFLICT (ticker, market_type, timeframe, day, horizon) DO UPDATE SET
+                        total_predictions = total_predictions + excluded.total_predictions,
+                        completed_predictions = completed_predictions + excluded.completed_predictions,
+                        error_sum = error_sum + excluded.error_sum,
+                        max_error = COALESCE(MAX(max_error, excluded.max_error), max_error, excluded.max_error),
+                        min_error = COALESCE(MIN(min_error, excluded.min_error), min_error, excluded.min_error),
+                        within_1_percent = within_1_percent + excluded.within_1_percent,
+                        within_5_percent = within_5_percent + excluded.within_5_percent
+                ''')
+
+                if archive_columns:
+                    columns = ', '.join(archive_columns)
+                    conn.execute(f'''
+                        INSERT INTO archive.predictions ({columns})
+                        SELECT {columns} FROM main.predictions
+                        WHERE id IN (SELECT id FROM temp.expired)
+                    ''')
+
+                deleted = conn.execute(
+                    'DELETE FROM predictions WHERE id IN (SELECT id FROM temp.expired)'
+                ).rowcount
+                conn.execute('DROP TABLE temp.expired')
+
+            removed[timeframe] += deleted
+            if deleted < batch_size:
+                break
+    return removed
+
+
+def daily_errors(db, ticker, market_type, timeframe, since=None):
+    """
+    Per-day accuracy of rolled-up predictions, oldest first
+
+    Returns:
+        list: Dicts with 'day' and the same statistics as /track_predictions
+    """
+    rows = db.connection().execute('''
+        SELECT day, SUM(total_predictions), SUM(completed_predictions), SUM(error_sum),
+               MAX(max_error), MIN(min_error), SUM(within_1_percent), SUM(within_5_percent)
+        FROM prediction_daily_errors
+        WHERE ticker = ? AND market_type = ? AND timeframe = ? AND day >= ?
+        GROUP BY day
+        ORDER BY day
+    ''', (ticker, market_type, timeframe, since.strftime('%Y-%m-%d') if since else '')).fetchall()
+
+    return [
+        {
+            'day': day,
+            'total_predictions': total,
+            'completed_predictions': completed,
+            'average_error': error_sum / completed if completed else None,
+            'max_error': largest,
+            'min_error': smallest,
+            'accuracy_within_1_percent': within_1 / completed * 100 if completed else 0,
+            'accuracy_within_5_percent': within_5 / completed * 100 if completed else 0
+        }
+        for day, total, completed, error_sum, largest, smallest, within_1, within_5 in rows
+    ]
+
+
+def optimize(db, vacuum_free_ratio=VACUUM_FREE_RATIO):
+    """
+    Refresh planner statistics and reclaim free pages when enough have piled up
+
+    ANALYZE runs with a row sampling limit so it stays cheap on large
+    tables. VACUUM rewrites the whole file and blocks writers while it
+    runs, so it only happens once ``vacuum_free_ratio`` of the pages are
+    free (pass 0 to force it).
+
+    Returns:
+        bool: Whether the database was vacuumed
+    """
+    conn = db.connection()
+    conn.execute('PRAGMA analysis_limit = 1000')
+    conn.execute('ANALYZE')
+    conn.commit()
+
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    if page_count == 0 or free_pages / page_count < vacuum_free_ratio:
+        return False
+    conn.execute('VACUUM')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    return True
+
+
+class RetentionWorker(threading.Thread):
+    """Background thread that periodically expires old predictions and optimizes the database."""
+
+    def __init__(self, db, interval=3600, ttls=None, archive_path=None):
+        super().__init__(name='prediction-retention', daemon=True)
+        self.db = db
+        self.interval = interval
+        self.ttls = ttls
+        self.archive_path = archive_path
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                removed = expire_predictions(self.db, self.ttls, archive_path=self.archive_path)
+                if any(removed.values()):
+                    logger.info('Rolled up expired predictions', extra={'removed': removed})
+                if optimize(self.db):
+                    logger.info('Vacuumed the predictions database')
+            except Exception:
+                logger.exception('Error applying prediction retention')
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Roll up expired predictions and optimize the database')
+    parser.add_argument('--db', default=str(DB_PATH), help='Path to the predictions database')
+    parser.add_argument('--retention', default=None, help="Per-timeframe days to keep, e.g. '5min=3,1h=30'")
+    parser.add_argument('--archive', default=None, help='Keep expired rows in this SQLite file')
+    parser.add_argument('--vacuum', action='store_true', help='Vacuum regardless of free space')
+    parser.add_argument('--interval', type=int, default=3600, help='Seconds between passes')
+    parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+    args = parser.parse_args()
+    configure_logging()
+
+    db = Database(args.db)
+    db.migrate()
+    ttls = parse_retention(args.retention)
+    while True:
+        started = time.time()
+        removed = expire_predictions(db, ttls, archive_path=args.archive)
+        vacuumed = optimize(db, 0 if args.vacuum else VACUUM_FREE_RATIO)
+        logger.info('Rolled up %d predictions', sum(removed.values()),
+                    extra={'removed': removed, 'vacuumed': vacuumed, 'seconds': round(time.time() - started, 1)})
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
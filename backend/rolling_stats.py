@@ -0,0 +1,147 @@
+import math
+import threading
+from collections import deque
+
+import numpy as np
+
+# Default lookback in bars, roughly one default /predict period per interval
+DEFAULT_LOOKBACKS = {
+    '5m': 288,    # 1 day of 5-min bars
+    '15m': 192,   # 2 days of 15-min bars
+    '1h': 168,    # 7 days of hourly bars
+    '1d': 30      # 30 daily bars
+}
+
+
+class RollingWindowStats:
+    """
+    Mean and standard deviation over the last ``lookback`` values
+
+    Welford's update is applied when a value enters the window and reversed
+    when it leaves, so every update is O(1).
+    """
+
+    def __init__(self, lookback):
+        self.lookback = lookback
+        self.values = deque()
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.values.append(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+        if self.count > self.lookback:
+            old = self.values.popleft()
+            self.count -= 1
+            delta = old - self.mean
+            self.mean -= delta / self.count
+            self._m2 = max(self._m2 - delta * (old - self.mean), 0.0)
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+
+class EwmaStats:
+    """Exponentially weighted mean and standard deviation, updated in O(1)."""
+
+    def __init__(self, halflife):
+        self.alpha = 1 - 0.5 ** (1 / halflife)
+        self.count = 0
+        self.mean = 0.0
+        self._var = 0.0
+
+    def add(self, value):
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+            return
+        delta = value - self.mean
+        increment = self.alpha * delta
+        self.mean += increment
+        self._var = (1 - self.alpha) * (self._var + delta * increment)
+
+    @property
+    def std(self):
+        return math.sqrt(self._var)
+
+
+class ReturnStatsStore:
+    """
+    Incremental bar-to-bar return statistics per (ticker, interval)
+
+    ``update`` is fed the cached bars whenever the market data cache changes
+    and only consumes closed bars it has not seen yet, so keeping drift and
+    volatility current costs O(new bars) rather than O(history).
+
+    Args:
+        mode (str): 'window' for an equally weighted rolling window or
+            'ewma' for exponential weighting
+        lookbacks (dict, optional): Window length in bars per interval
+        halflife (float, optional): EWMA half-life in bars; defaults to a
+            quarter of the interval's lookback
+    """
+
+    def __init__(self, mode='window', lookbacks=None, halflife=None):
+        if mode not in ('window', 'ewma'):
+            raise ValueError(f"Unknown statistics mode '{mode}'")
+        self.mode = mode
+        self.lookbacks = dict(DEFAULT_LOOKBACKS, **(lookbacks or {}))
+        self.halflife = halflife
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _new_accumulator(self, interval):
+        lookback = self.lookbacks.get(interval, DEFAULT_LOOKBACKS['1d'])
+        if self.mode == 'ewma':
+            return EwmaStats(self.halflife or max(lookback / 4, 1))
+        return RollingWindowStats(lookback)
+
+    def update(self, ticker, interval, bars):
+        """Consume closed bars newer than the last one seen for a key."""
+        # The last bar may still be forming; it is picked up once the next one exists
+        if len(bars) < 2:
+            return
+        closed_times = bars.index[:-1]
+        closes = bars['Close'].to_numpy(dtype=np.float64)[:-1]
+
+        with self._lock:
+            entry = self._entries.get((ticker, interval))
+            if entry is None:
+                entry = self._entries[(ticker, interval)] = {
+                    'stats': self._new_accumulator(interval),
+                    'last_time': None,
+                    'last_close': None
+                }
+
+            start = 0 if entry['last_time'] is None else closed_times.searchsorted(entry['last_time'], side='right')
+            previous = entry['last_close']
+            for close in closes[start:]:
+                # A missing close is skipped, so the next return spans the gap like pct_change's forward fill
+                if not np.isfinite(close):
+                    continue
+                if previous is not None and np.isfinite(previous) and previous != 0:
+                    entry['stats'].add(close / previous - 1)
+                previous = close
+            if start < len(closes):
+                entry['last_time'] = closed_times[-1]
+                entry['last_close'] = previous
+
+    def get(self, ticker, interval):
+        """
+        Current (mean return, return volatility, observations) for a key
+
+        Returns:
+            tuple or None: None until at least two returns have been seen
+        """
+        with self._lock:
+            entry = self._entries.get((ticker, interval))
+            if entry is None or entry['stats'].count < 2:
+                return None
+            stats = entry['stats']
+            return stats.mean, stats.std, stats.count
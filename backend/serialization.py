@@ -0,0 +1,83 @@
+import json
+import math
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+HISTORY_FORMATS = ('records', 'columnar')
+
+
+def history_columns(hist):
+    """
+    Convert OHLCV bars to parallel arrays, one column at a time
+
+    Args:
+        hist (pd.DataFrame): Bars with Open/High/Low/Close/Volume columns
+
+    Returns:
+        dict: 'time' (list of str) and NumPy arrays for the price and volume columns
+    """
+    return {
+        'time': hist.index.strftime(TIME_FORMAT).tolist(),
+        'open': hist['Open'].to_numpy(dtype=np.float64),
+        'high': hist['High'].to_numpy(dtype=np.float64),
+        'low': hist['Low'].to_numpy(dtype=np.float64),
+        'close': hist['Close'].to_numpy(dtype=np.float64),
+        'volume': hist['Volume'].fillna(0).to_numpy(dtype=np.int64)
+    }
+
+
+def history_records(hist):
+    """Convert OHLCV bars to the row-per-bar format the frontend charts use."""
+    columns = history_columns(hist)
+    return [
+        {'time': time, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+        for time, o, h, l, c, v in zip(
+            columns['time'],
+            columns['open'].tolist(),
+            columns['high'].tolist(),
+            columns['low'].tolist(),
+            columns['close'].tolist(),
+            columns['volume'].tolist()
+        )
+    ]
+
+
+def serialize_history(hist, history_format='records'):
+    """Serialize bars as 'records' (list of dicts) or 'columnar' (dict of arrays)."""
+    if history_format == 'columnar':
+        return history_columns(hist)
+    return history_records(hist)
+
+
+def _default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _finite(value):
+    # NaN and infinities become null, as orjson encodes them; the standard library would emit bare NaN
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, (np.ndarray, np.generic)):
+        return _finite(value.tolist())
+    return value
+
+
+def dumps(payload):
+    """Encode a payload to JSON bytes, serializing NumPy arrays natively and NaN as null."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY, default=_default)
+    return json.dumps(_finite(payload), default=_default, separators=(',', ':'), allow_nan=False).encode()
@@ -0,0 +1,92 @@
+"""
+Production launcher for the StockTime backend
+
+Starts the ASGI app under uvicorn with several worker processes, and runs a
+single reconciliation worker, retention worker and (with --ingest) bar
+ingest worker in the launcher process so workers do not duplicate them:
+
+    python serve.py --workers 4 --port 5000
+"""
+import argparse
+import logging
+import os
+import shutil
+
+import uvicorn
+
+from bar_store import BarStore
+from ingest import IngestWorker, Ingestor, parse_tickers
+from logs import configure_logging
+from market_data import MarketDataCache
+from markets import universe
+from metrics import REGISTRY
+from reconcile import ReconciliationWorker
+from retention import RetentionWorker, parse_retention
+from shared_cache import DEFAULT_SHARED_CACHE_DIR, SharedBarCache
+from storage import DATA_DIR, DB_PATH, Database
+
+
+def main():
+    default_shared_cache = str(DEFAULT_SHARED_CACHE_DIR) if DEFAULT_SHARED_CACHE_DIR.parent.is_dir() else ''
+    default_metrics_dir = str(DEFAULT_SHARED_CACHE_DIR.parent / 'stocktime-metrics'
+                              if DEFAULT_SHARED_CACHE_DIR.parent.is_dir() else DATA_DIR / 'metrics')
+    parser = argparse.ArgumentParser(description='Serve the StockTime backend')
+    parser.add_argument('--host', default=os.environ.get('HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)),
+                        help='Number of worker processes')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WSGI_THREADS', 32)),
+                        help='Request threads per worker process')
+    parser.add_argument('--reconcile-interval', type=int, default=int(os.environ.get('RECONCILE_INTERVAL', 60)),
+                        help='Seconds between reconciliation passes (0 disables)')
+    parser.add_argument('--retention-interval', type=int, default=int(os.environ.get('RETENTION_INTERVAL', 3600)),
+                        help='Seconds between prediction retention passes (0 disables)')
+    parser.add_argument('--retention', default=os.environ.get('PREDICTION_RETENTION'),
+                        help="Per-timeframe days to keep, e.g. '5min=3,1h=30'")
+    parser.add_argument('--archive', default=os.environ.get('PREDICTION_ARCHIVE'),
+                        help='Keep expired predictions in this SQLite file')
+    parser.add_argument('--ingest', action='store_true', default=os.environ.get('INGEST_ENABLED') == '1',
+                        help='Keep the bar store warm for the futures, crypto and stock universes')
+    parser.add_argument('--ingest-stocks', default=os.environ.get('INGEST_STOCKS'),
+                        help='Comma-separated stock tickers to ingest, defaults to the /markets examples')
+    parser.add_argument('--shared-cache', default=os.environ.get('SHARED_CACHE_DIR', default_shared_cache),
+                        help="Directory for market data shared by the workers, ideally on tmpfs ('' disables)")
+    parser.add_argument('--shared-cache-mb', type=int, default=int(os.environ.get('SHARED_CACHE_MAX_MB', 256)),
+                        help='Memory cap of the shared market data cache')
+    parser.add_argument('--metrics-dir', default=os.environ.get('METRICS_DIR', default_metrics_dir),
+                        help='Directory where the processes share metrics, so /metrics reports their totals')
+    args = parser.parse_args()
+    configure_logging()
+
+    db = Database(DB_PATH)
+    db.migrate()
+
+    # Workers inherit the environment: their thread count and the shared cache they all attach to
+    os.environ['WSGI_THREADS'] = str(args.threads)
+    os.environ['SHARED_CACHE_DIR'] = args.shared_cache
+    os.environ['SHARED_CACHE_MAX_MB'] = str(args.shared_cache_mb)
+    # Snapshots of a previous run would otherwise be added to this one's totals
+    shutil.rmtree(args.metrics_dir, ignore_errors=True)
+    os.environ['METRICS_DIR'] = args.metrics_dir
+    # The launcher's background workers report through the same directory
+    REGISTRY.share(args.metrics_dir)
+    shared_cache = SharedBarCache(args.shared_cache, args.shared_cache_mb * 1024 * 1024) if args.shared_cache else None
+
+    bar_store = BarStore(os.environ.get('BAR_STORE_DIR', DATA_DIR / 'bars'))
+    if args.reconcile_interval > 0:
+        market_data = MarketDataCache(DATA_DIR / 'market_cache', bar_store=bar_store, shared_cache=shared_cache)
+        ReconciliationWorker(db, market_data, interval=args.reconcile_interval).start()
+    if args.retention_interval > 0:
+        RetentionWorker(db, interval=args.retention_interval, ttls=parse_retention(args.retention),
+                        archive_path=args.archive).start()
+    if args.ingest:
+        IngestWorker(Ingestor(bar_store), universe(parse_tickers(args.ingest_stocks))).start()
+
+    logging.getLogger(__name__).info('Serving StockTime on http://%s:%d with %d workers of %d threads',
+                                     args.host, args.port, args.workers, args.threads)
+    uvicorn.run('asgi:application', host=args.host, port=args.port, workers=args.workers,
+                app_dir=os.path.dirname(os.path.abspath(__file__)))
+
+
+if __name__ == '__main__':
+    main()
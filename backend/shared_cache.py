@@ -0,0 +1,173 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bar_store import COLUMNS, columns_frame, frame_columns
+from market_data import empty_bars
+
+logger = logging.getLogger(__name__)
+
+# tmpfs on Linux: pages live in RAM and are shared by every process that maps them
+DEFAULT_SHARED_CACHE_DIR = Path('/dev/shm/stocktime')
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class SharedBarCache:
+    """
+    Market data cache entries shared by every worker process on a host
+
+    Each entry is a directory of ``.npy`` columns under ``root`` (a tmpfs
+    such as /dev/shm), listed in ``index.json`` with its metadata. Readers
+    memory-map the columns, so all workers share one copy of the bars in
+    RAM, and entries survive worker restarts. Writers build a new directory
+    and swap it into the index under an exclusive flock; once the entries
+    add up to more than ``max_bytes``, the least recently read ones (by
+    directory mtime) are evicted.
+    """
+
+    def __init__(self, root=DEFAULT_SHARED_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._index_path = self.root / 'index.json'
+        self._index_stamp = None
+        self._index = {}
+
+    @staticmethod
+    def _name(key):
+        ticker, interval = key
+        return f"{interval}/{ticker}"
+
+    @contextmanager
+    def _locked(self):
+        with open(self.root / '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self):
+        # The index is replaced atomically; only parse it again after it changed
+        try:
+            stat = self._index_path.stat()
+        except FileNotFoundError:
+            return {}
+        stamp = (stat.st_mtime_ns, stat.st_ino)
+        if stamp != self._index_stamp:
+            try:
+                self._index = json.loads(self._index_path.read_text())
+            except FileNotFoundError:
+                return {}
+            self._index_stamp = stamp
+        return self._index
+
+    def _write_index(self, index):
+        tmp_path = self._index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(index))
+        os.replace(tmp_path, self._index_path)
+
+    def fetched_at(self, key):
+        """Return when the shared entry for ``key`` was fetched, or None if there is none."""
+        meta = self._read_index().get(self._name(key))
+        return meta['fetched_at'] if meta else None
+
+    def get(self, key):
+        """
+        Return the shared entry for a (ticker, interval) key
+
+        Returns:
+            dict: Entry with 'bars' backed by read-only memory maps, or None
+        """
+        meta = self._read_index().get(self._name(key))
+        if meta is None:
+            return None
+        path = self.root / meta['dir']
+        try:
+            if meta['rows']:
+                columns = {name: np.load(path / f"{name}.npy", mmap_mode='r') for name in COLUMNS}
+                bars = columns_frame(columns, meta['tz'], copy=False)
+            else:
+                bars = empty_bars()
+            # Reads refresh the mtime that eviction orders by
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted or replaced by another worker since the index was read
+            return None
+        return {
+            'bars': bars,
+            'period': meta['period'],
+            'start': pd.Timestamp(meta['start']),
+            'fetched_at': meta['fetched_at']
+        }
+
+    def put(self, key, entry):
+        """Publish an entry to every worker, replacing the previous one for ``key``."""
+        bars = entry['bars']
+        entry_dir = uuid.uuid4().hex
+        tmp_dir = self.root / f".tmp-{entry_dir}"
+        tmp_dir.mkdir()
+        size = 0
+        if not bars.empty:
+            for name, values in frame_columns(bars).items():
+                np.save(tmp_dir / f"{name}.npy", values)
+                size += values.nbytes
+        os.rename(tmp_dir, self.root / entry_dir)
+
+        with self._locked():
+            index = dict(self._read_index())
+            previous = index.get(self._name(key))
+            index[self._name(key)] = {
+                'dir': entry_dir,
+                'rows': len(bars),
+                'bytes': size,
+                'tz': str(bars.index.tz) if bars.index.tz is not None else None,
+                'period': entry['period'],
+                'start': str(entry['start']),
+                'fetched_at': entry['fetched_at']
+            }
+            removed = [previous['dir']] if previous else []
+            removed += self._evict(index, keep=self._name(key))
+            self._write_index(index)
+        for name in removed:
+            # Workers that still map the old files keep them alive until they drop them
+            shutil.rmtree(self.root / name, ignore_errors=True)
+
+    def _evict(self, index, keep):
+        total = sum(meta['bytes'] for meta in index.values())
+        if total <= self.max_bytes:
+            return []
+
+        def last_used(name):
+            try:
+                return (self.root / index[name]['dir']).stat().st_mtime
+            except FileNotFoundError:
+                return 0
+
+        evicted = []
+        for name in sorted((name for name in index if name != keep), key=last_used):
+            if total <= self.max_bytes:
+                break
+            meta = index.pop(name)
+            total -= meta['bytes']
+            evicted.append(meta['dir'])
+        if evicted:
+            logger.debug('Evicted %d shared cache entries', len(evicted))
+        return evicted
+
+    def clear(self):
+        """Drop every shared entry."""
+        with self._locked():
+            index = self._read_index()
+            self._write_index({})
+        for meta in index.values():
+            shutil.rmtree(self.root / meta['dir'], ignore_errors=True)
@@ -0,0 +1,107 @@
+import threading
+import time
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution
+
+    The first caller for a key runs the function; callers that arrive while
+    it is in flight wait for it and receive the same result or exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class BarCache:
+    """
+    Results reused until the bar they were computed for closes
+
+    Lookups that miss are computed through a SingleFlight, so a burst of
+    identical requests costs one computation. Failed computations are not
+    cached.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _purge(self, now):
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        # Still full: drop the entries closest to expiry
+        overflow = len(self._entries) - self.max_entries + 1
+        if overflow > 0:
+            for key, _ in sorted(self._entries.items(), key=lambda item: item[1][0])[:overflow]:
+                del self._entries[key]
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
+        return None
+
+    def get_or_compute(self, key, fn, expires_at):
+        """
+        Return the cached value for a key, computing it at most once concurrently
+
+        Args:
+            key (hashable): Cache key; should include the bar start time
+            fn (callable): Computes the value on a miss
+            expires_at (float): Epoch seconds after which the value is stale
+
+        Returns:
+            tuple: (value, hit) where hit is False for the caller that computed it
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+
+        computed = []
+
+        def compute():
+            result = fn()
+            with self._lock:
+                self._purge(time.time())
+                self._entries[key] = (expires_at, result)
+            computed.append(True)
+            return result
+
+        return self._flight.do(key, compute), not computed
@@ -0,0 +1,311 @@
+import base64
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from metrics import DB_WRITE_SECONDS
+
+# Everything the backend writes lives here unless overridden (caches, bars, profiles, the database)
+DATA_DIR = Path(os.environ.get('STOCKTIME_DATA_DIR', Path(__file__).parent / 'data'))
+DB_PATH = Path(os.environ.get('PREDICTIONS_DB', DATA_DIR / 'predictions.db'))
+
+# Applied to every pooled connection
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',       # readers no longer block the writer
+    'PRAGMA synchronous = NORMAL',     # durable at checkpoints, safe with WAL
+    'PRAGMA busy_timeout = 5000',      # wait for the write lock instead of failing
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -16000',      # 16 MB page cache per connection
+    'PRAGMA mmap_size = 268435456'     # 256 MB memory-mapped reads
+)
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version.
+# Never edit a released migration; append a new one instead.
+MIGRATIONS = [
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            market_type TEXT NOT NULL,
+            prediction_time TIMESTAMP NOT NULL,
+            target_time TIMESTAMP NOT NULL,
+            predicted_price REAL NOT NULL,
+            actual_price REAL,
+            error_percentage REAL,
+            timeframe TEXT NOT NULL DEFAULT '1d',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Matches the /track_predictions filter and its ORDER BY
+        '''
+        CREATE INDEX IF NOT EXISTS idx_predictions_lookup
+        ON predictions (ticker, market_type, timeframe, prediction_time)
+        ''',
+        # Only unresolved rows, for the reconciliation worker
+        '''
+        CREATE INDEX IF NOT EXISTS idx_predictions_pending
+        ON predictions (target_time) WHERE actual_price IS NULL
+        '''
+    ],
+    [
+        # Forecast step of each prediction within its batch (1 = next bar)
+        'ALTER TABLE predictions ADD COLUMN horizon INTEGER',
+        '''
+        UPDATE predictions SET horizon = (
+            SELECT COUNT(*) FROM predictions AS batch
+            WHERE batch.ticker = predictions.ticker
+            AND batch.market_type = predictions.market_type
+            AND batch.timeframe = predictions.timeframe
+            AND batch.prediction_time = predictions.prediction_time
+            AND batch.target_time <= predictions.target_time
+        )
+        ''',
+        # Covers the lookup filter plus everything the statistics aggregate, so they never touch the table
+        'DROP INDEX IF EXISTS idx_predictions_lookup',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_predictions_covering
+        ON predictions (ticker, market_type, timeframe, prediction_time, horizon, error_percentage)
+        '''
+    ],
+    [
+        # Daily accuracy of predictions that aged out of the predictions table.
+        # Sums rather than averages, so repeated rollups of the same day add up.
+        '''
+        CREATE TABLE IF NOT EXISTS prediction_daily_errors (
+            day TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            market_type TEXT NOT NULL,
+            timeframe TEXT NOT NULL,
+            horizon INTEGER NOT NULL DEFAULT 0,
+            total_predictions INTEGER NOT NULL,
+            completed_predictions INTEGER NOT NULL,
+            error_sum REAL NOT NULL DEFAULT 0,
+            max_error REAL,
+            min_error REAL,
+            within_1_percent INTEGER NOT NULL DEFAULT 0,
+            within_5_percent INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (ticker, market_type, timeframe, day, horizon)
+        ) WITHOUT ROWID
+        ''',
+        # Lets retention find expired rows per timeframe without a full scan
+        '''
+        CREATE INDEX IF NOT EXISTS idx_predictions_age
+        ON predictions (timeframe, prediction_time)
+        '''
+    ],
+    [
+        # Engine that made each prediction; earlier rows all came from the random walk
+        "ALTER TABLE predictions ADD COLUMN engine TEXT NOT NULL DEFAULT 'random_walk'"
+    ]
+]
+
+PREDICTION_COLUMNS = ('ticker', 'market_type', 'prediction_time', 'target_time', 'predicted_price', 'timeframe',
+                      'horizon', 'engine')
+
+# Columns /track_predictions returns for each prediction
+TRACKING_COLUMNS = ('id', 'ticker', 'market_type', 'prediction_time', 'target_time', 'predicted_price', 'actual_price',
+                    'error_percentage', 'timeframe', 'horizon', 'engine')
+
+# Columns prediction statistics can be broken down by
+STATISTICS_GROUPS = ('ticker', 'market_type', 'timeframe', 'horizon')
+
+
+class Database:
+    """
+    SQLite access with one pooled connection per thread
+
+    Connections run in WAL mode so concurrent readers never wait on a writer,
+    and the schema is brought up to date with non-destructive migrations.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+    def connection(self):
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            for pragma in PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in a write transaction, committing on success."""
+        conn = self.connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def migrate(self):
+        """Apply pending migrations; safe to call on every startup."""
+        with self.transaction() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {number}')
+
+    def reset(self):
+        """Drop all prediction data and recreate the schema."""
+        with self.transaction() as conn:
+            conn.execute('DROP TABLE IF EXISTS predictions')
+            conn.execute('DROP TABLE IF EXISTS prediction_daily_errors')
+            conn.execute('PRAGMA user_version = 0')
+        self.migrate()
+
+    def insert_predictions(self, rows, unless_since=None):
+        """
+        Bulk insert prediction rows in a single transaction
+
+        Args:
+            rows (list): Tuples ordered as PREDICTION_COLUMNS
+            unless_since (datetime, optional): Insert nothing if the ticker, market type,
+                timeframe and engine of the first row already have predictions made at or
+                after this time; checked in the same transaction, so concurrent writers agree
+
+        Returns:
+            bool: Whether the rows were inserted
+        """
+        with DB_WRITE_SECONDS.time(operation='insert_predictions'), self.transaction() as conn:
+            if unless_since is not None and rows:
+                first = dict(zip(PREDICTION_COLUMNS, rows[0]))
+                existing = conn.execute('''
+                    SELECT 1 FROM predictions
+                    WHERE ticker = ? AND market_type = ? AND timeframe = ? AND engine = ? AND prediction_time >= ?
+                    LIMIT 1
+                ''', (first['ticker'], first['market_type'], first['timeframe'], first['engine'],
+                      unless_since)).fetchone()
+                if existing is not None:
+                    return False
+            conn.executemany(f'''
+                INSERT INTO predictions ({', '.join(PREDICTION_COLUMNS)})
+                VALUES ({', '.join('?' for _ in PREDICTION_COLUMNS)})
+            ''', rows)
+        return True
+
+    @staticmethod
+    def _filters(ticker=None, market_type=None, timeframe=None, since=None):
+        clauses, params = [], []
+        for column, value in (('ticker', ticker), ('market_type', market_type), ('timeframe', timeframe)):
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if since is not None:
+            clauses.append('prediction_time > ?')
+            params.append(since)
+        return clauses, params
+
+    def prediction_statistics(self, ticker=None, market_type=None, timeframe=None, since=None, group_by=()):
+        """
+        Accuracy statistics aggregated in SQLite
+
+        Args:
+            ticker, market_type, timeframe (str, optional): Filters
+            since (datetime, optional): Only predictions made after this time
+            group_by (sequence): Columns from STATISTICS_GROUPS to break down by
+
+        Returns:
+            dict, or a list of dicts with the group columns when ``group_by``
+            is given. Errors are absolute percentages; accuracy is the share
+            of completed predictions within 1% and 5%.
+        """
+        unknown = set(group_by) - set(STATISTICS_GROUPS)
+        if unknown:
+            raise ValueError(f"Cannot group statistics by {', '.join(sorted(unknown))}")
+        clauses, params = self._filters(ticker, market_type, timeframe, since)
+        groups = ', '.join(group_by)
+        rows = self.connection().execute(f'''
+            SELECT {groups + ',' if groups else ''}
+                COUNT(*),
+                COUNT(error_percentage),
+                AVG(ABS(error_percentage)),
+                MAX(ABS(error_percentage)),
+                MIN(ABS(error_percentage)),
+                SUM(ABS(error_percentage) <= 1),
+                SUM(ABS(error_percentage) <= 5)
+            FROM predictions
+            {'WHERE ' + ' AND '.join(clauses) if clauses else ''}
+            {f'GROUP BY {groups} ORDER BY {groups}' if groups else ''}
+        ''', params).fetchall()
+
+        statistics = []
+        for row in rows:
+            keys = dict(zip(group_by, row))
+            total, completed, average, largest, smallest, within_1, within_5 = row[len(group_by):]
+            statistics.append(dict(keys, **{
+                'total_predictions': total,
+                'completed_predictions': completed,
+                'average_error': average,
+                'max_error': largest,
+                'min_error': smallest,
+                'accuracy_within_1_percent': within_1 / completed * 100 if completed else 0,
+                'accuracy_within_5_percent': within_5 / completed * 100 if completed else 0
+            }))
+        return statistics if group_by else statistics[0]
+
+    def prediction_page(self, ticker, market_type, timeframe, since=None, limit=500, cursor=None):
+        """
+        One page of predictions, newest first, with keyset pagination
+
+        Args:
+            ticker, market_type, timeframe (str): Filters
+            since (datetime, optional): Only predictions made after this time
+            limit (int): Page size, at least 1
+            cursor (str, optional): ``next_cursor`` of the previous page
+
+        Returns:
+            tuple: (rows as dicts keyed by TRACKING_COLUMNS, next_cursor or
+            None on the last page)
+        """
+        if limit < 1:
+            # SQLite reads a negative LIMIT as no limit at all
+            raise ValueError('Page size must be at least 1')
+        clauses, params = self._filters(ticker, market_type, timeframe, since)
+        if cursor is not None:
+            prediction_time, last_id = _decode_cursor(cursor)
+            clauses.append('(prediction_time < ? OR (prediction_time = ? AND id < ?))')
+            params.extend([prediction_time, prediction_time, last_id])
+        rows = self.connection().execute(f'''
+            SELECT {', '.join(TRACKING_COLUMNS)} FROM predictions
+            WHERE {' AND '.join(clauses)}
+            ORDER BY prediction_time DESC, id DESC
+            LIMIT ?
+        ''', params + [limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = dict(zip(TRACKING_COLUMNS, rows[-1]))
+            next_cursor = _encode_cursor(last['prediction_time'], last['id'])
+        return [dict(zip(TRACKING_COLUMNS, row)) for row in rows], next_cursor
+
+
+def _encode_cursor(prediction_time, row_id):
+    return base64.urlsafe_b64encode(f'{prediction_time}|{row_id}'.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        prediction_time, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit('|', 1)
+        return prediction_time, int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor '{cursor}'") from e
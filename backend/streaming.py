@@ -0,0 +1,159 @@
+import logging
+import queue
+import threading
+import time
+
+from market_data import CACHE_TTLS, timeframe_interval
+from serialization import dumps, history_records
+
+logger = logging.getLogger(__name__)
+
+
+class TooManySubscribers(RuntimeError):
+    """Raised when a process already streams to its maximum number of clients."""
+
+
+class Subscription:
+    """
+    A client's bounded event queue
+
+    When a slow client lets the queue fill up, the oldest event is dropped
+    so the poller never blocks on it.
+    """
+
+    def __init__(self, key, max_events=100):
+        self.key = key
+        self.events = queue.Queue(maxsize=max_events)
+        self.dropped = 0
+
+    def push(self, event):
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        return self.events.get(timeout=timeout)
+
+
+def format_sse(event, data):
+    """Encode one Server-Sent Events message."""
+    return b'event: ' + event.encode() + b'\ndata: ' + dumps(data) + b'\n\n'
+
+
+class StreamHub:
+    """
+    Fan out live bar and prediction updates to subscribers
+
+    A single poller thread refreshes every subscribed (ticker, market_type,
+    timeframe) through the market data cache once per cache TTL, no matter
+    how many clients watch it, and pushes only what changed: bars newer than
+    the last one sent, the forming bar when it moves, and a fresh
+    prediction when a bar closes.
+
+    Every open stream holds a request thread, so at most
+    ``max_subscribers`` clients are accepted per process.
+    """
+
+    def __init__(self, market_data, predict_fn, max_events=100, tick=1.0, max_subscribers=None):
+        self.market_data = market_data
+        self.predict_fn = predict_fn
+        self.max_events = max_events
+        self.tick = tick
+        self.max_subscribers = max_subscribers
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._state = {}
+        self._poller = None
+
+    def subscribe(self, ticker, market_type, timeframe):
+        key = (ticker, market_type, timeframe)
+        subscription = Subscription(key, self.max_events)
+        with self._lock:
+            if (self.max_subscribers is not None
+                    and sum(map(len, self._subscribers.values())) >= self.max_subscribers):
+                raise TooManySubscribers(f"Already streaming to {self.max_subscribers} clients")
+            self._subscribers.setdefault(key, set()).add(subscription)
+            self._state.setdefault(key, {'last_time': None, 'last_close': None, 'next_poll': 0})
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._run, name='stream-poller', daemon=True)
+                self._poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.key]
+                    del self._state[subscription.key]
+
+    def _broadcast(self, key, event, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        message = format_sse(event, data)
+        for subscription in subscribers:
+            subscription.push(message)
+
+    def poll(self, key):
+        """Fetch one key and push whatever changed since the last poll."""
+        ticker, market_type, timeframe = key
+        state = self._state.get(key)
+        if state is None:
+            return
+        interval, period = timeframe_interval(timeframe)
+        hist = self.market_data.get_history(ticker, interval, period)
+        if hist.empty:
+            return
+
+        last_time = hist.index[-1]
+        last_close = float(hist['Close'].iloc[-1])
+        if state['last_time'] is None:
+            # First poll only establishes the baseline; clients load history from /predict
+            state.update(last_time=last_time, last_close=last_close)
+            return
+
+        updates = hist[hist.index >= state['last_time']]
+        if last_time == state['last_time']:
+            if last_close != state['last_close']:
+                self._broadcast(key, 'bar', {'bars': history_records(updates)})
+        else:
+            self._broadcast(key, 'bar', {'bars': history_records(updates)})
+            # A bar closed: publish the forecast made from it
+            self._broadcast(key, 'prediction', self.predict_fn(ticker, market_type, timeframe))
+        state.update(last_time=last_time, last_close=last_close)
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick)
+            now = time.time()
+            with self._lock:
+                due = [key for key, state in self._state.items() if state['next_poll'] <= now]
+            for key in due:
+                interval, _ = timeframe_interval(key[2])
+                try:
+                    self.poll(key)
+                except Exception:
+                    logger.exception('Error polling stream', extra={'stream': '/'.join(key)})
+                with self._lock:
+                    if key in self._state:
+                        self._state[key]['next_poll'] = now + CACHE_TTLS.get(interval, CACHE_TTLS['1d'])
+
+    def events(self, subscription, heartbeat=15):
+        """Yield encoded SSE messages for a subscription until the client disconnects."""
+        try:
+            yield b'retry: 5000\n\n'
+            while True:
+                try:
+                    yield subscription.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield b': keepalive\n\n'
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,186 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+TRACKED = {'ticker': 'AAPL', 'marketType': 'stocks', 'timeframe': '1d'}
+
+
+def _track(backend, count):
+    now = datetime.now()
+    backend.db.insert_predictions([
+        ('AAPL', 'stocks', now - timedelta(minutes=i), now + timedelta(days=1), 100.0 + i, '1d', 1, 'random_walk')
+        for i in range(count)
+    ])
+
+
+def test_track_predictions_pages_through_every_row_once(backend, client):
+    _track(backend, 7)
+
+    seen, cursor = [], None
+    while True:
+        query = dict(TRACKED, limit=3, **({'cursor': cursor} if cursor else {}))
+        body = client.get('/track_predictions', query_string=query).get_json()
+        seen += [prediction['id'] for prediction in body['predictions']]
+        assert body['statistics']['total_predictions'] == 7
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    # Newest first, and each inserted row is a minute older than the one before
+    assert seen == list(range(1, 8))
+
+
+@pytest.mark.parametrize('limit, page', [('0', 1), ('-5', 1), ('100000', 7)])
+def test_track_predictions_clamps_the_page_size(backend, client, limit, page):
+    _track(backend, 7)
+
+    response = client.get('/track_predictions', query_string=dict(TRACKED, limit=limit))
+
+    assert response.status_code == 200
+    assert len(response.get_json()['predictions']) == page
+
+
+@pytest.mark.parametrize('query', [{'limit': 'ten'}, {'days': '1.5'}, {'cursor': 'not-a-cursor'}])
+def test_track_predictions_rejects_malformed_parameters(client, query):
+    response = client.get('/track_predictions', query_string=dict(TRACKED, **query))
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+PREDICT = {'ticker': 'BTC', 'marketType': 'crypto', 'timeframe': '1h'}
+
+
+def test_predict_sets_etag_and_cache_control(client):
+    response = client.get('/predict', query_string=PREDICT)
+
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.cache_control.max_age is not None
+    assert 0 <= response.cache_control.max_age <= 3600
+
+
+def test_predict_answers_a_matching_if_none_match_with_304(client):
+    etag = client.get('/predict', query_string=PREDICT).headers['ETag']
+
+    response = client.get('/predict', query_string=PREDICT, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert client.get('/predict', query_string=PREDICT, headers={'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_every_worker_forecasts_and_stores_the_same_median(backend, client, monkeypatch):
+    from singleflight import BarCache
+
+    first = client.get('/predict', query_string=PREDICT)
+    # Another worker: same database and bars, empty caches
+    monkeypatch.setattr(backend, 'prediction_cache', BarCache())
+    monkeypatch.setattr(backend, 'response_cache', BarCache())
+    second = client.get('/predict', query_string=PREDICT)
+
+    assert second.headers['ETag'] == first.headers['ETag']
+    stored = backend.db.connection().execute('SELECT predicted_price FROM predictions ORDER BY horizon').fetchall()
+    assert [price for price, in stored] == first.get_json()['predictions']
+
+
+@pytest.mark.parametrize('query', [{'quantiles': 'abc'}, {'quantiles': '0.1,1.5'}, {'seed': 'x'}, {'seed': '1.5'}])
+def test_predict_rejects_malformed_options(client, query):
+    response = client.get('/predict', query_string=dict(PREDICT, **query))
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+BATCH = {'requests': [{'ticker': 'BTC', 'marketType': 'crypto', 'timeframe': '1h'},
+                      {'ticker': 'ETH', 'marketType': 'crypto', 'timeframe': '1h'}]}
+
+
+def _stored_tickers(backend):
+    return backend.db.connection().execute('SELECT DISTINCT ticker FROM predictions ORDER BY ticker').fetchall()
+
+
+def test_predict_batch_stores_each_ticker_once_per_bar(backend, client):
+    lines = [json.loads(line) for line in client.post('/predict/batch', json=BATCH).data.splitlines()]
+
+    assert [line['ticker'] for line in lines[:-1]] == ['BTC-USD', 'ETH-USD']
+    assert lines[-1] == {'done': True, 'stored_predictions': sum(len(line['predictions']) for line in lines[:-1])}
+    assert _stored_tickers(backend) == [('BTC-USD',), ('ETH-USD',)]
+
+    again = [json.loads(line) for line in client.post('/predict/batch', json=BATCH).data.splitlines()]
+    assert again[-1] == {'done': True, 'stored_predictions': 0}
+    assert [line['predictions'] for line in again[:-1]] == [line['predictions'] for line in lines[:-1]]
+
+
+def test_predict_batch_keeps_the_rows_sent_before_a_disconnect(backend, client):
+    response = client.post('/predict/batch', json=BATCH, buffered=False)
+    first = json.loads(next(iter(response.response)))
+    response.close()
+
+    assert first['ticker'] == 'BTC-USD'
+    assert _stored_tickers(backend) == [('BTC-USD',)]
+
+
+@pytest.mark.parametrize('body', [{'requests': ['BTC']}, {'requests': [None]}, {'requests': [{'ticker': 5}]},
+                                  {'requests': [{'marketType': 'crypto'}]}, {'requests': 'BTC'}, {'requests': 3}])
+def test_predict_batch_rejects_malformed_requests(backend, client, body):
+    response = client.post('/predict/batch', json=body)
+
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+    assert _stored_tickers(backend) == []
+
+
+def _warmup(*steps):
+    from warmup import Warmup
+
+    warmup = Warmup(steps)
+    warmup.start()
+    warmup.join(timeout=5)
+    return warmup
+
+
+def test_healthz_reports_ready(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'warmup', _warmup(('market_data_provider', lambda: None)))
+
+    response = client.get('/healthz')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['ready'] is True
+    assert body['database'] == 'ok'
+    assert body['steps'] == {'market_data_provider': 'done'}
+    assert body['errors'] == {}
+
+
+def test_healthz_reports_an_unreadable_database(backend, client, monkeypatch, tmp_path):
+    from storage import Database
+
+    corrupt = tmp_path / 'corrupt.db'
+    corrupt.write_bytes(b'not a database' * 512)
+    monkeypatch.setattr(backend, 'warmup', _warmup(('market_data_provider', lambda: None)))
+    monkeypatch.setattr(backend, 'db', Database(corrupt))
+
+    response = client.get('/healthz')
+
+    assert response.status_code == 503
+    body = response.get_json()
+    assert body['ready'] is False
+    assert 'not a database' in body['database']
+
+
+def test_healthz_reports_a_failed_warmup_step(backend, client, monkeypatch):
+    def fail():
+        raise ImportError('No module named yfinance')
+
+    monkeypatch.setattr(backend, 'warmup', _warmup(('market_data_provider', fail)))
+
+    response = client.get('/healthz')
+
+    assert response.status_code == 503
+    body = response.get_json()
+    assert body['ready'] is False
+    assert body['database'] == 'ok'
+    assert body['steps'] == {'market_data_provider': 'failed'}
+    assert 'yfinance' in body['errors']['market_data_provider']
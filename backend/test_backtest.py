@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from backtest import origin_windows, run_backtest
+from bar_store import BarStore
+
+
+def test_origin_windows_align_history_with_realised_prices():
+    closes = np.arange(10, dtype=float)
+
+    history, actual = origin_windows(closes, lookback=4, horizon=2, stride=2)
+
+    assert history.shape == (3, 4)
+    assert np.array_equal(history[1], [2, 3, 4, 5])
+    assert np.array_equal(actual[1], [6, 7])
+
+
+def test_flat_prices_backtest_without_error(tmp_path):
+    index = pd.date_range('2024-01-01', periods=120, freq='D', tz='UTC')
+    bars = pd.DataFrame({'Open': 50.0, 'High': 50.0, 'Low': 50.0, 'Close': 50.0, 'Volume': 1}, index=index)
+    store = BarStore(tmp_path)
+    store.append('AAA', '1d', bars)
+    store.append('BBB', '1d', bars)
+
+    report = run_backtest(tmp_path, ['AAA', 'BBB'], 'stocks', '1d', workers=1)
+
+    assert report['origins'] == 2 * (120 - 30 - 7 + 1)
+    assert report['statistics']['max_error'] == 0
+    assert report['statistics']['accuracy_within_1_percent'] == 100
+    assert len(report['by_step']) == 7
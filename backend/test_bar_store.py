@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore
+from market_data import FakeProvider, MarketDataCache
+
+
+def _bars(start, periods, freq='5min', tz='UTC'):
+    index = pd.date_range(start, periods=periods, freq=freq, tz=tz)
+    close = np.arange(periods, dtype=float) + 100
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': np.full(periods, 10)}, index=index)
+
+
+def test_range_read_spans_partitions(tmp_path):
+    store = BarStore(tmp_path)
+    store.append('AAPL', '5m', _bars('2024-01-01 23:00', 24))
+
+    columns = store.read('AAPL', '5m', start=pd.Timestamp('2024-01-01 23:30', tz='UTC'),
+                         end=pd.Timestamp('2024-01-02 00:30', tz='UTC'))
+
+    assert len(list((tmp_path / '5m' / 'AAPL').glob('2024-*'))) == 2
+    assert len(columns['time']) == 12
+    assert np.all(np.diff(columns['time']) > 0)
+
+
+def test_read_inside_one_segment_is_zero_copy(tmp_path):
+    store = BarStore(tmp_path)
+    store.append('AAPL', '5m', _bars('2024-01-01 10:00', 12))
+
+    columns = store.read('AAPL', '5m', start=pd.Timestamp('2024-01-01 10:15', tz='UTC'))
+
+    assert isinstance(columns['close'], np.memmap)
+    assert columns['close'][0] == 103
+
+
+def test_later_segments_win_and_compaction_keeps_them(tmp_path):
+    store = BarStore(tmp_path)
+    store.append('BTC-USD', '5m', _bars('2024-01-01 10:00', 6))
+    updated = _bars('2024-01-01 10:25', 3)
+    updated['Close'] += 50
+    store.append('BTC-USD', '5m', updated)
+
+    before = store.read_frame('BTC-USD', '5m')
+    assert store.compact() == 1
+    after = store.read_frame('BTC-USD', '5m')
+
+    assert len(before) == 8
+    assert before['Close'].iloc[5] == 150
+    assert after.equals(before)
+    assert len(list((tmp_path / '5m' / 'BTC-USD' / '2024-01-01').glob('seg-*'))) == 1
+
+
+def test_ingest_skips_an_unchanged_last_bar(tmp_path):
+    store = BarStore(tmp_path)
+    bars = _bars('2024-01-01 10:00', 6)
+    store.ingest('ETH-USD', '5m', bars)
+
+    assert store.ingest('ETH-USD', '5m', bars) == 0
+    assert store.ingest('ETH-USD', '5m', _bars('2024-01-01 10:00', 7)) == 2
+
+
+def test_refreshing_the_forming_bar_does_not_grow_segments(tmp_path):
+    store = BarStore(tmp_path, max_segments=4)
+    bars = _bars('2024-01-01 10:00', 6)
+    store.ingest('ETH-USD', '5m', bars)
+
+    for tick in range(50):
+        forming = bars.iloc[-1:].copy()
+        forming['Close'] += tick + 1
+        store.ingest('ETH-USD', '5m', forming)
+
+    segments = list((tmp_path / '5m' / 'ETH-USD' / '2024-01-01').glob('seg-*'))
+    assert 1 <= len(segments) <= 4
+    stored = store.read_frame('ETH-USD', '5m')
+    assert len(stored) == 6
+    assert stored['Close'].iloc[-1] == bars['Close'].iloc[-1] + 50
+
+
+def test_cache_uses_bar_store_as_cold_tier(tmp_path):
+    store = BarStore(tmp_path / 'bars')
+    provider = FakeProvider()
+    MarketDataCache(tmp_path / 'warm', provider=provider, bar_store=store).get_history('AAPL', '1h', '7d')
+
+    # A cache with an empty local tier still serves the history without a full fetch
+    cold_cache = MarketDataCache(tmp_path / 'cold', provider=provider, bar_store=store)
+    bars = cold_cache.get_history('AAPL', '1h', '7d')
+
+    assert not bars.empty
+    assert all(call[2] is None for call in provider.calls[1:])
+
+
+def test_training_reads_whole_series_not_segments(tmp_path):
+    from model.dataset import BarSeries, find_ohlcv_files, load_close_prices
+
+    store = BarStore(tmp_path / 'bars')
+    # Hourly refreshes leave many small segments, each shorter than a training window
+    for hour in range(48):
+        store.append('AAPL', '1h', _bars(pd.Timestamp('2024-01-01') + pd.Timedelta(hours=hour), 1, freq='1h'))
+
+    sources = find_ohlcv_files(tmp_path)
+
+    assert sources == [BarSeries(str(tmp_path / 'bars'), 'AAPL', '1h')]
+    assert len(load_close_prices(sources[0])) == 48
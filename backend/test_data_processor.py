@@ -0,0 +1,66 @@
+import numpy as np
+
+from model.data_processor import StockDataProcessor
+
+
+def _prices(batch=4, length=100):
+    rng = np.random.default_rng(3)
+    return 100 + np.cumsum(rng.normal(0, 1, (batch, length)), axis=1)
+
+
+def test_normalize_batch_inverts_exactly():
+    processor = StockDataProcessor()
+    prices = _prices()
+    prices[1] = 42.0  # A flat series only stays finite thanks to eps
+
+    normalized, stats = processor.normalize_batch(prices)
+
+    assert normalized.shape == prices.shape
+    assert stats.mean.shape == stats.std.shape == (4, 1)
+    np.testing.assert_allclose(normalized[[0, 2, 3]].mean(axis=1), 0, atol=1e-12)
+    np.testing.assert_allclose(normalized[[0, 2, 3]].std(axis=1), 1, atol=1e-6)
+    assert np.isfinite(normalized).all()
+    np.testing.assert_allclose(stats.denormalize(normalized), prices, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(processor.denormalize_prices(normalized, stats=stats), prices, rtol=0, atol=1e-9)
+
+
+def test_normalize_batch_treats_a_series_as_a_batch_of_one():
+    processor = StockDataProcessor()
+    series = _prices(batch=1)[0]
+
+    normalized, stats = processor.normalize_batch(series, eps=0.0)
+
+    assert normalized.shape == (1, 100)
+    np.testing.assert_allclose(normalized[0], processor.normalize_prices(series))
+
+
+def test_patch_view_does_not_copy():
+    processor = StockDataProcessor(patch_length=8)
+    prices = _prices(batch=2, length=50)
+
+    patches = processor.patch_view(prices)
+    overlapping = processor.patch_view(prices, stride=2)
+
+    assert patches.shape == (2, 6, 8)
+    assert np.shares_memory(patches, prices)
+    assert not patches.flags.writeable
+    np.testing.assert_array_equal(patches[1, 3], prices[1, 24:32])
+    assert overlapping.shape == (2, 22, 8)
+    np.testing.assert_array_equal(overlapping[0, 5], prices[0, 10:18])
+    assert processor.patch_view(prices[:, :5]).shape == (2, 0, 8)
+
+
+def test_patch_statistics_match_each_patch():
+    processor = StockDataProcessor(patch_length=16)
+    patches = processor.patch_view(_prices(batch=3, length=64))
+
+    stats = processor.patch_statistics(patches)
+
+    for name in ('min', 'max', 'mean', 'rate_of_change'):
+        assert stats[name].shape == (3, 4)
+    for b, p in np.ndindex(3, 4):
+        patch = patches[b, p]
+        assert stats['min'][b, p] == patch.min()
+        assert stats['max'][b, p] == patch.max()
+        np.testing.assert_allclose(stats['mean'][b, p], patch.mean())
+        np.testing.assert_allclose(stats['rate_of_change'][b, p], (patch[-1] - patch[0]) / patch[0] * 100)
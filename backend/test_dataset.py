@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+import model.dataset
+from model.dataset import PatchDataset
+
+
+def _write_series(tmp_path, count, length=80):
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"series-{i}.npy"
+        np.save(path, 100 + i + np.cumsum(np.random.default_rng(i).normal(0, 1, length)))
+        paths.append(path)
+    return paths
+
+
+def test_windows_yield_normalized_patches_and_targets(tmp_path):
+    dataset = PatchDataset(_write_series(tmp_path, 2), patch_length=16, stride=2, seed=0)
+
+    samples = list(dataset)
+
+    assert len(samples) == 2 * len(range(0, 80 - 16, 2))
+    patch, target = samples[0]
+    assert patch.shape == (16,)
+    assert patch.dtype == torch.float32
+    assert target.shape == ()
+    assert abs(float(patch.mean())) < 1e-5
+    assert abs(float(patch.std(unbiased=False)) - 1) < 1e-3
+
+
+def test_files_are_sharded_across_workers(tmp_path, monkeypatch):
+    paths = _write_series(tmp_path, 5, length=20)
+    dataset = PatchDataset(paths, patch_length=16, seed=0)
+
+    shards = []
+    for worker_id in range(2):
+        worker = SimpleNamespace(id=worker_id, num_workers=2)
+        monkeypatch.setattr(model.dataset, 'get_worker_info', lambda: worker)
+        shards.append({float(target) for _, target in dataset})
+
+    monkeypatch.setattr(model.dataset, 'get_worker_info', lambda: None)
+    everything = {float(target) for _, target in dataset}
+    assert shards[0] and shards[1]
+    assert not shards[0] & shards[1]
+    assert shards[0] | shards[1] == everything
+
+
+def test_flat_windows_are_skipped(tmp_path):
+    prices = np.r_[np.full(40, 250.0), 250.0 + np.cumsum(np.random.default_rng(1).normal(0, 1, 40))]
+    path = tmp_path / 'overnight.npy'
+    np.save(path, prices)
+
+    samples = list(PatchDataset([path], patch_length=16, seed=0))
+
+    # Windows whose patch lies entirely in the flat stretch are dropped
+    assert len(samples) == 80 - 16 - (40 - 16 + 1)
+    assert max(abs(float(target)) for _, target in samples) < 100
@@ -0,0 +1,31 @@
+import numpy as np
+
+from forecast import median_paths, monte_carlo_forecast, simulate_paths
+
+
+def test_seeded_forecasts_are_reproducible():
+    first = monte_carlo_forecast(100.0, 0.001, 0.02, 24, seed=7)
+    second = monte_carlo_forecast(100.0, 0.001, 0.02, 24, seed=7)
+
+    assert np.array_equal(first['median'], second['median'])
+    assert len(first['median']) == 24
+
+
+def test_bands_bracket_the_median():
+    forecast = monte_carlo_forecast(100.0, 0.0, 0.02, 12, quantiles=(0.05, 0.95), seed=1)
+
+    assert np.all(forecast['bands'][0.05] <= forecast['median'])
+    assert np.all(forecast['median'] <= forecast['bands'][0.95])
+
+
+def test_paths_keep_the_expected_step_return():
+    paths = simulate_paths(100.0, 0.01, 0.02, 1, num_paths=200000, seed=3)
+
+    assert abs(paths.mean() / 100.0 - 1.01) < 1e-3
+
+
+def test_closed_form_median_matches_simulation():
+    closed_form = median_paths(np.array([100.0]), np.array([0.001]), np.array([0.02]), 12)[0]
+    simulated = monte_carlo_forecast(100.0, 0.001, 0.02, 12, num_paths=200000, seed=5)['median']
+
+    assert np.allclose(closed_form, simulated, rtol=1e-3)
@@ -0,0 +1,92 @@
+import pandas as pd
+
+from bar_store import BarStore
+from ingest import Ingestor, RateLimiter, with_retries
+from market_data import FakeProvider, MarketDataCache, align_timestamps
+
+
+class FlakyProvider(FakeProvider):
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = failures
+
+    def history_many(self, tickers, interval, period):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('reset by peer')
+        return super().history_many(tickers, interval, period)
+
+
+def test_rate_limiter_spaces_calls_per_host():
+    clock = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        clock[0] += seconds
+
+    limiter = RateLimiter(rate=2, burst=1, clock=lambda: clock[0], sleep=sleep)
+    for _ in range(3):
+        limiter.acquire('a')
+    limiter.acquire('b')
+
+    assert waits == [0.5, 0.5]
+
+
+def test_retries_back_off_until_the_call_succeeds():
+    attempts = []
+    delays = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError
+        return 'bars'
+
+    assert with_retries(call, retries=3, backoff=1.0, sleep=delays.append) == 'bars'
+    assert len(delays) == 2
+    assert 0.5 <= delays[0] <= 1.0 and 1.0 <= delays[1] <= 2.0
+
+
+def test_ingest_backfills_then_fetches_only_the_missing_days(tmp_path):
+    now = pd.Timestamp('2024-06-03 12:00')
+    provider = FlakyProvider(failures=1, now=now)
+    store = BarStore(tmp_path / 'bars')
+    ingestor = Ingestor(store, provider, rate=1000, burst=10, backoff=0)
+
+    written = ingestor.run(['BTC-USD', 'ES=F'], ('1h',), now=now)
+    provider.now = now + pd.Timedelta(hours=5)
+    ingestor.run(['BTC-USD', 'ES=F'], ('1h',), now=provider.now)
+
+    assert written[('BTC-USD', '1h')] > 24 * 700
+    assert [call[2] for call in provider.calls] == ['720d', '1d']
+    assert pd.Timestamp(store.bounds('ES=F', '1h')[1], tz='UTC') > align_timestamps(now, 'UTC')
+
+
+def test_cache_serves_ingested_series_without_fetching(tmp_path):
+    now = pd.Timestamp.now().floor('h')
+    store = BarStore(tmp_path / 'bars')
+    Ingestor(store, FakeProvider(now=now), rate=1000).run(['ETH-USD'], ('1h',))
+    provider = FakeProvider(now=now)
+    cache = MarketDataCache(tmp_path / 'cache', provider=provider, bar_store=store)
+
+    bars = cache.get_history('ETH-USD', '1h', '7d')
+
+    assert len(bars) >= 24 * 6
+    assert provider.calls == []
+
+
+def test_scheduled_refreshes_leave_one_segment_per_partition(tmp_path):
+    now = pd.Timestamp('2024-06-03 12:00')
+    provider = FakeProvider(now=now)
+    store = BarStore(tmp_path / 'bars')
+    ingestor = Ingestor(store, provider, rate=1000, burst=10)
+
+    ingestor.run(['BTC-USD'], ('5m',), now=now)
+    for minute in range(1, 30):
+        provider.now = now + pd.Timedelta(minutes=minute)
+        ingestor.run(['BTC-USD'], ('5m',), now=provider.now)
+
+    partitions = [p for p in (tmp_path / 'bars' / '5m' / 'BTC-USD').iterdir() if p.is_dir()]
+    assert len(partitions) > 2
+    assert all(len(list(partition.glob('seg-*'))) == 1 for partition in partitions)
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+from market_data import FakeProvider, MarketDataCache
+
+
+def test_repeat_history_requests_are_served_from_cache(tmp_path):
+    provider = FakeProvider()
+    cache = MarketDataCache(tmp_path, provider=provider)
+
+    first = cache.get_history('AAPL', '5m', '1d')
+    second = cache.get_history('AAPL', '5m', '1d')
+
+    assert not first.empty
+    assert len(provider.calls) == 1
+    assert first.equals(second)
+
+
+def test_cache_survives_restart(tmp_path):
+    provider = FakeProvider()
+    MarketDataCache(tmp_path, provider=provider).get_history('BTC-USD', '1h', '7d')
+
+    restarted = MarketDataCache(tmp_path, provider=provider)
+    bars = restarted.get_history('BTC-USD', '1h', '7d')
+
+    assert not bars.empty
+    assert len(provider.calls) == 1
+
+
+def test_expired_entry_only_fetches_tail(tmp_path):
+    provider = FakeProvider()
+    cache = MarketDataCache(tmp_path, provider=provider, ttls={'5m': 0})
+
+    cache.get_history('ETH-USD', '5m', '1d')
+    cache.get_history('ETH-USD', '5m', '1d')
+
+    assert len(provider.calls) == 2
+    _, _, period, start, _ = provider.calls[1]
+    assert period is None
+    assert start is not None
+
+
+def test_range_inside_cached_history_needs_no_fetch(tmp_path):
+    provider = FakeProvider()
+    cache = MarketDataCache(tmp_path, provider=provider)
+    cache.get_history('ES=F', '15m', '2d')
+
+    target = datetime.now() - timedelta(hours=3)
+    bars = cache.get_range('ES=F', '15m', target - timedelta(minutes=15), target + timedelta(minutes=15))
+
+    assert len(bars) == 2
+    assert len(provider.calls) == 1
+
+
+def test_history_many_fetches_missing_tickers_in_one_call(tmp_path):
+    provider = FakeProvider()
+    cache = MarketDataCache(tmp_path, provider=provider)
+    cache.get_history('AAPL', '1h', '7d')
+
+    histories = cache.get_history_many(['AAPL', 'MSFT', 'TSLA'], '1h', '7d')
+
+    assert set(histories) == {'AAPL', 'MSFT', 'TSLA'}
+    assert all(not bars.empty for bars in histories.values())
+    assert provider.calls[-1][0] == ('MSFT', 'TSLA')
+    assert len(provider.calls) == 2
@@ -0,0 +1,67 @@
+import pytest
+
+from metrics import Registry
+
+
+def test_counters_render_with_labels_and_total_suffix():
+    registry = Registry()
+    requests = registry.counter('cache_requests', 'Cache lookups', ('result',))
+    requests.inc(result='hit')
+    requests.inc(2, result='hit')
+    requests.inc(result='miss')
+
+    text = registry.render()
+
+    assert '# TYPE cache_requests counter' in text
+    assert 'cache_requests_total{result="hit"} 3' in text
+    assert 'cache_requests_total{result="miss"} 1' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('endpoint',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, endpoint='predict')
+
+    text = registry.render()
+
+    assert 'latency_seconds_bucket{endpoint="predict",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="predict",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{endpoint="predict",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{endpoint="predict"} 3' in text
+    assert latency.count(endpoint='predict') == 3
+
+
+def test_label_values_are_escaped_and_required():
+    registry = Registry()
+    errors = registry.counter('errors', 'Errors', ('reason',))
+    errors.inc(reason='bad "quote"\n')
+
+    assert r'errors_total{reason="bad \"quote\"\n"} 1' in registry.render()
+    with pytest.raises(ValueError):
+        errors.inc(kind='other')
+
+
+def test_shared_registries_render_the_totals_of_every_process(tmp_path):
+    workers = []
+    for instance in 'ab':
+        registry = Registry()
+        registry.share(tmp_path, instance=instance, flush_interval=0)
+        workers.append((registry, registry.counter('requests', 'Requests', ('endpoint',)),
+                        registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))))
+    (first, first_requests, first_latency), (second, second_requests, second_latency) = workers
+    first_requests.inc(2, endpoint='predict')
+    first_latency.observe(0.05)
+    second_requests.inc(endpoint='predict')
+    second_requests.inc(endpoint='healthz')
+    second_latency.observe(0.5)
+    second.flush()
+
+    text = first.render()
+
+    assert 'requests_total{endpoint="predict"} 3' in text
+    assert 'requests_total{endpoint="healthz"} 1' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2' in text
+    assert 'latency_seconds_sum 0.55' in text
+    assert second.render() == text
@@ -76,6 +76,56 @@ def test_stocktime_model():
         traceback.print_exc()
         return False
 
+def _price_histories(batch=5, length=64):
+    rng = np.random.default_rng(7)
+    return 100 + np.cumsum(rng.normal(0, 1, (batch, length)), axis=1)
+
+
+def test_predict_batch_returns_one_row_per_series():
+    torch.manual_seed(0)
+    model = StockTime().eval()
+    prices = _price_histories()
+
+    predictions = model.predict_batch(prices, steps_ahead=9)
+
+    assert predictions.shape == (5, 9)
+    assert predictions.dtype == torch.float32
+    # Rows do not influence each other
+    torch.testing.assert_close(predictions[2], model.predict_batch(prices[2:3], steps_ahead=9)[0])
+
+
+def test_predict_delegates_to_predict_batch(monkeypatch):
+    model = StockTime().eval()
+    prices = _price_histories(batch=1)[0]
+    calls = []
+    predict_batch = model.predict_batch
+
+    def recording(batch, steps_ahead=7, normalize=True):
+        calls.append((np.shape(batch), steps_ahead))
+        return predict_batch(batch, steps_ahead, normalize)
+
+    monkeypatch.setattr(model, 'predict_batch', recording)
+    predictions = model.predict(prices, steps_ahead=4)
+
+    assert calls == [((1, 64), 4)]
+    torch.testing.assert_close(predictions, predict_batch(prices[None, :], 4)[0])
+
+
+def test_quantized_model_stays_close_to_fp32():
+    torch.manual_seed(0)
+    model = StockTime()
+    prices = _price_histories(batch=16)
+
+    quantized = model.optimize_for_inference(quantize=True)
+    fp32 = model.optimize_for_inference().predict_batch(prices, steps_ahead=7)
+    int8 = quantized.predict_batch(prices, steps_ahead=7)
+
+    assert isinstance(quantized.lstm, torch.ao.nn.quantized.dynamic.LSTM)
+    assert int8.shape == fp32.shape
+    # Within 5% of the output range
+    assert (int8 - fp32).abs().max() <= 0.05 * fp32.abs().max()
+
+
 if __name__ == "__main__":
     success = test_stocktime_model()
     print("\nOverall Test:", "PASSED" if success else "FAILED")
@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+
+from market_data import BAR_DURATIONS, FakeProvider, MarketDataCache, empty_bars
+from reconcile import reconcile_predictions
+from storage import Database
+
+
+class FormingBarProvider(FakeProvider):
+    """Fake provider whose bar in progress has not reached its final close yet."""
+
+    def history(self, ticker, interval, period=None, start=None, end=None):
+        bars = super().history(ticker, interval, period, start, end).copy()
+        if not bars.empty and bars.index[-1] + BAR_DURATIONS[interval] > self.now:
+            bars.iloc[-1, bars.columns.get_loc('Close')] *= 0.99
+        return bars
+
+
+class WeekdayProvider(FakeProvider):
+    """Fake provider for a market that is closed on weekends."""
+
+    def history(self, ticker, interval, period=None, start=None, end=None):
+        bars = super().history(ticker, interval, period, start, end)
+        return bars[bars.index.dayofweek < 5]
+
+
+class DelistedProvider(FakeProvider):
+    """Fake provider that has no bars for ticker 'GONE'."""
+
+    def history(self, ticker, interval, period=None, start=None, end=None):
+        if ticker == 'GONE':
+            self.calls.append((ticker, interval, period, start, end))
+            return empty_bars()
+        return super().history(ticker, interval, period, start, end)
+
+
+def _database(tmp_path, target_time, ticker='BTC-USD', timeframe='5min'):
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    db.insert_predictions([(ticker, 'crypto', target_time - timedelta(minutes=5), target_time, 150.0, timeframe, 1,
+                            'random_walk')])
+    return db
+
+
+def _stored(db):
+    return db.connection().execute('SELECT actual_price, error_percentage FROM predictions').fetchone()
+
+
+def test_forming_bar_is_left_for_a_later_pass(tmp_path):
+    target = datetime(2026, 10, 16, 10, 3, 27)
+    db = _database(tmp_path, target)
+    provider = FormingBarProvider(now=datetime(2026, 10, 16, 10, 4))
+    cache = MarketDataCache(tmp_path / 'cache', provider=provider, ttls={'5m': 0})
+
+    assert reconcile_predictions(db, cache, now=provider.now) == 0
+    assert _stored(db) == (None, None)
+
+    provider.now = datetime(2026, 10, 16, 10, 20)
+    assert reconcile_predictions(db, cache, now=provider.now) == 1
+
+    final_close = FakeProvider()._bars('BTC-USD', '5m', datetime(2026, 10, 16, 10, 5),
+                                       datetime(2026, 10, 16, 10, 10))['Close'].iloc[0]
+    actual_price, error_percentage = _stored(db)
+    assert actual_price == final_close
+    assert abs(error_percentage - (final_close - 150.0) / 150.0 * 100) < 1e-9
+
+
+def test_resolved_rows_are_not_selected_again(tmp_path):
+    target = datetime(2026, 10, 16, 10, 3, 27)
+    db = _database(tmp_path, target)
+    provider = FakeProvider(now=datetime(2026, 10, 16, 11, 0))
+    cache = MarketDataCache(tmp_path / 'cache', provider=provider)
+
+    assert reconcile_predictions(db, cache, now=provider.now) == 1
+    calls = len(provider.calls)
+
+    assert reconcile_predictions(db, cache, now=provider.now) == 0
+    assert len(provider.calls) == calls
+
+
+def test_targets_past_the_lookback_are_skipped(tmp_path):
+    target = datetime(2026, 10, 16, 10, 3, 27)
+    db = _database(tmp_path, target)
+    provider = FakeProvider(now=target + timedelta(days=31))
+    cache = MarketDataCache(tmp_path / 'cache', provider=provider)
+
+    assert reconcile_predictions(db, cache, now=provider.now, lookback_days=30) == 0
+    assert provider.calls == []
+    assert _stored(db) == (None, None)
+
+
+def test_weekend_target_resolves_to_the_last_close_once_the_market_reopens(tmp_path):
+    saturday = datetime(2026, 10, 17, 12, 0)
+    db = _database(tmp_path, saturday, ticker='AAPL', timeframe='1h')
+    provider = WeekdayProvider(now=datetime(2026, 10, 18, 20, 0))
+    cache = MarketDataCache(tmp_path / 'cache', provider=provider, ttls={'1h': 0})
+
+    assert reconcile_predictions(db, cache, now=provider.now) == 0
+    assert _stored(db) == (None, None)
+
+    provider.now = datetime(2026, 10, 19, 11, 0)
+    assert reconcile_predictions(db, cache, now=provider.now) == 1
+
+    friday_close = FakeProvider()._bars('AAPL', '1h', datetime(2026, 10, 16, 23, 0),
+                                        datetime(2026, 10, 17, 0, 0))['Close'].iloc[0]
+    assert _stored(db)[0] == friday_close
+
+
+def test_unresolvable_rows_do_not_starve_newer_ones(tmp_path):
+    target = datetime(2026, 10, 16, 10, 3, 27)
+    db = _database(tmp_path, target - timedelta(hours=1), ticker='GONE')
+    db.insert_predictions([('GONE', 'crypto', target, target + timedelta(minutes=5 * i), 150.0, '5min', i,
+                            'random_walk') for i in range(1, 4)])
+    db.insert_predictions([('BTC-USD', 'crypto', target, target + timedelta(hours=1), 150.0, '5min', 1,
+                            'random_walk')])
+    provider = DelistedProvider(now=datetime(2026, 10, 16, 12, 0))
+    cache = MarketDataCache(tmp_path / 'cache', provider=provider)
+
+    assert reconcile_predictions(db, cache, now=provider.now, batch_size=2) == 1
+
+    resolved = db.connection().execute('SELECT ticker FROM predictions WHERE actual_price IS NOT NULL').fetchall()
+    assert resolved == [('BTC-USD',)]
@@ -0,0 +1,98 @@
+import threading
+
+import numpy as np
+import pytest
+import torch
+
+from model.registry import ModelRegistry
+
+
+class RecordingModel:
+    """Stands in for StockTime: step k predicts the last normalized price plus k."""
+
+    patch_length = 4
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def predict_batch(self, windows, steps_ahead, normalize=True):
+        self.calls.append((len(windows), steps_ahead))
+        if self.error is not None:
+            raise self.error
+        return torch.from_numpy(windows[:, -1:] + np.arange(1, steps_ahead + 1, dtype=np.float32))
+
+
+def _registry(model, batch_window=0.2):
+    registry = ModelRegistry(checkpoint_path='missing.pt', batch_window=batch_window)
+    registry._model = model
+    return registry
+
+
+def _predict_concurrently(registry, requests):
+    results = [None] * len(requests)
+    barrier = threading.Barrier(len(requests))
+
+    def call(position, prices, steps_ahead):
+        barrier.wait()
+        try:
+            results[position] = registry.predict(prices, steps_ahead)
+        except Exception as e:
+            results[position] = e
+
+    threads = [threading.Thread(target=call, args=(position, *request)) for position, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _expected(registry, prices, steps_ahead):
+    windows, mean, std = registry.normalize(np.asarray(prices, dtype=np.float64)[np.newaxis, :])
+    return (windows[0, -1] + np.arange(1, steps_ahead + 1)) * std[0] + mean[0]
+
+
+def test_concurrent_predictions_share_one_batch():
+    model = RecordingModel()
+    registry = _registry(model)
+    histories = [np.linspace(100, 110 + i, 12) for i in range(6)]
+
+    results = _predict_concurrently(registry, [(prices, 5) for prices in histories])
+
+    assert model.calls == [(6, 5)]
+    for prices, result in zip(histories, results):
+        np.testing.assert_allclose(result, _expected(registry, prices, 5), rtol=1e-5)
+
+
+def test_mixed_horizons_are_sliced_per_request():
+    model = RecordingModel()
+    registry = _registry(model)
+    requests = [(np.linspace(50, 60, 12), 1), (np.linspace(10, 5, 8), 7), (np.linspace(1, 2, 3), 3)]
+
+    results = _predict_concurrently(registry, requests)
+
+    assert model.calls == [(3, 7)]
+    for (prices, steps_ahead), result in zip(requests, results):
+        assert result.shape == (steps_ahead,)
+        np.testing.assert_allclose(result, _expected(registry, prices, steps_ahead), rtol=1e-5)
+
+
+def test_a_failed_batch_fails_every_request_in_it():
+    error = RuntimeError('out of memory')
+    model = RecordingModel(error=error)
+    registry = _registry(model)
+
+    results = _predict_concurrently(registry, [(np.linspace(100, 110, 12), 7) for _ in range(4)])
+
+    assert len(model.calls) == 1
+    assert all(result is error for result in results)
+
+
+def test_empty_history_is_rejected_before_batching():
+    model = RecordingModel()
+    registry = _registry(model)
+
+    with pytest.raises(ValueError):
+        registry.predict([], 7)
+    assert model.calls == []
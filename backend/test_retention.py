@@ -0,0 +1,68 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from retention import daily_errors, expire_predictions, optimize
+from storage import Database
+
+
+def _rows(prediction_time, timeframe='5min', count=3):
+    return [
+        ('AAPL', 'stocks', prediction_time, prediction_time + timedelta(minutes=5 * (i + 1)), 100.0, timeframe, i + 1,
+         'random_walk')
+        for i in range(count)
+    ]
+
+
+def _database(tmp_path):
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    return db
+
+
+def test_expired_rows_are_rolled_up_and_removed(tmp_path):
+    db = _database(tmp_path)
+    now = datetime(2024, 6, 1, 12)
+    db.insert_predictions(_rows(now - timedelta(days=10)) + _rows(now - timedelta(hours=1)))
+    with db.transaction() as conn:
+        conn.execute('UPDATE predictions SET actual_price = 101, error_percentage = 1.0 WHERE id <= 2')
+
+    removed = expire_predictions(db, {'5min': 7}, now=now, batch_size=2)
+
+    assert removed == {'5min': 3}
+    assert db.connection().execute('SELECT COUNT(*) FROM predictions').fetchone()[0] == 3
+    days = daily_errors(db, 'AAPL', 'stocks', '5min')
+    assert len(days) == 1
+    assert days[0]['total_predictions'] == 3
+    assert days[0]['completed_predictions'] == 2
+    assert days[0]['average_error'] == 1.0
+    assert days[0]['accuracy_within_1_percent'] == 100
+
+
+def test_repeated_rollups_of_a_day_add_up(tmp_path):
+    db = _database(tmp_path)
+    now = datetime(2024, 6, 1, 12)
+    old = now - timedelta(days=10)
+    db.insert_predictions(_rows(old))
+    expire_predictions(db, {'5min': 7}, now=now)
+    db.insert_predictions(_rows(old + timedelta(minutes=1)))
+    expire_predictions(db, {'5min': 7}, now=now)
+
+    assert daily_errors(db, 'AAPL', 'stocks', '5min')[0]['total_predictions'] == 6
+
+
+def test_expired_rows_are_kept_in_the_archive(tmp_path):
+    db = _database(tmp_path)
+    now = datetime(2024, 6, 1, 12)
+    db.insert_predictions(_rows(now - timedelta(days=400), timeframe='1d'))
+
+    expire_predictions(db, now=now, archive_path=tmp_path / 'archive.db')
+
+    archived = sqlite3.connect(tmp_path / 'archive.db').execute('SELECT horizon FROM predictions').fetchall()
+    assert sorted(archived) == [(1,), (2,), (3,)]
+
+
+def test_optimize_vacuums_only_when_forced_or_fragmented(tmp_path):
+    db = _database(tmp_path)
+
+    assert not optimize(db)
+    assert optimize(db, vacuum_free_ratio=0)
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from rolling_stats import EwmaStats, ReturnStatsStore, RollingWindowStats
+
+
+def _bars(closes, start='2024-03-01'):
+    index = pd.date_range(start, periods=len(closes), freq='h')
+    return pd.DataFrame({'Close': closes}, index=index)
+
+
+def test_rolling_window_matches_full_recompute():
+    values = np.random.default_rng(0).normal(0.001, 0.02, 500)
+    stats = RollingWindowStats(lookback=100)
+    for value in values:
+        stats.add(value)
+
+    assert stats.count == 100
+    assert abs(stats.mean - values[-100:].mean()) < 1e-12
+    assert abs(stats.std - values[-100:].std(ddof=1)) < 1e-12
+
+
+def test_ewma_matches_pandas():
+    values = np.random.default_rng(1).normal(0.001, 0.02, 300)
+    stats = EwmaStats(halflife=20)
+    for value in values:
+        stats.add(value)
+
+    expected = pd.Series(values).ewm(halflife=20, adjust=False)
+    assert abs(stats.mean - expected.mean().iloc[-1]) < 1e-12
+    assert abs(stats.std - expected.std(bias=True).iloc[-1]) < 1e-12
+
+
+def test_update_consumes_only_new_closed_bars():
+    closes = 100 * np.cumprod(1 + np.random.default_rng(2).normal(0, 0.01, 60))
+    bars = _bars(closes)
+    store = ReturnStatsStore(lookbacks={'1h': 1000})
+
+    store.update('BTC-USD', '1h', bars.iloc[:30])
+    # The same bars again, with the forming bar moved, and then the rest
+    moved = bars.iloc[:30].copy()
+    moved.iloc[-1, 0] *= 1.05
+    store.update('BTC-USD', '1h', moved)
+    store.update('BTC-USD', '1h', bars)
+
+    mean, std, count = store.get('BTC-USD', '1h')
+    # Every closed bar counted once; the last bar is still forming
+    returns = pd.Series(closes[:-1]).pct_change().dropna()
+    assert count == len(returns) == 58
+    assert abs(mean - returns.mean()) < 1e-12
+    assert abs(std - returns.std()) < 1e-12
+
+
+def test_missing_closes_do_not_poison_the_statistics():
+    closes = np.array([100.0, 101.0, np.nan, 103.0, 102.0, np.inf, 104.0, 105.0])
+    store = ReturnStatsStore()
+
+    store.update('AAPL', '1h', _bars(closes[:3]))
+    store.update('AAPL', '1h', _bars(closes))
+
+    mean, std, count = store.get('AAPL', '1h')
+    # Returns span the missing closes: 100 -> 101 -> 103 -> 102 -> 104
+    finite = closes[:-1][np.isfinite(closes[:-1])]
+    returns = finite[1:] / finite[:-1] - 1
+    assert count == len(returns) == 4
+    assert abs(mean - returns.mean()) < 1e-12
+    assert abs(std - returns.std(ddof=1)) < 1e-12
@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import serialization
+from serialization import dumps, serialize_history
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    if request.param == 'json':
+        monkeypatch.setattr(serialization, 'orjson', None)
+    elif serialization.orjson is None:
+        pytest.skip('orjson is not installed')
+    return request.param
+
+
+def _bars():
+    index = pd.date_range('2024-03-01 09:30', periods=4, freq='min')
+    return pd.DataFrame({
+        'Open': [100.0, 101.0, np.nan, 103.0],
+        'High': [101.0, 102.0, np.nan, 104.0],
+        'Low': [99.0, 100.0, np.nan, 102.0],
+        'Close': [100.5, 101.5, np.nan, 103.5],
+        'Volume': [1000, 1200, np.nan, 900]
+    }, index=index)
+
+
+def test_records_and_columnar_encode_the_same_bars(encoder):
+    records = json.loads(dumps(serialize_history(_bars(), 'records')))
+    columns = json.loads(dumps(serialize_history(_bars(), 'columnar')))
+
+    assert list(columns) == ['time', 'open', 'high', 'low', 'close', 'volume']
+    assert records == [dict(zip(columns, row)) for row in zip(*columns.values())]
+    assert records[0] == {'time': '2024-03-01 09:30:00', 'open': 100.0, 'high': 101.0, 'low': 99.0,
+                          'close': 100.5, 'volume': 1000}
+    assert records[2] == {'time': '2024-03-01 09:32:00', 'open': None, 'high': None, 'low': None,
+                          'close': None, 'volume': 0}
+
+
+def test_nan_and_numpy_scalars_encode_as_standard_json(encoder):
+    payload = {
+        'price': np.float64(1.5),
+        'ratio': np.float32(0.25),
+        'count': np.int64(7),
+        'missing': float('nan'),
+        'unbounded': np.float64('inf'),
+        'bands': {'p10': np.array([1.0, np.nan]), 'p90': (2.0, np.nan)}
+    }
+
+    encoded = dumps(payload)
+
+    assert b'NaN' not in encoded and b'Infinity' not in encoded
+    assert json.loads(encoded) == {'price': 1.5, 'ratio': 0.25, 'count': 7, 'missing': None, 'unbounded': None,
+                                   'bands': {'p10': [1.0, None], 'p90': [2.0, None]}}
+
+
+def test_unknown_types_are_rejected(encoder):
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
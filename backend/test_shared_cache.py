@@ -0,0 +1,47 @@
+import numpy as np
+
+from market_data import FakeProvider, MarketDataCache
+from shared_cache import SharedBarCache
+
+
+def _worker(tmp_path, name, provider):
+    # Each worker process has its own disk cache directory but attaches to the same shared cache
+    return MarketDataCache(tmp_path / name, provider=provider, shared_cache=SharedBarCache(tmp_path / 'shm'))
+
+
+def test_workers_share_fetched_bars(tmp_path):
+    first, second = FakeProvider(), FakeProvider()
+
+    expected = _worker(tmp_path, 'a', first).get_history('AAPL', '5m', '1d')
+    bars = _worker(tmp_path, 'b', second).get_history('AAPL', '5m', '1d')
+
+    assert len(first.calls) == 1
+    assert second.calls == []
+    assert np.allclose(bars['Close'], expected['Close'])
+    assert (bars.index == expected.index).all()
+
+
+def test_newer_entries_from_other_workers_replace_local_ones(tmp_path):
+    first, second = _worker(tmp_path, 'a', FakeProvider()), _worker(tmp_path, 'b', FakeProvider())
+    first.get_history('AAPL', '1h', '2d')
+    second.get_history('AAPL', '1h', '7d')
+
+    first.provider.calls.clear()
+    bars = first.get_history('AAPL', '1h', '7d')
+
+    assert first.provider.calls == []
+    assert len(bars) >= 24 * 6
+
+
+def test_least_recently_read_entries_are_evicted_over_the_cap(tmp_path):
+    cache = MarketDataCache(tmp_path / 'cache', provider=FakeProvider())
+    cache.get_history('AAPL', '5m', '1d')
+    entry = cache._load(('AAPL', '5m'))
+    shared = SharedBarCache(tmp_path / 'shm', max_bytes=int(len(entry['bars']) * 48 * 2.5))
+
+    for ticker in ('AAPL', 'MSFT', 'TSLA'):
+        shared.put((ticker, '5m'), entry)
+
+    assert shared.get(('AAPL', '5m')) is None
+    assert shared.get(('TSLA', '5m')) is not None
+    assert len([path for path in (tmp_path / 'shm').iterdir() if path.is_dir()]) == 2
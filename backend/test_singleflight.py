@@ -0,0 +1,38 @@
+import threading
+import time
+
+from singleflight import BarCache, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'bars'
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do('BTC-USD', slow))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['bars'] * 8
+
+
+def test_bar_cache_expires_at_bar_close():
+    cache = BarCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute('key', compute, expires_at=time.time() + 60) == (1, False)
+    assert cache.get_or_compute('key', compute, expires_at=time.time() + 60) == (1, True)
+    assert cache.get_or_compute('stale', compute, expires_at=time.time() - 1) == (2, False)
+    assert cache.get_or_compute('stale', compute, expires_at=time.time() - 1) == (3, False)
@@ -0,0 +1,136 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+from storage import MIGRATIONS, Database
+
+
+def _rows(count):
+    now = datetime.now()
+    return [('AAPL', 'stocks', now, now + timedelta(days=i + 1), 100.0 + i, '1d', i + 1, 'random_walk')
+            for i in range(count)]
+
+
+def test_migrate_is_non_destructive(tmp_path):
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    db.insert_predictions(_rows(7))
+
+    db.migrate()
+
+    assert db.connection().execute('SELECT COUNT(*) FROM predictions').fetchone()[0] == 7
+
+
+def test_connections_use_wal_and_are_reused(tmp_path):
+    db = Database(tmp_path / 'predictions.db')
+
+    assert db.connection() is db.connection()
+    assert db.connection().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_reset_drops_rows(tmp_path):
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    db.insert_predictions(_rows(3))
+
+    db.reset()
+
+    assert db.connection().execute('SELECT COUNT(*) FROM predictions').fetchone()[0] == 0
+
+
+def _resolve(db, errors):
+    with db.transaction() as conn:
+        for row_id, error in errors.items():
+            conn.execute('UPDATE predictions SET actual_price = 1, error_percentage = ? WHERE id = ?', (error, row_id))
+
+
+def test_statistics_count_pending_predictions_in_the_total(tmp_path):
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    db.insert_predictions(_rows(4))
+    _resolve(db, {1: 0.5, 2: -3.0})
+
+    statistics = db.prediction_statistics(ticker='AAPL', market_type='stocks', timeframe='1d')
+
+    assert statistics['total_predictions'] == 4
+    assert statistics['completed_predictions'] == 2
+    assert statistics['average_error'] == 1.75
+    assert statistics['max_error'] == 3.0
+    assert statistics['accuracy_within_1_percent'] == 50
+    assert statistics['accuracy_within_5_percent'] == 100
+
+
+def test_statistics_break_down_by_horizon(tmp_path):
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    db.insert_predictions(_rows(3) + _rows(3))
+    _resolve(db, {1: 1.0, 4: 3.0})
+
+    by_horizon = db.prediction_statistics(ticker='AAPL', group_by=['horizon'])
+
+    assert [group['horizon'] for group in by_horizon] == [1, 2, 3]
+    assert by_horizon[0]['average_error'] == 2.0
+    assert by_horizon[1]['completed_predictions'] == 0
+
+
+def test_pages_follow_the_cursor_without_gaps(tmp_path):
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    db.insert_predictions(_rows(7))
+
+    seen, cursor = [], None
+    while True:
+        rows, cursor = db.prediction_page('AAPL', 'stocks', '1d', limit=3, cursor=cursor)
+        seen.extend(row['id'] for row in rows)
+        if cursor is None:
+            break
+
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_horizon_is_backfilled_for_existing_rows(tmp_path):
+    path = tmp_path / 'predictions.db'
+    conn = sqlite3.connect(path)
+    for statement in MIGRATIONS[0]:
+        conn.execute(statement)
+    conn.execute('PRAGMA user_version = 1')
+    conn.executemany(
+        'INSERT INTO predictions (ticker, market_type, prediction_time, target_time, predicted_price, timeframe) '
+        'VALUES (?, ?, ?, ?, ?, ?)',
+        [row[:6] for row in _rows(3)]
+    )
+    conn.commit()
+    conn.close()
+
+    db = Database(path)
+    db.migrate()
+
+    horizons = db.connection().execute('SELECT horizon FROM predictions ORDER BY target_time').fetchall()
+    assert [horizon for horizon, in horizons] == [1, 2, 3]
+
+
+def test_insert_is_skipped_when_the_bar_already_has_predictions(tmp_path):
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    rows = _rows(3)
+    bar_time = rows[0][2] - timedelta(minutes=5)
+
+    assert db.insert_predictions(rows, unless_since=bar_time)
+    assert not db.insert_predictions(_rows(3), unless_since=bar_time)
+    assert db.insert_predictions(_rows(3), unless_since=datetime.now())
+
+    assert db.connection().execute('SELECT COUNT(*) FROM predictions').fetchone()[0] == 6
+
+
+def test_other_engines_are_tracked_for_the_same_bar(tmp_path):
+    db = Database(tmp_path / 'predictions.db')
+    db.migrate()
+    rows = _rows(3)
+    bar_time = rows[0][2] - timedelta(minutes=5)
+    lstm_rows = [row[:-1] + ('lstm',) for row in _rows(3)]
+
+    assert db.insert_predictions(rows, unless_since=bar_time)
+    assert db.insert_predictions(lstm_rows, unless_since=bar_time)
+    assert not db.insert_predictions(lstm_rows, unless_since=bar_time)
+
+    engines = db.connection().execute('SELECT engine, COUNT(*) FROM predictions GROUP BY engine').fetchall()
+    assert engines == [('lstm', 3), ('random_walk', 3)]
@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from streaming import StreamHub, Subscription, TooManySubscribers
+
+KEY = ('AAPL', 'stocks', '5min')
+
+
+class StubMarketData:
+    def __init__(self):
+        self.bars = None
+
+    def set_bars(self, closes, start='2024-01-02 14:30'):
+        index = pd.date_range(start, periods=len(closes), freq='5min', tz='UTC')
+        closes = np.asarray(closes, dtype=float)
+        self.bars = pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes,
+                                  'Volume': np.full(len(closes), 100)}, index=index)
+
+    def get_history(self, ticker, interval, period):
+        return self.bars
+
+
+def _hub(market_data, **kwargs):
+    # A long tick keeps the background poller idle; the tests call poll() themselves
+    return StreamHub(market_data, lambda *key: {'predictions': [1.0]}, tick=3600, **kwargs)
+
+
+def _drain(subscription):
+    events = []
+    while not subscription.events.empty():
+        message = subscription.events.get_nowait().decode()
+        event, data = message.strip().split('\n')
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def test_full_queue_drops_the_oldest_event():
+    subscription = Subscription(KEY, max_events=2)
+
+    for event in (b'1', b'2', b'3'):
+        subscription.push(event)
+
+    assert subscription.dropped == 1
+    assert [subscription.get(timeout=0), subscription.get(timeout=0)] == [b'2', b'3']
+
+
+def test_poll_pushes_only_what_changed():
+    market_data = StubMarketData()
+    hub = _hub(market_data)
+    subscription = hub.subscribe(*KEY)
+
+    market_data.set_bars([100, 101, 102])
+    hub.poll(KEY)
+    assert _drain(subscription) == []
+
+    hub.poll(KEY)
+    assert _drain(subscription) == []
+
+    market_data.set_bars([100, 101, 102.5])
+    hub.poll(KEY)
+    [(event, data)] = _drain(subscription)
+    assert event == 'bar'
+    assert [bar['close'] for bar in data['bars']] == [102.5]
+
+    market_data.set_bars([100, 101, 102.5, 103])
+    hub.poll(KEY)
+    events = _drain(subscription)
+    assert [event for event, _ in events] == ['bar', 'prediction']
+    assert [bar['close'] for bar in events[0][1]['bars']] == [102.5, 103]
+
+
+def test_closing_the_event_stream_unsubscribes():
+    hub = _hub(StubMarketData())
+    subscription = hub.subscribe(*KEY)
+    events = hub.events(subscription, heartbeat=0.01)
+
+    assert next(events) == b'retry: 5000\n\n'
+    assert next(events) == b': keepalive\n\n'
+    events.close()
+
+    assert KEY not in hub._subscribers
+    assert KEY not in hub._state
+
+
+def test_subscribers_are_capped_per_process():
+    hub = _hub(StubMarketData(), max_subscribers=2)
+    first = hub.subscribe(*KEY)
+    hub.subscribe('BTC-USD', 'crypto', '1h')
+
+    with pytest.raises(TooManySubscribers):
+        hub.subscribe(*KEY)
+
+    hub.unsubscribe(first)
+    hub.subscribe(*KEY)
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from market_data import FakeProvider, MarketDataCache
+from tracking import resolve_actual_prices
+
+
+def test_due_predictions_resolve_with_one_fetch_per_group(tmp_path):
+    now = datetime.now().replace(second=27, microsecond=0)
+    provider = FakeProvider(now=now)
+    cache = MarketDataCache(tmp_path, provider=provider)
+
+    predictions = [
+        {'ticker': 'BTC-USD', 'timeframe': '5min', 'target_time': now - timedelta(minutes=5 * i),
+         'predicted_price': 100.0}
+        for i in range(1, 200)
+    ]
+    predictions.append({'ticker': 'BTC-USD', 'timeframe': '5min',
+                        'target_time': now + timedelta(minutes=5), 'predicted_price': 100.0})
+
+    resolved = resolve_actual_prices(predictions, cache, now=now)
+
+    assert len(provider.calls) == 1
+    # Five minutes ago matches the bar that is still forming
+    assert resolved[0] == (None, None)
+    assert all(price is not None for price, _ in resolved[1:-1])
+    assert resolved[-1] == (None, None)
+    price, error = resolved[1]
+    assert abs(error - (price - 100.0)) < 1e-9
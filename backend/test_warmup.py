@@ -0,0 +1,28 @@
+from warmup import Warmup
+
+
+def test_ready_once_every_step_finished():
+    calls = []
+    warmup = Warmup([('first', lambda: calls.append('first')), ('second', lambda: calls.append('second'))])
+
+    assert not warmup.ready
+    warmup.start()
+    warmup.join(timeout=5)
+
+    assert calls == ['first', 'second']
+    assert warmup.ready
+    assert warmup.report()['steps'] == {'first': 'done', 'second': 'done'}
+
+
+def test_failed_step_keeps_the_worker_unready():
+    def fail():
+        raise ImportError('No module named yfinance')
+
+    warmup = Warmup([('market_data_provider', fail), ('model', lambda: None)])
+    warmup.start()
+    warmup.join(timeout=5)
+
+    report = warmup.report()
+    assert not report['ready']
+    assert report['steps'] == {'market_data_provider': 'failed', 'model': 'done'}
+    assert 'yfinance' in report['errors']['market_data_provider']
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+from wsgi_bridge import ThreadPoolWsgiToAsgi
+
+
+def _scope(path='/', **overrides):
+    return dict({'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'http_version': '1.1',
+                 'headers': []}, **overrides)
+
+
+async def _request(application, path='/', disconnect=None, body=(b'',), **scope):
+    sent = []
+    received = [{'type': 'http.request', 'body': chunk, 'more_body': position < len(body) - 1}
+                for position, chunk in enumerate(body)]
+
+    async def receive():
+        if received:
+            return received.pop(0)
+        if disconnect is not None:
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    await application(_scope(path, **scope), receive, send)
+    return sent
+
+
+def test_concurrent_requests_overlap():
+    def slow_app(environ, start_response):
+        time.sleep(0.5)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    application = ThreadPoolWsgiToAsgi(slow_app, max_threads=8)
+
+    async def run():
+        return await asyncio.gather(*(_request(application) for _ in range(4)))
+
+    started = time.perf_counter()
+    responses = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 1.2
+    assert all(sent[0]['status'] == 200 and sent[1]['body'] == b'ok' for sent in responses)
+
+
+def test_disconnect_closes_a_streaming_response():
+    closed = threading.Event()
+
+    def stream_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/event-stream')])
+
+        def events():
+            try:
+                while True:
+                    time.sleep(0.01)
+                    yield b'data: tick\n\n'
+            finally:
+                closed.set()
+
+        return events()
+
+    application = ThreadPoolWsgiToAsgi(stream_app, max_threads=2)
+
+    async def run():
+        disconnect = asyncio.Event()
+        request = asyncio.ensure_future(_request(application, disconnect=disconnect))
+        await asyncio.sleep(0.1)
+        disconnect.set()
+        await asyncio.wait_for(request, timeout=2)
+
+    asyncio.run(run())
+
+    assert closed.is_set()
+
+
+def test_requests_are_translated_to_wsgi_environ():
+    def echo_app(environ, start_response):
+        start_response('201 Created', [('Content-Type', 'text/plain'), ('X-Echo', 'yes')])
+        return [repr((environ['REQUEST_METHOD'], environ['PATH_INFO'], environ['QUERY_STRING'],
+                      environ['CONTENT_TYPE'], environ['HTTP_ACCEPT'], environ['SERVER_NAME'],
+                      environ['SERVER_PORT'], environ['REMOTE_ADDR'], environ['wsgi.input'].read())).encode()]
+
+    sent = asyncio.run(_request(
+        ThreadPoolWsgiToAsgi(echo_app), path='/predict/batch', body=(b'{"requests":', b' []}'), method='POST',
+        query_string=b'a=1&b=2', server=('example.com', 8000), client=('10.0.0.1', 5123),
+        headers=[(b'content-type', b'application/json'), (b'accept', b'text/html'), (b'accept', b'*/*')]))
+
+    assert sent[0] == {'type': 'http.response.start', 'status': 201,
+                       'headers': [(b'content-type', b'text/plain'), (b'x-echo', b'yes')]}
+    assert sent[1]['body'] == repr(('POST', '/predict/batch', 'a=1&b=2', 'application/json', 'text/html,*/*',
+                                    'example.com', '8000', '10.0.0.1', b'{"requests": []}')).encode()
+    assert sent[-1] == {'type': 'http.response.body'}
+
+
+def test_body_is_cut_at_the_declared_content_length():
+    def long_app(environ, start_response):
+        start_response('200 OK', [('Content-Length', '5')])
+        return [b'abc', b'defgh', b'ijk']
+
+    sent = asyncio.run(_request(ThreadPoolWsgiToAsgi(long_app)))
+
+    assert b''.join(message.get('body', b'') for message in sent[1:]) == b'abcde'
+
+
+def test_lifespan_is_acknowledged():
+    messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(ThreadPoolWsgiToAsgi(None)({'type': 'lifespan'}, receive, send))
+
+    assert sent == [{'type': 'lifespan.startup.complete'}, {'type': 'lifespan.shutdown.complete'}]
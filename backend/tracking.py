@@ -0,0 +1,123 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from market_data import BAR_DURATIONS, align_timestamps, timeframe_interval
+
+logger = logging.getLogger(__name__)
+
+# Longest market closure bridged when a target falls outside trading hours (a holiday weekend)
+MAX_MARKET_CLOSURE = pd.Timedelta(days=4)
+
+
+def resolve_actual_prices(predictions, market_data, now=None):
+    """
+    Look up the realised price for every prediction whose target time has passed
+
+    Due predictions are grouped by (ticker, timeframe) so each group costs a
+    single covering range read from the market data cache. Target times are
+    then matched to bars with an as-of join: the last bar that started within
+    one bar duration of the target time. A match is only accepted once that
+    bar has closed; until then its close is not final and the prediction is
+    left unresolved for a later pass.
+
+    Targets that fall while the market is closed (after the close, on
+    weekends and holidays) have no such bar. They resolve to the last close
+    before the target once the first bar after it has closed, which shows
+    the gap was a closure rather than data that has not arrived yet.
+
+    Args:
+        predictions (list): Dicts with 'ticker', 'timeframe', 'target_time'
+            (datetime) and 'predicted_price'
+        market_data (MarketDataCache): Source of OHLCV bars
+        now (datetime, optional): Reference time, defaults to datetime.now()
+
+    Returns:
+        list: (actual_price, error_percentage) per prediction, (None, None)
+        when the prediction is not due yet or no bar matches
+    """
+    now = now or datetime.now()
+    results = [(None, None)] * len(predictions)
+
+    groups = defaultdict(list)
+    for position, prediction in enumerate(predictions):
+        if prediction['target_time'] < now:
+            groups[(prediction['ticker'], prediction['timeframe'])].append(position)
+
+    for (ticker, timeframe), positions in groups.items():
+        interval, _ = timeframe_interval(timeframe)
+        tolerance = BAR_DURATIONS[interval]
+        target_times = [predictions[p]['target_time'] for p in positions]
+        # Wide enough to find the bars on both sides of a closure
+        margin = max(tolerance, MAX_MARKET_CLOSURE)
+
+        try:
+            hist = market_data.get_range(ticker, interval,
+                                         min(target_times) - margin,
+                                         max(target_times) + margin)
+        except Exception:
+            logger.exception('Error fetching actual prices', extra={'ticker': ticker, 'timeframe': timeframe})
+            continue
+        if hist.empty:
+            continue
+
+        bar_times = hist.index.asi8
+        closes = hist['Close'].to_numpy(dtype=float)
+        targets = align_timestamps(target_times, hist.index.tz).asi8
+
+        now_ns = align_timestamps(now, hist.index.tz).value
+
+        # Last bar starting before target + tolerance
+        idx = np.searchsorted(bar_times, targets + tolerance.value, side='left') - 1
+        bar_starts = bar_times[np.maximum(idx, 0)]
+        in_session = bar_starts >= targets - tolerance.value
+        # The provider returns the bar that is still forming; skip it rather than fall back to an older one
+        closed = bar_starts + tolerance.value <= now_ns
+        # Outside trading hours: the first bar after the target must have closed
+        next_starts = bar_times[np.minimum(idx + 1, len(bar_times) - 1)]
+        reopened = (idx + 1 < len(bar_times)) & (next_starts + tolerance.value <= now_ns)
+        matched = (idx >= 0) & np.where(in_session, closed, reopened)
+
+        predicted = np.array([predictions[p]['predicted_price'] for p in positions], dtype=float)
+        actual = closes[np.maximum(idx, 0)]
+        errors = (actual - predicted) / predicted * 100
+
+        for position, ok, price, error in zip(positions, matched, actual, errors):
+            if ok:
+                results[position] = (float(price), float(error))
+
+    return results
+
+
+def error_statistics(error_percentages):
+    """
+    Accuracy summary of resolved predictions
+
+    Args:
+        error_percentages (array-like): Signed errors in percent
+
+    Returns:
+        dict: Count, average/max/min absolute error and the share of
+        predictions within 1% and 5%, in percent
+    """
+    errors = np.abs(np.asarray(error_percentages, dtype=np.float64))
+    if len(errors) == 0:
+        return {
+            'completed_predictions': 0,
+            'average_error': None,
+            'max_error': None,
+            'min_error': None,
+            'accuracy_within_1_percent': 0,
+            'accuracy_within_5_percent': 0
+        }
+    return {
+        'completed_predictions': len(errors),
+        'average_error': float(errors.mean()),
+        'max_error': float(errors.max()),
+        'min_error': float(errors.min()),
+        'accuracy_within_1_percent': float(np.mean(errors <= 1) * 100),
+        'accuracy_within_5_percent': float(np.mean(errors <= 5) * 100)
+    }
@@ -0,0 +1,53 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup(threading.Thread):
+    """
+    Run slow start-up steps in the background and track readiness
+
+    Importing the app only does cheap, idempotent setup, so a worker accepts
+    connections right away; heavy imports and model loading run here as
+    ``(name, callable)`` steps, in order. ``ready`` turns true once every
+    step has finished without error.
+    """
+
+    def __init__(self, steps):
+        super().__init__(name='warmup', daemon=True)
+        self.steps = list(steps)
+        self.started_at = time.time()
+        self.status = {name: 'pending' for name, _ in self.steps}
+        self.errors = {}
+        self.finished = threading.Event()
+
+    def run(self):
+        for name, step in self.steps:
+            self.status[name] = 'running'
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self.status[name] = 'failed'
+                self.errors[name] = str(e)
+                logger.exception('Warm-up step failed', extra={'step': name})
+            else:
+                self.status[name] = 'done'
+                logger.info('Warm-up step finished',
+                            extra={'step': name, 'seconds': round(time.perf_counter() - started, 3)})
+        self.finished.set()
+
+    @property
+    def ready(self):
+        return self.finished.is_set() and not self.errors
+
+    def report(self):
+        """Readiness summary served by /healthz."""
+        return {
+            'ready': self.ready,
+            'steps': dict(self.status),
+            'errors': dict(self.errors),
+            'uptime': round(time.time() - self.started_at, 1)
+        }
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+
+class ClientDisconnected(ConnectionError):
+    """The client went away while a response was being streamed to it."""
+
+
+class ThreadPoolWsgiToAsgi:
+    """
+    Serve a WSGI app over ASGI with a bounded pool of request threads
+
+    Each request runs on its own thread from a pool of ``max_threads``, so
+    concurrent requests and streaming responses do not queue behind each
+    other, and a client disconnect stops the response iterator, so a
+    long-lived stream frees its thread as soon as the client goes away.
+
+    Only the WSGI (PEP 3333) and ASGI specifications are relied on, not the
+    internals of another adapter, so no dependency upgrade can break it.
+    """
+
+    def __init__(self, wsgi_application, max_threads=32):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await _lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await _Request(self.wsgi_application, scope, receive, send).run(self.executor)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type '{scope['type']}'")
+
+
+async def _lifespan(receive, send):
+    # Nothing to set up: acknowledge startup and shutdown so the server does not warn
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope and request body into a WSGI environ."""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': BytesIO(),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1')
+        if name == 'content-length':
+            key = 'CONTENT_LENGTH'
+        elif name == 'content-type':
+            key = 'CONTENT_TYPE'
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+        value = value.decode('latin1')
+        # Repeated headers are joined, as WSGI servers do
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class _Request:
+    def __init__(self, wsgi_application, scope, receive, send):
+        self.wsgi_application = wsgi_application
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.loop = None
+        self.disconnected = threading.Event()
+        self.response_start = None
+        self.response_started = False
+        self.content_length = None
+
+    async def run(self, executor):
+        self.loop = asyncio.get_running_loop()
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await self.receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+
+            watcher = asyncio.ensure_future(self._watch_disconnect())
+            try:
+                await self.loop.run_in_executor(executor, self._run, body)
+            except ClientDisconnected:
+                pass
+            finally:
+                watcher.cancel()
+
+    async def _watch_disconnect(self):
+        while True:
+            message = await self.receive()
+            if message['type'] == 'http.disconnect':
+                self.disconnected.set()
+                return
+
+    def start_response(self, status, response_headers, exc_info=None):
+        if exc_info is not None:
+            try:
+                if self.response_started:
+                    # Too late to change the status: abort the response instead
+                    raise exc_info[1].with_traceback(exc_info[2])
+            finally:
+                exc_info = None
+        elif self.response_start is not None:
+            raise ValueError('start_response called a second time without exc_info')
+
+        self.content_length = None
+        for name, value in response_headers:
+            if name.lower() == 'content-length':
+                self.content_length = int(value)
+        self.response_start = {
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('ascii'), value.encode('ascii')) for name, value in response_headers]
+        }
+
+    def _send(self, message):
+        if self.disconnected.is_set():
+            raise ClientDisconnected()
+        asyncio.run_coroutine_threadsafe(self.send(message), self.loop).result()
+
+    def _start(self):
+        if not self.response_started:
+            self.response_started = True
+            self._send(self.response_start)
+
+    def _run(self, body):
+        output = self.wsgi_application(build_environ(self.scope, body), self.start_response)
+        try:
+            bytes_sent = 0
+            for chunk in output:
+                self._start()
+                if self.content_length is not None:
+                    # Never send more than the declared Content-Length
+                    chunk = chunk[:self.content_length - bytes_sent]
+                self._send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                bytes_sent += len(chunk)
+                if bytes_sent == self.content_length:
+                    break
+            self._start()
+            self._send({'type': 'http.response.body'})
+        finally:
+            # Runs generator cleanup, e.g. unsubscribing a stream
+            if hasattr(output, 'close'):
+                output.close()
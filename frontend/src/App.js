@@ -1,6 +1,11 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import { createChart } from 'lightweight-charts';
+import { mergeBars, subscribePredictions } from './predictionStream';
+
+const loadTrackingData = (params) => axios.get(`http://localhost:5000/track_predictions`, {
+  params: { ...params, days: 7 }
+});
 
 function App() {
   const [ticker, setTicker] = useState('');
@@ -12,6 +17,10 @@ function App() {
   const [activeTab, setActiveTab] = useState('predict');
   const [trackingData, setTrackingData] = useState(null);
   const [chartContainer, setChartContainer] = useState(null);
+  // The ticker, market and timeframe last loaded; /stream keeps their results current
+  const [streamParams, setStreamParams] = useState(null);
+  const trackingShown = useRef(false);
+  trackingShown.current = trackingData !== null;
 
   const markets = [
     {
@@ -49,8 +58,34 @@ function App() {
     setTicker('');
     setPredictions(null);
     setTrackingData(null);
+    setStreamParams(null);
   };
 
+  useEffect(() => {
+    if (!streamParams) {
+      return undefined;
+    }
+    return subscribePredictions(streamParams, {
+      onBar: (bars) => setPredictions(prev => prev && {
+        ...prev,
+        historical_data: mergeBars(prev.historical_data, bars)
+      }),
+      onPrediction: (update) => {
+        setPredictions(prev => prev && {
+          ...prev,
+          predictions: update.predictions,
+          confidence_bands: update.confidence_bands
+        });
+        // A bar closed: a new prediction was stored and older ones may have resolved
+        if (trackingShown.current) {
+          loadTrackingData(streamParams)
+            .then(response => setTrackingData(response.data))
+            .catch(() => {});
+        }
+      }
+    });
+  }, [streamParams]);
+
   useEffect(() => {
     if (chartContainer && predictions) {
       const chart = createChart(chartContainer, {
@@ -124,12 +159,16 @@ function App() {
     try {
       setLoading(true);
       setError('');
-      const response = await axios.post('http://localhost:5000/predict', {
-        ticker,
-        marketType,
-        timeframe
+      // GET so the browser can reuse the response until the next bar closes
+      const response = await axios.get('http://localhost:5000/predict', {
+        params: {
+          ticker,
+          marketType,
+          timeframe
+        }
       });
       setPredictions(response.data);
+      setStreamParams({ ticker, marketType, timeframe });
     } catch (err) {
       setError(err.response?.data?.error || 'Failed to fetch predictions');
     } finally {
@@ -141,15 +180,9 @@ function App() {
     try {
       setLoading(true);
       setError('');
-      const response = await axios.get(`http://localhost:5000/track_predictions`, {
-        params: {
-          ticker,
-          marketType,
-          timeframe,
-          days: 7
-        }
-      });
+      const response = await loadTrackingData({ ticker, marketType, timeframe });
       setTrackingData(response.data);
+      setStreamParams({ ticker, marketType, timeframe });
     } catch (err) {
       setError(err.response?.data?.error || 'Failed to fetch tracking data');
     } finally {
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
+import { subscribePredictions } from '../predictionStream';
 
 const PredictionTracker = ({ ticker, marketType, timeframe }) => {
   const [trackingData, setTrackingData] = useState(null);
@@ -9,7 +10,6 @@ const PredictionTracker = ({ ticker, marketType, timeframe }) => {
   useEffect(() => {
     const fetchTrackingData = async () => {
       try {
-        setLoading(true);
         const response = await axios.get(`http://localhost:5000/track_predictions`, {
           params: {
             ticker,
@@ -27,16 +27,10 @@ const PredictionTracker = ({ ticker, marketType, timeframe }) => {
       }
     };
 
+    setLoading(true);
     fetchTrackingData();
-    // Refresh data more frequently for shorter timeframes
-    const interval = setInterval(
-      fetchTrackingData,
-      timeframe === '5min' ? 30000 : // 30 seconds
-      timeframe === '15min' ? 60000 : // 1 minute
-      timeframe === '1h' ? 300000 : // 5 minutes
-      900000 // 15 minutes for daily
-    );
-    return () => clearInterval(interval);
+    // Refresh when a bar closes: that stores a new prediction and may resolve older ones
+    return subscribePredictions({ ticker, marketType, timeframe }, { onPrediction: fetchTrackingData });
   }, [ticker, marketType, timeframe]);
 
   if (loading) {
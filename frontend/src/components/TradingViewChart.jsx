@@ -1,7 +1,22 @@
 import React, { useEffect, useRef } from 'react';
 import { createChart } from 'lightweight-charts';
 
-const TradingViewChart = ({ historicalData, predictions, ticker }) => {
+// The backend returns history either as row objects or, with format=columnar,
+// as parallel arrays of time/open/high/low/close/volume
+const toRecords = (data) => {
+  if (!data || Array.isArray(data)) return data;
+  return data.time.map((time, i) => ({
+    time,
+    open: data.open[i],
+    high: data.high[i],
+    low: data.low[i],
+    close: data.close[i],
+    volume: data.volume[i],
+  }));
+};
+
+const TradingViewChart = ({ historicalData: rawHistoricalData, predictions, ticker }) => {
+  const historicalData = toRecords(rawHistoricalData);
   const chartContainerRef = useRef();
   const chartRef = useRef(null);
   const candlestickSeriesRef = useRef(null);
@@ -141,7 +156,7 @@ const TradingViewChart = ({ historicalData, predictions, ticker }) => {
       console.error('Chart data formatting error:', error);
       cleanupChart();
     }
-  }, [historicalData, predictions, ticker]);
+  }, [rawHistoricalData, predictions, ticker]);
 
   return (
     <div
@@ -0,0 +1,23 @@
+// Live bar and prediction updates from the backend's /stream endpoint (Server-Sent Events)
+export const subscribePredictions = ({ ticker, marketType, timeframe }, { onBar, onPrediction }) => {
+  const params = new URLSearchParams({ ticker, marketType, timeframe });
+  const source = new EventSource(`http://localhost:5000/stream?${params}`);
+
+  // The browser reconnects on its own after a dropped connection
+  if (onBar) {
+    source.addEventListener('bar', (event) => onBar(JSON.parse(event.data).bars));
+  }
+  if (onPrediction) {
+    source.addEventListener('prediction', (event) => onPrediction(JSON.parse(event.data)));
+  }
+  return () => source.close();
+};
+
+// Replace the bars the update starts from (the forming bar may have moved) and append the new ones
+export const mergeBars = (history, bars) => {
+  if (!bars.length) {
+    return history;
+  }
+  const since = bars[0].time;
+  return [...history.filter(bar => bar.time < since), ...bars];
+};
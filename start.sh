@@ -30,9 +30,9 @@ echo -e "${BLUE}Installing backend dependencies...${NC}"
 cd backend
 pip install -r requirements.txt
 
-# Start backend server in the background
+# Start backend server in the background (BACKEND_WORKERS worker processes)
 echo -e "${GREEN}Starting backend server...${NC}"
-python app.py &
+python serve.py --port $BACKEND_PORT --workers ${BACKEND_WORKERS:-4} &
 BACKEND_PID=$!
 
 # Wait for backend to start